@@ -0,0 +1,138 @@
+import json
+import os
+
+
+class Checkpoint:
+    """
+    A manifest of the chunks of a run that are loaded and committed, stored
+    as a json file. A run that is given the checkpoint of a run that died
+    skips the chunks that are done and continues with the next one, with
+    the random state that is recorded with the chunks, so the tables end up
+    the same as those of an uninterrupted run.
+
+    The manifest holds the parameters of the run. A checkpoint of a run with
+    other parameters raises instead of resuming. Delete the file, or call
+    clear, to start over.
+
+    Parameters
+    --------------------------------------------------
+    path : str
+        The path of the json file. It is created by the first chunk that is
+        done.
+
+    Example Usage
+    --------------------------------------------------
+    from dbgen.checkpoint import Checkpoint
+
+    database.initialize(..., numpy_seed=0, checkpoint='run.json')
+
+    # after a crash, the same call continues where the run stopped
+    database = Create(engine=engine)
+    database.initialize(..., numpy_seed=0, checkpoint='run.json')
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.params = None
+        self.chunks = {}
+        if os.path.exists(path):
+            with open(path) as file:
+                manifest = json.load(file)
+            self.params = manifest['params']
+            self.chunks = manifest['chunks']
+
+    def start(self, params):
+        """
+        Starts or resumes the run with params, a json serializable
+        dictionary. Returns True if chunks of the run are already done.
+        """
+        params = json.loads(json.dumps(params))
+        if self.params is not None and self.params != params:
+            changed = sorted(
+                k for k in set(params) | set(self.params)
+                if params.get(k) != self.params.get(k)
+            )
+            raise Exception(
+                f"The checkpoint {self.path} was written by a run with other "
+                f"parameters, {changed} differ. Delete it to start over."
+            )
+        self.params = params
+        return any(self.completed(table) for table in self.chunks)
+
+    def done(self, table, chunk_no, state=None):
+        """
+        Records that the chunk chunk_no of table is committed, with the
+        random state to continue from, and writes the manifest.
+
+        Chunks 0, 1, 2, ... without a gap are kept as their count and only
+        the state of the last of them is kept, a resumed run continues from 
+        there. The numbers and states of chunks after a gap are kept until 
+        the gap is filled. So the manifest does not grow with the number of 
+        chunks of a run that commits them in order.
+        """
+        chunks = self.chunks.setdefault(
+            table, {'prefix': 0, 'done': [], 'states': {}}
+        )
+        done = set(chunks['done']) | {chunk_no}
+        states = {int(k): v for k, v in chunks['states'].items()}
+        states[chunk_no] = state
+
+        prefix = chunks['prefix']
+        while prefix in done:
+            done.remove(prefix)
+            prefix += 1
+        chunks['prefix'] = prefix
+        chunks['done'] = sorted(done)
+        chunks['states'] = {
+            str(k): v for k, v in sorted(states.items())
+            if k in done or k == prefix - 1
+        }
+        self._write()
+
+    def completed(self, table):
+        """
+        The sorted numbers of the chunks of table that are done.
+        """
+        chunks = self.chunks.get(table, {'prefix': 0, 'done': []})
+        return list(range(chunks['prefix'])) + chunks['done']
+
+    def state(self, table, chunk_no):
+        """
+        The state recorded with the chunk chunk_no of table. Kept for the 
+        last chunk without a gap before it and for the chunks after a gap.
+        """
+        return self.chunks[table]['states'][str(chunk_no)]
+
+    def clear(self):
+        self.params = None
+        self.chunks = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _write(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path + '.tmp', 'w') as file:
+            json.dump({'params': self.params, 'chunks': self.chunks}, file)
+        os.replace(self.path + '.tmp', self.path)
+
+
+def as_checkpoint(checkpoint):
+    """
+    Returns checkpoint as a Checkpoint, or None.
+    """
+    if checkpoint is None or isinstance(checkpoint, Checkpoint):
+        return checkpoint
+    return Checkpoint(checkpoint)
+
+
+def completed_prefix(chunk_nos):
+    """
+    The number of chunks 0, 1, 2, ... in chunk_nos without a gap.
+    """
+    chunk_nos = set(chunk_nos)
+    count = 0
+    while count in chunk_nos:
+        count += 1
+    return count
@@ -0,0 +1,48 @@
+import sqlalchemy as db
+
+
+def index_args(table_name, indexes, profiles):
+    """
+    Builds the __table_args__ of a table mapper from an index profile.
+
+    Parameters
+    --------------------------------------------------
+    table_name : str
+        The name of the table, ie "children".
+
+    indexes : str, dict, list or None
+        * None creates no secondary indexes.
+        * A str is the name of a profile in profiles, ie 'analytics'.
+        * A dict is a profile itself, ie {'employment': ['job']}.
+        * A list of column names and tuples of column names, ie
+            ['job', ('ticker', 'datetime')]. Every entry becomes one index.
+
+    profiles : dict
+        A dictionary of the form {profile: {table_name: [columns, ...]}}.
+
+    Returns
+    --------------------------------------------------
+    table_args : tuple
+        A tuple of sqlalchemy.Index objects named ix_{table}_{columns}.
+    """
+    if indexes is None:
+        return ()
+
+    if isinstance(indexes, str):
+        if indexes not in profiles:
+            raise Exception(
+                f"indexes must be one of {list(profiles)}, not {indexes}."
+            )
+        indexes = profiles[indexes]
+
+    if isinstance(indexes, dict):
+        indexes = indexes.get(table_name, [])
+
+    table_args = []
+    for columns in indexes:
+        if isinstance(columns, str):
+            columns = (columns,)
+        table_args.append(
+            db.Index(f"ix_{table_name}_{'_'.join(columns)}", *columns)
+        )
+    return tuple(table_args)
@@ -0,0 +1,5 @@
+from .insert import columns_to_rows, insert_columns
+from .native import LOAD_METHODS, load_columns
+from .convert import FORMATS, convert_columns, rebatch
+from .sinks import Sink, DatabaseSink, ParquetSink, CSVSink, SQLiteSink
+from .async_sink import AsyncDatabaseSink
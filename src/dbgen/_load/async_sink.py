@@ -0,0 +1,153 @@
+import asyncio
+from .insert import insert_columns
+from .._stats import batch_size
+
+
+class AsyncDatabaseSink:
+    """
+    The asyncio counterpart of DatabaseSink. Loads the batches into the
+    tables of an sqlalchemy AsyncEngine, ie of create_async_engine with
+    aiosqlite, asyncmy or asyncpg. Every table has its own queue and loader
+    task, so the tables are loaded concurrently over up to max_connections
+    connections of the pool of the engine while the next batches are
+    generated. Every batch is inserted chunk_size rows per executemany and
+    committed in its own transaction.
+
+    SQLite only has one writer at a time, so on SQLite the tables are
+    loaded over a single connection.
+
+    Parameters
+    --------------------------------------------------
+    engine : sqlalchemy.ext.asyncio.AsyncEngine
+
+    chunk_size : int, Default 10000
+        The number of rows per executemany.
+
+    max_connections : int, Default 4
+        The largest number of batches that are inserted at once.
+
+    queue_size : int, Default 2
+        The number of batches per table that wait to be inserted. write
+        waits while the queue of the table is full, so memory stays bounded
+        when the database is slower than the generator.
+
+    Example Usage
+    --------------------------------------------------
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine("postgresql+asyncpg://...")
+    async with AsyncDatabaseSink(engine).open(tables) as sink:
+        await sink.write('children', {'child_id': np.arange(1, 4), ...})
+    """
+
+    def __init__(
+        self, engine, chunk_size=10000, max_connections=4, queue_size=2
+    ):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        if engine.dialect.name == 'sqlite':
+            max_connections = 1
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self.tables = {}
+        self._queues = {}
+        self._tasks = {}
+        self._semaphore = None
+        self._stats = None
+
+    def open(self, tables, stats=None):
+        """
+        tables : list
+            The sqlalchemy Table objects of the tables that will be written.
+
+        stats : dbgen.stats.Stats, Default None
+            Records the time spent inserting every table as "load.{table}".
+        """
+        self.tables = {table.name: table for table in tables}
+        self._stats = stats
+        self._semaphore = asyncio.Semaphore(self.max_connections)
+        self._queues = {
+            name: asyncio.Queue(maxsize=self.queue_size)
+            for name in self.tables
+        }
+        self._tasks = {
+            name: asyncio.create_task(self._load(name))
+            for name in self.tables
+        }
+        return self
+
+    async def write(self, table, columns):
+        """
+        Queues a column batch of the table named table for inserting.
+        """
+        task = self._tasks[table]
+        put = asyncio.ensure_future(self._queues[table].put(columns))
+        # a failed loader would never take the batch, so its exception is
+        # raised instead of waiting forever
+        await asyncio.wait([put, task], return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            task.result()
+            raise Exception(f"The loader of {table} is closed.")
+
+    async def write_from(self, batches):
+        """
+        Writes the batches of the iterator batches, dictionaries of the form
+        {table_name: {column_name: np.array}}. The batches are generated in
+        a worker thread, so the inserts go on while the next batch is
+        generated.
+        """
+        batches = iter(batches)
+        while True:
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                return None
+            for name, columns in batch.items():
+                await self.write(name, columns)
+
+    async def close(self):
+        """
+        Waits for all of the queued batches to be inserted.
+        """
+        for name, queue in self._queues.items():
+            if not self._tasks[name].done():
+                await queue.put(None)
+        try:
+            await asyncio.gather(*self._tasks.values())
+        finally:
+            self._tasks = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.close()
+            return False
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks = {}
+        return False
+
+    async def _load(self, name):
+        table, queue = self.tables[name], self._queues[name]
+        while True:
+            columns = await queue.get()
+            if columns is None:
+                return None
+            async with self._semaphore:
+                if self._stats is None:
+                    await self._insert(table, columns)
+                    continue
+                rows, nbytes = batch_size(columns)
+                with self._stats.stage(
+                    f'load.{name}', rows=rows, nbytes=nbytes
+                ):
+                    await self._insert(table, columns)
+
+    async def _insert(self, table, columns):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(
+                insert_columns, table, columns, self.chunk_size
+            )
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+
+FORMATS = ['columns', 'numpy', 'arrow']
+
+
+def concat_columns(batches):
+    """
+    Concatenates a list of column batches, ie dictionaries of the form
+    {column_name: np.array}, into a single column batch. Masked columns stay
+    masked.
+    """
+    names = list(batches[0].keys())
+    columns = {}
+    for name in names:
+        cols = [batch[name] for batch in batches]
+        if any(isinstance(col, np.ma.MaskedArray) for col in cols):
+            columns[name] = np.ma.concatenate(cols)
+        else:
+            columns[name] = np.concatenate(cols)
+    return columns
+
+
+def rebatch(batches, batch_size):
+    """
+    Takes an iterable of column batches of any size and yields column batches
+    of exactly batch_size rows, except for the last one which may be smaller.
+    At most one batch worth of rows is held in memory.
+    """
+    pending = []
+    no_pending = 0
+    for batch in batches:
+        pending.append(batch)
+        no_pending += len(next(iter(batch.values())))
+        if no_pending < batch_size:
+            continue
+        columns = concat_columns(pending)
+        start = 0
+        while no_pending - start >= batch_size:
+            yield {
+                name: col[start: start + batch_size]
+                for name, col in columns.items()
+            }
+            start += batch_size
+        pending = [{name: col[start:] for name, col in columns.items()}]
+        no_pending -= start
+    if no_pending > 0:
+        yield concat_columns(pending)
+
+
+def to_structured(columns):
+    """
+    Converts a column batch to a numpy structured array. The result is a
+    numpy.ma.MaskedArray whose mask is set where a masked column is NULL. Use
+    the data attribute to get the plain structured array.
+    """
+    names = list(columns.keys())
+    data = [np.ma.getdata(np.asarray(columns[name])) for name in names]
+    masks = [np.ma.getmaskarray(columns[name]) for name in names]
+    dtype = [(name, col.dtype) for name, col in zip(names, data)]
+    no_rows = len(data[0]) if data else 0
+
+    out = np.empty(no_rows, dtype=dtype)
+    mask = np.empty(no_rows, dtype=[(name, bool) for name in names])
+    for name, col, col_mask in zip(names, data, masks):
+        out[name] = col
+        mask[name] = col_mask
+    return np.ma.array(out, mask=mask)
+
+
+def to_record_batch(columns):
+    """
+    Converts a column batch to a pyarrow.RecordBatch. Masked entries become
+    nulls. Requires pyarrow.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise Exception("The 'arrow' format requires pyarrow to be installed.")
+
+    arrays = []
+    for col in columns.values():
+        if isinstance(col, np.ma.MaskedArray):
+            # a validity mask over the data, so integers stay integers
+            data = np.ma.getdata(col)
+            arrays.append(
+                pa.array(
+                    data,
+                    mask=np.ma.getmaskarray(col),
+                    type=pa.from_numpy_dtype(data.dtype),
+                )
+            )
+        else:
+            arrays.append(pa.array(np.asarray(col)))
+    return pa.RecordBatch.from_arrays(arrays, names=list(columns.keys()))
+
+
+def to_arrow_table(columns):
+    """
+    Converts a column batch to a pyarrow.Table, see to_record_batch. The 
+    masked integer columns are marked as nullable Int64 columns in the 
+    pandas metadata of the schema, so that pandas.read_parquet reads them 
+    back as integers with NULLs instead of as floats with NaNs. Requires 
+    pyarrow.
+    """
+    import pyarrow as pa
+
+    table = pa.Table.from_batches([to_record_batch(columns)])
+    nullable = {
+        name: pd.array([], dtype='Int64')
+        for name, col in columns.items()
+        if isinstance(col, np.ma.MaskedArray)
+        and np.issubdtype(col.dtype, np.integer)
+    }
+    if not nullable:
+        return table
+    metadata = pa.Schema.from_pandas(
+        pd.DataFrame(nullable), preserve_index=False
+    ).metadata
+    return table.replace_schema_metadata(metadata)
+
+
+def convert_columns(columns, format='columns'):
+    """
+    Converts a column batch to one of the FORMATS.
+
+    Parameters
+    --------------------------------------------------
+    columns : dict
+        A dictionary of the form {column_name: np.array}.
+
+    format : str, Default 'columns'
+        * 'columns' returns the dictionary of numpy arrays as is.
+        * 'numpy' returns a masked numpy structured array, see to_structured.
+        * 'arrow' returns a pyarrow.RecordBatch.
+    """
+    if format == 'columns':
+        return columns
+    if format == 'numpy':
+        return to_structured(columns)
+    if format == 'arrow':
+        return to_record_batch(columns)
+    raise Exception(f"format must be one of {FORMATS}, not {format}.")
@@ -0,0 +1,187 @@
+import sqlalchemy as db
+from sqlalchemy.schema import AddConstraint, CreateIndex, CreateTable
+
+
+def create_bare_table(conn, table):
+    """
+    Creates table without its primary key, check and unique constraints,
+    indexes and autoincrement, so that loading rows into it does not pay
+    for any index maintenance. Rows are inserted with table.insert() as
+    usual and build_constraints turns it into table afterwards.
+
+    On sqlite a table whose primary key is a single integer column is
+    created as is, minus the indexes, since that column is the rowid and
+    costs nothing to maintain.
+
+    Parameters
+    --------------------------------------------------
+    conn : sqlalchemy connection
+
+    table : sqlalchemy.Table
+        The fully defined table.
+    """
+    if _is_rowid_table(conn, table):
+        conn.execute(CreateTable(table))
+        return None
+
+    bare = db.Table(
+        table.name,
+        db.MetaData(),
+        *[
+            db.Column(
+                col.name,
+                col.type,
+                nullable=col.nullable,
+                autoincrement=False,
+                server_default=col.server_default,
+            )
+            for col in table.columns
+        ],
+        schema=table.schema,
+    )
+    conn.execute(CreateTable(bare))
+
+
+def build_constraints(conn, table):
+    """
+    Turns the bare table created by create_bare_table into table by adding the
+    primary key, the check and unique constraints, the autoincrement and the
+    indexes of table. On sqlite the table is instead rebuilt, ie the bare
+    table is renamed, table is created, the rows are copied over with a
+    single INSERT ... SELECT and the bare table is dropped. Tables kept by
+    create_bare_table only get their indexes.
+    """
+    if _is_rowid_table(conn, table):
+        pass
+    elif conn.dialect.name == 'sqlite':
+        _rebuild_sqlite_table(conn, table)
+    else:
+        conn.execute(AddConstraint(table.primary_key))
+        for constraint in _constraints(table):
+            conn.execute(AddConstraint(constraint))
+        for col in table.columns:
+            for constraint in col.constraints:
+                _add_column_check(conn, table, constraint)
+        _restore_autoincrement(conn, table)
+
+    for index in table.indexes:
+        conn.execute(CreateIndex(index))
+
+
+def begin_bulk_load(conn):
+    """
+    Relaxes the durability and checking settings of the session of conn for
+    the duration of a bulk load and returns what end_bulk_load needs to
+    restore them.
+        * sqlite : PRAGMA synchronous = OFF and journal_mode = MEMORY
+        * mysql : autocommit, unique_checks and foreign_key_checks off
+        * postgresql : synchronous_commit off for the transaction
+    """
+    name = conn.dialect.name
+    if name == 'sqlite':
+        saved = {
+            'synchronous': conn.exec_driver_sql(
+                'PRAGMA synchronous'
+            ).scalar(),
+            'journal_mode': conn.exec_driver_sql(
+                'PRAGMA journal_mode'
+            ).scalar(),
+        }
+        conn.exec_driver_sql('PRAGMA synchronous = OFF')
+        conn.exec_driver_sql('PRAGMA journal_mode = MEMORY')
+        return saved
+    if name == 'mysql':
+        conn.exec_driver_sql(
+            'SET autocommit = 0, unique_checks = 0, foreign_key_checks = 0'
+        )
+        return {}
+    if name == 'postgresql':
+        conn.exec_driver_sql('SET LOCAL synchronous_commit TO OFF')
+        return {}
+    return {}
+
+
+def end_bulk_load(conn, saved):
+    """
+    Restores the settings changed by begin_bulk_load. Must be called after
+    the load is committed.
+    """
+    name = conn.dialect.name
+    if name == 'sqlite':
+        conn.exec_driver_sql(f"PRAGMA synchronous = {saved['synchronous']}")
+        conn.exec_driver_sql(f"PRAGMA journal_mode = {saved['journal_mode']}")
+    elif name == 'mysql':
+        conn.exec_driver_sql('SET unique_checks = 1, foreign_key_checks = 1')
+    conn.commit()
+
+
+def _is_rowid_table(conn, table):
+    pk = list(table.primary_key.columns)
+    return (
+        conn.dialect.name == 'sqlite'
+        and len(pk) == 1
+        and isinstance(pk[0].type, db.Integer)
+    )
+
+
+def _constraints(table):
+    return [
+        c for c in table.constraints
+        if not isinstance(c, db.PrimaryKeyConstraint)
+    ]
+
+
+def _add_column_check(conn, table, constraint):
+    """
+    Column level check constraints are not bound to the table, so
+    AddConstraint can not compile them.
+    """
+    preparer = conn.dialect.identifier_preparer
+    statement = f'ALTER TABLE {preparer.format_table(table)} ADD '
+    if constraint.name is not None:
+        statement += f'CONSTRAINT {preparer.quote(constraint.name)} '
+    sqltext = constraint.sqltext.compile(
+        dialect=conn.dialect, compile_kwargs={'literal_binds': True}
+    )
+    statement += f'CHECK ({sqltext})'
+    conn.exec_driver_sql(statement)
+
+
+def _rebuild_sqlite_table(conn, table):
+    bare_name = f'{table.name}__bare'
+    names = ', '.join(f'"{col.name}"' for col in table.columns)
+    conn.exec_driver_sql(
+        f'ALTER TABLE "{table.name}" RENAME TO "{bare_name}"'
+    )
+    conn.execute(CreateTable(table))
+    conn.exec_driver_sql(
+        f'INSERT INTO "{table.name}" ({names}) '
+        f'SELECT {names} FROM "{bare_name}"'
+    )
+    conn.exec_driver_sql(f'DROP TABLE "{bare_name}"')
+
+
+def _restore_autoincrement(conn, table):
+    col = table.autoincrement_column
+    if col is None:
+        return None
+
+    preparer = conn.dialect.identifier_preparer
+    table_name = preparer.format_table(table)
+    col_name = preparer.quote(col.name)
+    if conn.dialect.name == 'mysql':
+        col_type = col.type.compile(dialect=conn.dialect)
+        conn.exec_driver_sql(
+            f'ALTER TABLE {table_name} '
+            f'MODIFY {col_name} {col_type} NOT NULL AUTO_INCREMENT'
+        )
+    elif conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql(
+            f'ALTER TABLE {table_name} ALTER COLUMN {col_name} '
+            f'ADD GENERATED BY DEFAULT AS IDENTITY'
+        )
+        conn.exec_driver_sql(
+            f"SELECT setval(pg_get_serial_sequence('{table_name}', "
+            f"'{col.name}'), coalesce(max({col_name}), 0) + 1, false) "
+            f"FROM {table_name}"
+        )
@@ -0,0 +1,85 @@
+def columns_to_rows(columns):
+    """
+    This function takes a batch of columns and turns it into a list of row
+    dictionaries that can be passed to sqlalchemy as executemany parameters.
+    Numpy arrays are converted with tolist so that the driver only ever sees
+    native python types. Masked entries of a numpy.ma.MaskedArray become None.
+
+    Parameters
+    --------------------------------------------------
+    columns : dict
+        A dictionary of the form {column_name: array_like}. All of the arrays
+        must have the same length.
+
+    Returns
+    --------------------------------------------------
+    rows : list
+        A list of dictionaries of the form {column_name: value}.
+    """
+    names = list(columns.keys())
+    values = [
+        col.tolist() if hasattr(col, 'tolist') else list(col)
+        for col in columns.values()
+    ]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def insert_columns(conn, table, columns, chunk_size=10000):
+    """
+    This function pushes a batch of columns into a table with a core
+    sqlalchemy insert. The rows are sent chunk_size at a time as a single
+    executemany, which sqlalchemy turns into multi-row VALUES statements for
+    the dialects that support it. No ORM objects are created and the session
+    unit-of-work is bypassed entirely.
+
+    Parameters
+    --------------------------------------------------
+    conn : sqlalchemy connection
+        An open connection. The caller is responsible for committing.
+
+    table : sqlalchemy.Table
+        The table to insert into, ie _Mailing.__table__.
+
+    columns : dict
+        A dictionary of the form {column_name: array_like}. All of the arrays
+        must have the same length.
+
+    chunk_size : int, Default 10000
+        The number of rows sent to the database per executemany.
+
+    Returns
+    --------------------------------------------------
+    no_rows : int
+        The number of inserted rows.
+
+    Example Usage
+    --------------------------------------------------
+    import numpy as np
+    import sqlalchemy as db
+
+    engine = db.create_engine("sqlite://")
+    ...
+    with engine.begin() as conn:
+        insert_columns(
+            conn,
+            _Children.__table__,
+            {
+                'child_id': np.arange(1, 4),
+                'first_name': np.array(['Ann', 'Bob', 'Cal'])
+            }
+        )
+    """
+    if len(columns) == 0:
+        return 0
+
+    no_rows = len(next(iter(columns.values())))
+    for start in range(0, no_rows, chunk_size):
+        rows = columns_to_rows(
+            {
+                name: col[start: start + chunk_size]
+                for name, col in columns.items()
+            }
+        )
+        conn.execute(table.insert(), rows)
+
+    return no_rows
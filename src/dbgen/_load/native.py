@@ -0,0 +1,146 @@
+import io
+import os
+import tempfile
+import numpy as np
+from .insert import insert_columns
+
+
+LOAD_METHODS = ['insert', 'native']
+
+
+def load_columns(conn, table, columns, chunk_size=10000, method='insert'):
+    """
+    This function loads a batch of columns into a table.
+
+    With method='native' the dialect's bulk load path is used when there is
+    one:
+        * mysql+pymysql : the batch is written to a temporary tab separated
+            file which is loaded with LOAD DATA LOCAL INFILE. The engine must
+            be created with connect_args={'local_infile': True} and the
+            server must have local_infile enabled.
+        * postgresql+psycopg / postgresql+psycopg2 : the batch is written to
+            an in-memory buffer which is streamed with COPY ... FROM STDIN.
+    Every other dialect, and method='insert', falls back to insert_columns.
+
+    Parameters
+    --------------------------------------------------
+    conn : sqlalchemy connection
+        An open connection. The caller is responsible for committing.
+
+    table : sqlalchemy.Table
+
+    columns : dict
+        A dictionary of the form {column_name: np.array}.
+
+    chunk_size : int, Default 10000
+        The number of rows per executemany of the insert fallback.
+
+    method : str, Default 'insert'
+        Either 'insert' or 'native'.
+
+    Returns
+    --------------------------------------------------
+    no_rows : int
+        The number of loaded rows.
+    """
+    if method not in LOAD_METHODS:
+        raise Exception(f"method must be one of {LOAD_METHODS}, not {method}.")
+
+    loader = native_loader(conn.dialect) if method == 'native' else None
+    if loader is None or len(columns) == 0:
+        return insert_columns(conn, table, columns, chunk_size)
+    return loader(conn, table, columns)
+
+
+def native_loader(dialect):
+    """
+    Returns the native load function of a sqlalchemy dialect, or None if
+    there is none.
+    """
+    if dialect.name == 'mysql' and dialect.driver == 'pymysql':
+        return _mysql_load_data
+    if dialect.name == 'postgresql' and dialect.driver in ['psycopg', 'psycopg2']:
+        return _postgresql_copy
+    return None
+
+
+def columns_to_text(columns):
+    """
+    Serializes a column batch to the tab separated text format that both
+    LOAD DATA INFILE and COPY understand. NULLs, ie masked entries and NaNs,
+    are written as \\N, booleans as 1 and 0, datetimes as
+    'YYYY-MM-DD HH:MM:SS' and backslashes, tabs and newlines in strings are
+    escaped.
+    """
+    text_cols = [_column_to_text(col) for col in columns.values()]
+    lines = ['\t'.join(row) for row in zip(*text_cols)]
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+def _column_to_text(col):
+    mask = np.ma.getmaskarray(col)
+    data = np.ma.getdata(col)
+    if data.dtype.kind == 'b':
+        text = np.where(data, '1', '0')
+    elif data.dtype.kind == 'M':
+        text = np.char.replace(
+            np.datetime_as_string(data, unit='s'), 'T', ' '
+        )
+        mask = mask | np.isnat(data)
+    elif data.dtype.kind in 'iuf':
+        text = data.astype(str)
+        if data.dtype.kind == 'f':
+            mask = mask | np.isnan(data)
+    else:
+        text = np.array(
+            [
+                str(x).replace('\\', '\\\\')
+                .replace('\t', '\\t')
+                .replace('\n', '\\n')
+                if x is not None else None
+                for x in data.tolist()
+            ],
+            dtype=object,
+        )
+        mask = mask | (text == None)
+    return np.where(mask, '\\N', text).tolist()
+
+
+def _quoted_names(conn, table, columns):
+    preparer = conn.dialect.identifier_preparer
+    return (
+        preparer.format_table(table),
+        ', '.join(preparer.quote(name) for name in columns),
+    )
+
+
+def _mysql_load_data(conn, table, columns):
+    table_name, names = _quoted_names(conn, table, columns)
+    with tempfile.NamedTemporaryFile(
+        'w', suffix='.tsv', delete=False, encoding='utf-8'
+    ) as f:
+        f.write(columns_to_text(columns))
+        path = f.name
+    try:
+        statement = f"LOAD DATA LOCAL INFILE '{path.replace(os.sep, '/')}' "
+        statement += f"INTO TABLE {table_name} CHARACTER SET utf8mb4 "
+        statement += "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+        statement += f"LINES TERMINATED BY '\\n' ({names})"
+        conn.exec_driver_sql(statement)
+    finally:
+        os.remove(path)
+    return len(next(iter(columns.values())))
+
+
+def _postgresql_copy(conn, table, columns):
+    table_name, names = _quoted_names(conn, table, columns)
+    statement = f"COPY {table_name} ({names}) FROM STDIN"
+    text = columns_to_text(columns)
+    dbapi_conn = conn.connection.dbapi_connection
+    with dbapi_conn.cursor() as cursor:
+        if conn.dialect.driver == 'psycopg':
+            with cursor.copy(statement) as copy:
+                copy.write(text)
+        else:
+            cursor.copy_expert(statement, io.StringIO(text))
+    return len(next(iter(columns.values())))
@@ -0,0 +1,410 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+import sqlalchemy as db
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+from .native import load_columns
+from .deferred import (
+    create_bare_table, build_constraints, begin_bulk_load, end_bulk_load
+)
+from .convert import to_arrow_table
+from .._stats import batch_size
+
+
+class Sink:
+    """
+    A sink receives the generated tables as column batches, ie dictionaries
+    of the form {column_name: np.array}, and writes them somewhere. The
+    writes run in a thread pool of max_workers threads so that writing,
+    compressing or sending the data overlaps with generating the next
+    batches. At most 2 * max_workers batches are waiting to be written at
+    once, so memory stays bounded when the sink is slower than the
+    generator.
+
+    A subclass implements _write and may override _open, _flush and _close.
+    _open, _flush and _close run in the calling thread, _write runs in the
+    pool. Sinks are
+    used as context managers, or by calling open and close.
+
+    If the sink is opened with a Stats, the writes of every table are
+    recorded as the stage "load.{table}" and close as "load.close".
+
+    Example Usage
+    --------------------------------------------------
+    with ParquetSink('./out') as sink:
+        sink.open([_Children.__table__])
+        sink.write('children', {'child_id': np.arange(1, 4), ...})
+    """
+
+    def __init__(self, max_workers=1):
+        self.max_workers = max_workers
+        self.tables = {}
+        self._executor = None
+        self._futures = deque()
+        self._part_no = {}
+        self._stats = None
+
+    def open(self, tables, stats=None):
+        """
+        tables : list
+            The sqlalchemy Table objects of the tables that will be written.
+
+        stats : dbgen.stats.Stats, Default None
+            Records the time spent writing every table.
+        """
+        self.tables = {table.name: table for table in tables}
+        self._stats = stats
+        self._part_no = {name: 0 for name in self.tables}
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            self._open()
+        except Exception:
+            self._executor.shutdown()
+            self._executor = None
+            raise
+        return self
+
+    def write(self, table, columns):
+        """
+        Queues a column batch of the table named table for writing.
+        """
+        part_no = self._part_no[table]
+        self._part_no[table] += 1
+        write = self._write if self._stats is None else self._timed_write
+        self._futures.append(
+            self._executor.submit(write, table, columns, part_no)
+        )
+        while len(self._futures) > 2 * self.max_workers:
+            self._futures.popleft().result()
+
+    def flush(self):
+        """
+        Waits for all of the queued batches to be written and makes them
+        durable, ie DatabaseSink commits them, without closing the sink.
+        """
+        while self._futures:
+            self._futures.popleft().result()
+        self._flush()
+
+    def close(self):
+        """
+        Waits for all of the queued batches to be written.
+        """
+        if self._executor is None:
+            return None
+        try:
+            while self._futures:
+                self._futures.popleft().result()
+            if self._stats is None:
+                self._close()
+            else:
+                with self._stats.stage('load.close'):
+                    self._close()
+        finally:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        return False
+
+    def _open(self):
+        pass
+
+    def _write(self, table, columns, part_no):
+        raise NotImplementedError
+
+    def _timed_write(self, table, columns, part_no):
+        rows, nbytes = batch_size(columns)
+        with self._stats.stage(f'load.{table}', rows=rows, nbytes=nbytes):
+            self._write(table, columns, part_no)
+
+    def _flush(self):
+        pass
+
+    def _close(self):
+        pass
+
+
+class DatabaseSink(Sink):
+    """
+    Loads the batches into the tables of engine with load_columns. By
+    default the rows are inserted chunk_size rows per executemany. With
+    method='native' MySQL (pymysql) uses LOAD DATA LOCAL INFILE and
+    PostgreSQL (psycopg) uses COPY, see load_columns. All batches are
+    written by one thread over one connection in one transaction, which is
+    committed by close.
+
+    With defer_constraints=True the sink creates the tables itself when it
+    is opened, without primary keys, constraints and indexes, and builds
+    them when it is closed, after all of the rows are loaded. The session is
+    also relaxed for the load, see begin_bulk_load. The tables must not
+    exist yet.
+
+    Parameters
+    --------------------------------------------------
+    engine : sqlalchemy engine
+
+    chunk_size : int, Default 10000
+        The number of rows per executemany.
+
+    method : str, Default 'insert'
+        Either 'insert' or 'native'.
+
+    defer_constraints : boolean, Default False
+        Create the tables bare and build their keys, constraints and indexes
+        after the load.
+    """
+
+    def __init__(
+        self, engine, chunk_size=10000, method='insert', defer_constraints=False
+    ):
+        super().__init__(max_workers=1)
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.method = method
+        self.defer_constraints = defer_constraints
+        self._conn = None
+        self._saved_settings = None
+
+    def _open(self):
+        if self.defer_constraints:
+            self._executor.submit(self._create_bare_tables).result()
+
+    def _create_bare_tables(self):
+        self._connect()
+        inspector = db.inspect(self._conn)
+        for name, table in self.tables.items():
+            if inspector.has_table(name, schema=table.schema):
+                self._conn.close()
+                self._conn = None
+                raise Exception(
+                    f"defer_constraints requires that the table {name} does "
+                    "not exist yet."
+                )
+        self._saved_settings = begin_bulk_load(self._conn)
+        for table in self.tables.values():
+            create_bare_table(self._conn, table)
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = self.engine.connect()
+
+    def _write(self, table, columns, part_no):
+        self._connect()
+        load_columns(
+            self._conn,
+            self.tables[table],
+            columns,
+            self.chunk_size,
+            self.method,
+        )
+
+    def _flush(self):
+        self._executor.submit(self._commit_batches).result()
+
+    def _commit_batches(self):
+        if self._conn is not None:
+            self._conn.commit()
+
+    def _close(self):
+        self._executor.submit(self._commit).result()
+
+    def _commit(self):
+        if self._conn is None:
+            return None
+        if self.defer_constraints:
+            for table in self.tables.values():
+                build_constraints(self._conn, table)
+        self._conn.commit()
+        if self._saved_settings is not None:
+            end_bulk_load(self._conn, self._saved_settings)
+            self._saved_settings = None
+        self._conn.close()
+        self._conn = None
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self._conn is not None:
+            self._executor.submit(self._conn.close).result()
+            self._conn = None
+        return super().__exit__(exc_type, exc, tb)
+
+
+class ParquetSink(Sink):
+    """
+    Writes every batch of a table to its own parquet file,
+    {directory}/{table}/part-{part_no:05d}.parquet. If a table is listed in
+    partition_by, the files are instead written to hive style partitions,
+    ie {directory}/ohlcv/ticker=SPY/part-00000.parquet. The resulting
+    directories can be read directly by pyarrow, DuckDB or Spark. Requires
+    pyarrow.
+
+    Parameters
+    --------------------------------------------------
+    directory : str
+        The output directory. It is created if it does not exist.
+
+    partition_by : dict, Default None
+        A dictionary of the form {table: [column, ...]}.
+
+    compression : str, Default 'snappy'
+        Any compression that pyarrow.parquet.write_table supports.
+
+    max_workers : int, Default 4
+        The number of writer threads.
+    """
+
+    def __init__(
+        self, directory, partition_by=None, compression='snappy', max_workers=4
+    ):
+        super().__init__(max_workers=max_workers)
+        self.directory = directory
+        self.partition_by = {} if partition_by is None else partition_by
+        self.compression = compression
+
+    def _open(self):
+        for name in self.tables:
+            os.makedirs(os.path.join(self.directory, name), exist_ok=True)
+
+    def _write(self, table, columns, part_no):
+        import pyarrow.parquet as pq
+
+        arrow_table = to_arrow_table(columns)
+        path = os.path.join(self.directory, table)
+        if table in self.partition_by:
+            pq.write_to_dataset(
+                arrow_table,
+                path,
+                partition_cols=self.partition_by[table],
+                basename_template=f'part-{part_no:05d}-{{i}}.parquet',
+                compression=self.compression,
+            )
+        else:
+            pq.write_table(
+                arrow_table,
+                os.path.join(path, f'part-{part_no:05d}.parquet'),
+                compression=self.compression,
+            )
+
+
+class CSVSink(Sink):
+    """
+    Writes every batch of a table to its own csv file with a header,
+    {directory}/{table}/part-{part_no:05d}.csv. NULLs are written as empty
+    fields.
+
+    Parameters
+    --------------------------------------------------
+    directory : str
+        The output directory. It is created if it does not exist.
+
+    compression : str, Default None
+        ie 'gzip'. The file extension is extended accordingly.
+
+    max_workers : int, Default 4
+        The number of writer threads.
+    """
+
+    _EXTENSIONS = {'gzip': '.gz', 'bz2': '.bz2', 'zstd': '.zst', 'xz': '.xz'}
+
+    def __init__(self, directory, compression=None, max_workers=4):
+        super().__init__(max_workers=max_workers)
+        self.directory = directory
+        self.compression = compression
+
+    def _open(self):
+        for name in self.tables:
+            os.makedirs(os.path.join(self.directory, name), exist_ok=True)
+
+    def _write(self, table, columns, part_no):
+        name = f'part-{part_no:05d}.csv'
+        name += self._EXTENSIONS.get(self.compression, '')
+        columns_to_frame(columns).to_csv(
+            os.path.join(self.directory, table, name),
+            index=False,
+            compression=self.compression,
+        )
+
+
+class SQLiteSink(Sink):
+    """
+    Writes the tables to a sqlite file with the sqlite3 module directly. The
+    tables are created from their sqlalchemy definitions and the rows are
+    inserted with executemany. Journaling and syncing are turned off while
+    loading, which is fast but means that the file is corrupt if the process
+    dies mid-way. A single writer thread overlaps the inserts with the
+    generation of the next batches.
+
+    Parameters
+    --------------------------------------------------
+    path : str
+        The path of the sqlite file. Existing tables are dropped.
+    """
+
+    def __init__(self, path):
+        super().__init__(max_workers=1)
+        self.path = path
+        self._conn = None
+
+    def _open(self):
+        self._executor.submit(self._connect).result()
+
+    def _connect(self):
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute('PRAGMA journal_mode = OFF')
+        self._conn.execute('PRAGMA synchronous = OFF')
+        dialect = sqlite_dialect.dialect()
+        for name, table in self.tables.items():
+            self._conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+            self._conn.execute(
+                str(db.schema.CreateTable(table).compile(dialect=dialect))
+            )
+
+    def _write(self, table, columns, part_no):
+        names = list(columns.keys())
+        statement = f'INSERT INTO "{table}" ({", ".join(names)}) '
+        statement += f'VALUES ({", ".join("?" * len(names))})'
+        values = [
+            col.tolist() if hasattr(col, 'tolist') else list(col)
+            for col in columns.values()
+        ]
+        self._conn.executemany(statement, zip(*values))
+
+    def _flush(self):
+        self._executor.submit(self._conn.commit).result()
+
+    def _close(self):
+        self._executor.submit(self._commit).result()
+
+    def _commit(self):
+        self._conn.commit()
+        self._conn.close()
+        self._conn = None
+
+
+def columns_to_frame(columns):
+    """
+    Turns a column batch into a pandas DataFrame. Masked integer columns
+    become nullable Int64 columns.
+    """
+    frame = {}
+    for name, col in columns.items():
+        if isinstance(col, np.ma.MaskedArray):
+            data = np.ma.getdata(col)
+            mask = np.ma.getmaskarray(col)
+            if np.issubdtype(data.dtype, np.integer):
+                col = pd.arrays.IntegerArray(data.astype(np.int64), mask)
+            else:
+                col = np.where(mask, None, data.astype(object))
+        frame[name] = col
+    return pd.DataFrame(frame)
@@ -0,0 +1,212 @@
+import cProfile
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+import numpy as np
+
+
+class Stats:
+    """
+    Records where the time of a run goes. Every stage, ie "schema",
+    "generate.children" or "load.ohlcv", accumulates its wall time, rows,
+    bytes and number of calls. The stages are recorded by the Create classes
+    and by the sinks, whose loads run in their own threads, so the times of
+    the generate and load stages overlap and add up to more than the total.
+
+    Parameters
+    --------------------------------------------------
+    profile : boolean, Default False
+        Profiles the calling thread of the run with cProfile. The top
+        functions are added to the summary and print_profile prints them.
+
+    trace_memory : boolean, Default False
+        Traces the allocations with tracemalloc and records the peak of the
+        traced memory of the process during every stage. Slows the run down
+        considerably.
+
+    callback : callable, Default None
+        Called as callback(stage, record) whenever a stage is recorded,
+        where record is a dictionary with the seconds, rows and bytes of
+        the call.
+
+    Example Usage
+    --------------------------------------------------
+    from dbgen.stats import Stats
+
+    stats = Stats(profile=True)
+    summary = database.initialize(..., stats=stats)
+    summary['stages']['load.children']['seconds']
+    stats.print_profile(20)
+    """
+
+    def __init__(self, profile=False, trace_memory=False, callback=None):
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.callback = callback
+        self.stages = {}
+        self.total_seconds = 0.0
+        self.peak_bytes = None
+        self._profiler = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def run(self):
+        """
+        Wraps a whole run, ie an initialize call.
+        """
+        started_tracing = False
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.total_seconds += time.perf_counter() - start
+            if self._profiler is not None:
+                self._profiler.disable()
+            if tracemalloc.is_tracing() and self.trace_memory:
+                self.peak_bytes = max(
+                    self.peak_bytes or 0, tracemalloc.get_traced_memory()[1]
+                )
+            if started_tracing:
+                tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name, rows=0, nbytes=0):
+        """
+        Records the wall time of the with block as the stage name. The
+        yielded dictionary may be updated with the rows and bytes of the
+        stage.
+        """
+        record = {'rows': rows, 'bytes': nbytes}
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            if self.trace_memory and tracemalloc.is_tracing():
+                record['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            self.add(
+                name,
+                seconds=record['seconds'],
+                rows=record['rows'],
+                bytes=record['bytes'],
+                peak_bytes=record.get('peak_bytes'),
+            )
+
+    def add(self, name, seconds=0.0, rows=0, bytes=0, peak_bytes=None):
+        """
+        Adds a call to the stage name.
+        """
+        with self._lock:
+            stage = self.stages.setdefault(
+                name, {'seconds': 0.0, 'rows': 0, 'bytes': 0, 'calls': 0}
+            )
+            stage['seconds'] += seconds
+            stage['rows'] += int(rows)
+            stage['bytes'] += int(bytes)
+            stage['calls'] += 1
+            if peak_bytes is not None:
+                stage['peak_bytes'] = max(
+                    stage.get('peak_bytes', 0), peak_bytes
+                )
+        if self.callback is not None:
+            self.callback(
+                name, {'seconds': seconds, 'rows': rows, 'bytes': bytes}
+            )
+
+    def iterate(self, batches, name):
+        """
+        Yields the column batches of batches and records the time spent
+        producing every batch as a call of the stage name(batch), or of the
+        stage name if it is a str.
+        """
+        batches = iter(batches)
+        while True:
+            if self.trace_memory and tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            start = time.perf_counter()
+            try:
+                batch = next(batches)
+            except StopIteration:
+                return None
+            seconds = time.perf_counter() - start
+            peak_bytes = None
+            if self.trace_memory and tracemalloc.is_tracing():
+                peak_bytes = tracemalloc.get_traced_memory()[1]
+            rows, nbytes = _size(batch)
+            self.add(
+                name(batch) if callable(name) else name,
+                seconds=seconds,
+                rows=rows,
+                bytes=nbytes,
+                peak_bytes=peak_bytes,
+            )
+            yield batch
+
+    def summary(self):
+        """
+        Returns the recorded stages as a dictionary of the form
+        {'total_seconds': float, 'stages': {stage: {'seconds', 'rows',
+        'bytes', 'calls'}}}, with the peak bytes and the top functions of
+        the profile when they are traced.
+        """
+        summary = {
+            'total_seconds': self.total_seconds,
+            'stages': {
+                name: dict(stage) for name, stage in self.stages.items()
+            },
+        }
+        if self.peak_bytes is not None:
+            summary['peak_bytes'] = self.peak_bytes
+        if self._profiler is not None:
+            summary['profile'] = self._top_functions(20)
+        return summary
+
+    def print_profile(self, n=20, sort='cumulative'):
+        if self._profiler is None:
+            raise Exception("The run was not profiled, see profile.")
+        pstats.Stats(self._profiler).sort_stats(sort).print_stats(n)
+
+    def _top_functions(self, n):
+        stats = pstats.Stats(self._profiler).sort_stats('cumulative')
+        top = []
+        for func in stats.fcn_list[:n]:
+            calls, _, tottime, cumtime, _ = stats.stats[func]
+            filename, line, function = func
+            top.append(
+                {
+                    'function': f'{filename}:{line}({function})',
+                    'calls': calls,
+                    'tottime': tottime,
+                    'cumtime': cumtime,
+                }
+            )
+        return top
+
+
+def batch_size(columns):
+    """
+    The number of rows and bytes of a column batch, ie a dictionary of the
+    form {column_name: np.array}.
+    """
+    arrays = [np.asarray(col) for col in columns.values()]
+    if not arrays:
+        return 0, 0
+    return len(arrays[0]), sum(array.nbytes for array in arrays)
+
+
+def _size(batch):
+    # a batch of one table or a dictionary of batches of several tables
+    if batch and all(isinstance(v, dict) for v in batch.values()):
+        sizes = [batch_size(columns) for columns in batch.values()]
+        return sum(s[0] for s in sizes), sum(s[1] for s in sizes)
+    return batch_size(batch)
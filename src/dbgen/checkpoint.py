@@ -0,0 +1 @@
+from ._checkpoint import Checkpoint
@@ -17,3 +17,12 @@ SALARY_AVG = {
 }
 
 JOBS = list(SALARY_AVG.keys())
+
+# the secondary indexes of the tables for each index profile, see the indexes
+# argument of the table factories in _tables.py
+INDEX_PROFILES = {
+    'analytics': {
+        'children': ['parent1_id', 'parent2_id'],
+        'employment': ['job'],
+    },
+}
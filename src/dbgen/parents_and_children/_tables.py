@@ -1,8 +1,10 @@
 import sqlalchemy as db
 from sqlalchemy.orm.decl_api import DeclarativeMeta
+from .._indexes import index_args
+from ._constants import INDEX_PROFILES
 
 
-def Mailing(base) -> DeclarativeMeta:
+def Mailing(base, indexes=None) -> DeclarativeMeta:
     """
     This function takes a SQLAlchemy declarative_base and returns a SQLAlchemy 
     table/mapper. The mapper will take a persons name and address and map it 
@@ -15,6 +17,12 @@ def Mailing(base) -> DeclarativeMeta:
     --------------------------------------------------
     base : sqlalchemy.orm.declarative_base
         A declarative_base that will be inheirited by the underlying class
+
+    indexes : str, dict or list, Default None
+        The secondary indexes of the table. Either the name of a profile in 
+        INDEX_PROFILES, ie 'analytics', a profile of the form 
+        {table_name: [columns, ...]} or a list of columns and tuples of 
+        columns, one per index. By default only the primary key is indexed.
        
 
     Returns
@@ -52,6 +60,7 @@ def Mailing(base) -> DeclarativeMeta:
     class _Mailing(base):
         # table name for User model
         __tablename__ = "mailing"
+        __table_args__ = index_args("mailing", indexes, INDEX_PROFILES)
     
         # user columns
         parent_id = db.Column(db.Integer(), primary_key=True, autoincrement=True)
@@ -108,7 +117,7 @@ def Mailing(base) -> DeclarativeMeta:
     return _Mailing
 
 
-def Employment(base) -> DeclarativeMeta:
+def Employment(base, indexes=None) -> DeclarativeMeta:
     """
     This function takes a SQLAlchemy declarative_base and returns a SQLAlchemy 
     table/mapper. The mapper will take a persons employment info and map it 
@@ -121,6 +130,12 @@ def Employment(base) -> DeclarativeMeta:
     --------------------------------------------------
     base : sqlalchemy.orm.declarative_base
         A declarative_base that will be inheirited by the underlying class
+
+    indexes : str, dict or list, Default None
+        The secondary indexes of the table. Either the name of a profile in 
+        INDEX_PROFILES, ie 'analytics', a profile of the form 
+        {table_name: [columns, ...]} or a list of columns and tuples of 
+        columns, one per index. By default only the primary key is indexed.
        
 
     Returns
@@ -158,6 +173,7 @@ def Employment(base) -> DeclarativeMeta:
     class _Employment(base):
         # table name for User model
         __tablename__ = "employment"
+        __table_args__ = index_args("employment", indexes, INDEX_PROFILES)
     
         # user columns
         parent_id = db.Column(
@@ -190,7 +206,7 @@ def Employment(base) -> DeclarativeMeta:
     return _Employment
 
 
-def Finances(base) -> DeclarativeMeta:
+def Finances(base, indexes=None) -> DeclarativeMeta:
     """
     This function takes a SQLAlchemy declarative_base and returns a SQLAlchemy 
     table/mapper. The mapper will take a persons financial info and map it 
@@ -203,6 +219,12 @@ def Finances(base) -> DeclarativeMeta:
     --------------------------------------------------
     base : sqlalchemy.orm.declarative_base
         A declarative_base that will be inheirited by the underlying class
+
+    indexes : str, dict or list, Default None
+        The secondary indexes of the table. Either the name of a profile in 
+        INDEX_PROFILES, ie 'analytics', a profile of the form 
+        {table_name: [columns, ...]} or a list of columns and tuples of 
+        columns, one per index. By default only the primary key is indexed.
        
 
     Returns
@@ -241,6 +263,7 @@ def Finances(base) -> DeclarativeMeta:
     class _Finances(base):
         # table name for User model
         __tablename__ = "finances"
+        __table_args__ = index_args("finances", indexes, INDEX_PROFILES)
     
         # user columns
         parent_id = db.Column(
@@ -269,7 +292,7 @@ def Finances(base) -> DeclarativeMeta:
     return _Finances
 
 
-def Children(base) -> DeclarativeMeta:
+def Children(base, indexes=None) -> DeclarativeMeta:
     """
     This function takes a SQLAlchemy declarative_base and returns a SQLAlchemy 
     table/mapper. The mapper will map info about a child 
@@ -282,6 +305,12 @@ def Children(base) -> DeclarativeMeta:
     --------------------------------------------------
     base : sqlalchemy.orm.declarative_base
         A declarative_base that will be inheirited by the underlying class
+
+    indexes : str, dict or list, Default None
+        The secondary indexes of the table. Either the name of a profile in 
+        INDEX_PROFILES, ie 'analytics', a profile of the form 
+        {table_name: [columns, ...]} or a list of columns and tuples of 
+        columns, one per index. By default only the primary key is indexed.
        
 
     Returns
@@ -325,6 +354,7 @@ def Children(base) -> DeclarativeMeta:
     class _Children(base):
     
         __tablename__ = "children"
+        __table_args__ = index_args("children", indexes, INDEX_PROFILES)
 
         child_id = db.Column(db.Integer(), primary_key=True, autoincrement=True)
         parent1_id = db.Column(db.Integer())
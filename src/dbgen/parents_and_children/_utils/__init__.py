@@ -1 +1,4 @@
 from .sal_sav_start_generator import SalSavStartGen
+from .families import assign_children, ChildAssigner
+from .fake_pool import FakePool, default_pool_size
+from .batches import generate_batches
@@ -0,0 +1,210 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .sal_sav_start_generator import SalSavStartGen
+from .families import ChildAssigner
+
+
+# set in every worker process by _init_worker
+_worker_state = {}
+
+
+def parent_batch(start, stop, seed, jobs, job_avgs, fake_pool):
+    """
+    Generates the "mailing", "employment" and "finances" columns of the
+    parents with ids start, ..., stop - 1. All of the draws come from
+    np.random.default_rng(seed), so a batch only depends on its arguments.
+
+    Returns
+    --------------------------------------------------
+    batch : dict
+        A dictionary of the form {table_name: {column_name: np.array}}.
+    """
+    rng = np.random.default_rng(seed)
+    n = stop - start
+    parent_id = np.arange(start, stop)
+    job_inds = rng.integers(0, len(jobs), size=n)
+    sal_sav = SalSavStartGen.batch(np.asarray(job_avgs)[job_inds], rng=rng)
+    return {
+        'mailing': {
+            'parent_id': parent_id,
+            'first_name': fake_pool.sample('first_name', n, rng),
+            'last_name': fake_pool.sample('last_name', n, rng),
+            'address': fake_pool.sample('street_address', n, rng),
+            'city': fake_pool.sample('city', n, rng),
+            'state': fake_pool.sample('state', n, rng),
+            'zip': fake_pool.sample('zipcode', n, rng),
+        },
+        'employment': {
+            'parent_id': parent_id,
+            'salary': sal_sav.salary,
+            'job': np.asarray(jobs)[job_inds],
+            'start_date': sal_sav.startdate,
+        },
+        'finances': {
+            'parent_id': parent_id,
+            'bank_act': fake_pool.sample('bban', n, rng),
+            'savings': sal_sav.savings,
+        },
+    }
+
+
+def child_batch(start, families, seed, fake_pool):
+    """
+    Adds the child_id and the names to a shard of families, the output of
+    ChildAssigner.assign. The first child of the shard gets the id start and
+    the names are drawn from np.random.default_rng(seed).
+
+    Returns
+    --------------------------------------------------
+    batch : dict
+        A dictionary of the form {'children': {column_name: np.array}}.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(families['parent1_id'])
+    return {
+        'children': {
+            'child_id': np.arange(start, start + n),
+            'parent1_id': families['parent1_id'],
+            'parent2_id': families['parent2_id'],
+            'first_name': fake_pool.sample('first_name', n, rng),
+            'last_name': fake_pool.sample('last_name', n, rng),
+            'same_residence': families['same_residence'],
+            'is_student': families['is_student'],
+            'is_employed': families['is_employed'],
+        }
+    }
+
+
+def generate_batches(
+    no_parents,
+    no_children,
+    jobs,
+    job_avgs,
+    fake_pool,
+    numpy_seed=0,
+    chunk_size=10000,
+    workers=1,
+    tables=None,
+    skip=None,
+):
+    """
+    Yields the batches of all four tables, or only of the tables listed in
+    tables. The parents are split into shards
+    of chunk_size ids and so are the children. Every shard draws from its own
+    generator whose seed is spawned from np.random.SeedSequence(numpy_seed),
+    so the shards can be generated in any process and in any order. With
+    workers > 1 the shards are generated in a process pool, but they are
+    always yielded in id order, so the output for a given seed and
+    chunk_size does not depend on the number of workers. At most 2 * workers
+    shards are held in memory at once. Skipping tables does not change the 
+    data of the remaining tables, and neither does skipping shards with 
+    skip, a dictionary of the form {'parents': [shard_no, ...], 
+    'children': [shard_no, ...]}, ie the shards of a run that are already
+    loaded.
+
+    The children are paired with their parents one shard at a time, so the
+    memory only grows with chunk_size and the keys of the parent pairs that
+    are used, not with no_children.
+
+    Yields
+    --------------------------------------------------
+    batch : dict
+        A dictionary of the form {table_name: {column_name: np.array}}.
+    """
+    if tables is None:
+        tables = ['mailing', 'employment', 'finances', 'children']
+    with_parents = any(
+        t in tables for t in ['mailing', 'employment', 'finances']
+    )
+    with_children = 'children' in tables
+
+    skip = {} if skip is None else skip
+    skip_parents = set(skip.get('parents', []))
+    skip_children = set(skip.get('children', []))
+
+    root_ss = np.random.SeedSequence(numpy_seed)
+    parent_ss, family_ss, child_ss = root_ss.spawn(3)
+
+    parent_starts = range(1, no_parents + 1, chunk_size)
+    parent_args = [
+        (start, min(start + chunk_size, no_parents + 1), seed, jobs, job_avgs)
+        for shard_no, (start, seed) in enumerate(
+            zip(parent_starts, parent_ss.spawn(len(parent_starts)))
+        )
+        if shard_no not in skip_parents
+    ]
+    if not with_parents:
+        parent_args = []
+
+    def child_args():
+        # the shards are paired in order since every pair of parents is 
+        # only used once, skipped shards included
+        assigner = ChildAssigner(no_parents, no_children)
+        child_starts = range(0, no_children, chunk_size)
+        family_seeds = family_ss.spawn(len(child_starts))
+        child_seeds = child_ss.spawn(len(child_starts))
+        for shard_no, (start, family_seed, seed) in enumerate(
+            zip(child_starts, family_seeds, child_seeds)
+        ):
+            families = assigner.assign(
+                min(chunk_size, no_children - start),
+                np.random.default_rng(family_seed),
+            )
+            if shard_no in skip_children:
+                continue
+            yield (start + 1, families, seed)
+
+    def keep(batches):
+        for batch in batches:
+            yield {t: cols for t, cols in batch.items() if t in tables}
+
+    if workers <= 1:
+        yield from keep(
+            parent_batch(*args, fake_pool) for args in parent_args
+        )
+        if with_children:
+            for args in child_args():
+                yield child_batch(*args, fake_pool)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(fake_pool,)
+    ) as executor:
+        yield from keep(
+            _ordered_map(
+                executor, _worker_parent_batch, parent_args, 2 * workers
+            )
+        )
+        if with_children:
+            yield from _ordered_map(
+                executor, _worker_child_batch, child_args(), 2 * workers
+            )
+
+
+def _init_worker(fake_pool):
+    _worker_state['fake_pool'] = fake_pool
+
+
+def _worker_parent_batch(args):
+    return parent_batch(*args, _worker_state['fake_pool'])
+
+
+def _worker_child_batch(args):
+    return child_batch(*args, _worker_state['fake_pool'])
+
+
+def _ordered_map(executor, fn, iterable, max_in_flight):
+    """
+    Like executor.map, but only submits max_in_flight tasks ahead of the
+    result that is being waited on.
+    """
+    futures = deque()
+    for args in iterable:
+        futures.append(executor.submit(fn, args))
+        if len(futures) >= max_in_flight:
+            yield futures.popleft().result()
+    while futures:
+        yield futures.popleft().result()
@@ -0,0 +1,170 @@
+import os
+import string
+import faker
+import numpy as np
+
+
+# the pools generated in this process, by (locale, faker_seed, pool_size)
+_pools = {}
+
+
+class FakePool:
+    """
+    Calling faker once per row is by far the most expensive part of
+    generating the data. This class generates a pool of distinct fake values
+    once per seed and then draws rows from the pool with numpy integer
+    indexing.
+
+    The pooled fields are first_name, last_name, street_address, city, state
+    and zipcode. bban is not pooled. It is generated from faker's bban format,
+    ie '????##############', with vectorized numpy draws so that bank account
+    numbers stay (almost surely) distinct.
+
+    Parameters
+    --------------------------------------------------
+    faker_seed : int, Default 0
+        The seed of the faker.Faker instance that generates the pool.
+
+    pool_size : int, Default 10000
+        The maximum number of distinct values of each field. Some fields, ie
+        state, have fewer possible values than this. faker is called in 
+        rounds of ROUND_SIZE values until a round adds less than 1% new 
+        values, and at most MAX_DRAWS times pool_size times per field.
+
+    cardinality : dict, Default None
+        A dictionary of the form {field: no_values} that caps the number of
+        distinct values of a field, ie {'city': 50}. This allows one to tune
+        the selectivity of queries that filter on that field.
+
+    cache_dir : str, Default None
+        If given, the pool is saved to and loaded from a .npz file in this
+        directory so that it is only ever generated once per seed and size.
+        Either way a pool is only generated once per process.
+
+    locale : str, Default 'en_US'
+        The faker locale.
+
+    Example Usage
+    --------------------------------------------------
+    import numpy as np
+
+    pool = FakePool(faker_seed=0, cardinality={'city': 50})
+    rng = np.random.default_rng(0)
+    pool.sample('city', 5, rng)
+    pool.sample('bban', 5, rng)
+    """
+
+    FIELDS = [
+        'first_name', 'last_name', 'street_address', 'city', 'state', 'zipcode'
+    ]
+
+    BBAN_FORMAT = '????##############'
+
+    ROUND_SIZE = 1000
+
+    MAX_DRAWS = 3
+
+    def __init__(
+        self,
+        faker_seed=0,
+        pool_size=10000,
+        cardinality=None,
+        cache_dir=None,
+        locale='en_US',
+    ):
+        self.faker_seed = faker_seed
+        self.pool_size = pool_size
+        self.cardinality = {} if cardinality is None else dict(cardinality)
+        self.locale = locale
+        self.pools = self._load_or_generate(cache_dir)
+
+    def sample(self, field, n, rng):
+        """
+        Draws n values of field uniformly from the pool.
+
+        Parameters
+        --------------------------------------------------
+        field : str
+            One of FakePool.FIELDS or 'bban'.
+
+        n : int
+            The number of values.
+
+        rng : numpy.random.Generator
+            The generator used for the draws.
+
+        Returns
+        --------------------------------------------------
+        values : np.array
+            An array of n strings.
+        """
+        if field == 'bban':
+            return self._bban(n, rng)
+        pool = self.pools[field][: self.cardinality.get(field)]
+        return pool[rng.integers(0, len(pool), size=n)]
+
+    def _bban(self, n, rng):
+        letters = np.frombuffer(string.ascii_uppercase.encode(), dtype='S1')
+        digits = np.frombuffer(string.digits.encode(), dtype='S1')
+        chars = np.empty((n, len(self.BBAN_FORMAT)), dtype='S1')
+        for i, c in enumerate(self.BBAN_FORMAT):
+            choices = letters if c == '?' else digits
+            chars[:, i] = choices[rng.integers(0, len(choices), size=n)]
+        return chars.view(f'S{len(self.BBAN_FORMAT)}').ravel().astype(str)
+
+    def _load_or_generate(self, cache_dir):
+        key = (self.locale, self.faker_seed, self.pool_size)
+        if key not in _pools:
+            _pools[key] = self._load_or_generate_uncached(cache_dir)
+        return _pools[key]
+
+    def _load_or_generate_uncached(self, cache_dir):
+        if cache_dir is None:
+            return self._generate()
+
+        path = os.path.join(
+            cache_dir,
+            f'fake_pool_{self.locale}_{self.faker_seed}_{self.pool_size}.npz'
+        )
+        if os.path.exists(path):
+            with np.load(path) as cached:
+                return {field: cached[field] for field in self.FIELDS}
+
+        pools = self._generate()
+        os.makedirs(cache_dir, exist_ok=True)
+        np.savez_compressed(path, **pools)
+        return pools
+
+    def _generate(self):
+        fk = faker.Faker(self.locale)
+        fk.seed_instance(self.faker_seed)
+        pools = {}
+        for field in self.FIELDS:
+            method = getattr(fk, field)
+            values = {}
+            # stop once less than 1% of a round of draws are new values, 
+            # which ends the fields with few possible values early
+            max_draws = self.MAX_DRAWS * self.pool_size
+            no_draws = 0
+            while len(values) < self.pool_size and no_draws < max_draws:
+                before = len(values)
+                round_size = min(
+                    self.ROUND_SIZE, 
+                    self.pool_size - before, 
+                    max_draws - no_draws,
+                )
+                for _ in range(round_size):
+                    values[method()] = None
+                no_draws += round_size
+                if len(values) - before < max(1, round_size // 100):
+                    break
+            pools[field] = np.array(list(values)[: self.pool_size])
+        return pools
+
+
+def default_pool_size(no_rows):
+    """
+    The pool size of the default pool of a run with no_rows rows, a fifth of
+    the rows but at least 1000 and at most 10000 values per field.
+    """
+    return min(10000, max(1000, no_rows // 5))
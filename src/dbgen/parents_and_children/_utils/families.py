@@ -0,0 +1,227 @@
+import numpy as np
+
+
+# p(k children) is proportional to exp(-k / 1.3) for k = 0, ..., 5
+_FAMILY_SIZES = np.arange(6)
+_FAMILY_P = np.exp(-_FAMILY_SIZES / 1.3) / np.exp(-_FAMILY_SIZES / 1.3).sum()
+
+
+def assign_children(no_parents, no_children, rng=None):
+    """
+    This function randomly pairs up parents, draws the number of children of
+    each pair and the same_residence, is_student and is_employed flags of
+    every child, all in vectorized batches.
+
+    A pair is two distinct draws from None, 1, ..., no_parents - 1. If the
+    first draw is None then the pair is flipped so that only parent2_id can be
+    None. Every unordered pair is used at most once. Pairs are encoded as the
+    int64 key min * no_parents + max and deduplicated against sorted runs
+    of the keys that are used, so the assignment scales as
+    no_children * log(no_children). The number of children
+    of a pair is k = 0, ..., 5 with probability proportional to exp(-k / 1.3)
+    and the size of the last family is cut so that there are exactly
+    no_children children. See ChildAssigner to assign the children in 
+    shards.
+
+    Parameters
+    --------------------------------------------------
+    no_parents : int
+        The number of parents.
+
+    no_children : int
+        The number of children.
+
+    rng : numpy.random.Generator, Default None
+        The generator used for all of the draws. Defaults to
+        np.random.default_rng().
+
+    Returns
+    --------------------------------------------------
+    children : dict
+        A dictionary of numpy arrays of length no_children with the keys
+        'parent1_id', 'parent2_id', 'same_residence', 'is_student' and
+        'is_employed'. 'parent2_id' is a numpy.ma.MaskedArray which is masked
+        where the second parent is None.
+
+    Example Usage
+    --------------------------------------------------
+    import numpy as np
+
+    children = assign_children(500, 600, np.random.default_rng(0))
+    children['parent1_id'][:5], children['parent2_id'][:5]
+    """
+    return ChildAssigner(no_parents, no_children).assign(no_children, rng)
+
+
+class ChildAssigner:
+    """
+    Hands out the children of assign_children in shards, so that only the 
+    keys of the pairs that are already used are held in memory and not the
+    children themselves. Every shard draws from its own generator. A family
+    that is cut at the end of a shard continues at the start of the next 
+    one.
+
+    Parameters
+    --------------------------------------------------
+    no_parents : int
+        The number of parents.
+
+    no_children : int
+        The total number of children of all of the shards.
+
+    Example Usage
+    --------------------------------------------------
+    import numpy as np
+
+    assigner = ChildAssigner(500, 600)
+    for seed in np.random.SeedSequence(0).spawn(3):
+        shard = assigner.assign(200, np.random.default_rng(seed))
+    """
+
+    def __init__(self, no_parents, no_children):
+        no_pairs = no_parents * (no_parents - 1) // 2
+        if no_children > _FAMILY_SIZES[-1] * no_pairs:
+            raise Exception(
+                f"Cannot assign {no_children} children to {no_parents} "
+                "parents."
+            )
+        self.no_parents = no_parents
+        self.no_children = no_children
+        self._no_pairs = no_pairs
+        self._seen = _SortedRuns()
+        # (first, second, no_children) of a family cut by the last shard
+        self._carry = None
+
+    def assign(self, n, rng=None):
+        """
+        Assigns the next n children. Returns a dictionary of the form of 
+        the output of assign_children with arrays of length n.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+
+        empty = np.array([], dtype=np.int64)
+        first, second, sizes = [empty], [empty], [empty]
+        count = 0
+        if self._carry is not None and n > 0:
+            a, b, left = self._carry
+            take = min(left, n)
+            first.append(np.array([a]))
+            second.append(np.array([b]))
+            sizes.append(np.array([take]))
+            count += take
+            self._carry = (a, b, left - take) if left > take else None
+
+        mean_size = (_FAMILY_SIZES * _FAMILY_P).sum()
+        no_parents = self.no_parents
+        while count < n:
+            batch = max(1024, int(1.1 * (n - count) / mean_size))
+
+            # two distinct candidates, 0 stands for None
+            a = rng.integers(0, no_parents, size=batch)
+            b = rng.integers(0, no_parents - 1, size=batch)
+            b += b >= a
+
+            keys = np.minimum(a, b) * np.int64(no_parents) + np.maximum(a, b)
+            new = _first_occurrences(keys)
+            new = new[~self._seen.contains(keys[new])]
+            amt = rng.choice(_FAMILY_SIZES, size=len(new), p=_FAMILY_P)
+
+            # cut the family where n is reached, the rest of it is carried
+            # over to the next shard
+            cum_sizes = count + np.cumsum(amt)
+            if len(new) and cum_sizes[-1] >= n:
+                last = np.searchsorted(cum_sizes, n)
+                new, amt = new[: last + 1], amt[: last + 1]
+                if cum_sizes[last] > n:
+                    self._carry = (
+                        a[new[-1]], b[new[-1]], int(cum_sizes[last] - n)
+                    )
+                    amt[-1] -= cum_sizes[last] - n
+
+            self._seen.add(keys[new])
+            first.append(a[new])
+            second.append(b[new])
+            sizes.append(amt)
+            count += amt.sum()
+
+            if len(self._seen) == self._no_pairs and count < n:
+                raise Exception(
+                    f"Ran out of parent pairs for {self.no_children} "
+                    "children."
+                )
+
+        first = np.concatenate(first).astype(np.int64)
+        second = np.concatenate(second).astype(np.int64)
+        sizes = np.concatenate(sizes).astype(np.int64)
+
+        parent1_id = np.where(first == 0, second, first)
+        parent2_id = np.where(first == 0, 0, second)
+
+        return {
+            'parent1_id': np.repeat(parent1_id, sizes),
+            'parent2_id': np.ma.masked_equal(np.repeat(parent2_id, sizes), 0),
+            'same_residence': rng.random(n) < .8,
+            'is_student': rng.random(n) < .8,
+            'is_employed': rng.random(n) < .6,
+        }
+
+
+class _SortedRuns:
+    """
+    A set of int64 keys held as sorted runs. A new run is merged with the
+    runs before it that are not longer than it, so there are at most 
+    log2(len(self)) runs and every key is merged O(log(len(self))) times, 
+    instead of copying all of the keys every time some are added.
+    """
+
+    def __init__(self):
+        self._runs = []
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def add(self, keys):
+        """
+        Adds keys, which are not in the set yet.
+        """
+        run = np.sort(keys)
+        while self._runs and len(self._runs[-1]) <= len(run):
+            run = np.sort(np.concatenate([self._runs.pop(), run]))
+        self._runs.append(run)
+        self._len += len(keys)
+
+    def contains(self, keys):
+        """
+        Vectorized membership test of keys.
+        """
+        # sorted keys are looked up in a run with far fewer cache misses
+        order = np.argsort(keys)
+        sorted_keys = keys[order]
+        found = np.zeros(len(keys), dtype=bool)
+        for run in self._runs:
+            found[order] |= _in_sorted(sorted_keys, run)
+        return found
+
+
+def _first_occurrences(keys):
+    """
+    Returns the sorted indices of the first occurrence of every distinct key.
+    """
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    is_first = np.ones(len(keys), dtype=bool)
+    is_first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    return np.sort(order[is_first])
+
+
+def _in_sorted(keys, sorted_keys):
+    """
+    Vectorized membership test of keys in the sorted array sorted_keys.
+    """
+    if len(sorted_keys) == 0:
+        return np.zeros(len(keys), dtype=bool)
+    inds = np.searchsorted(sorted_keys, keys)
+    inds[inds == len(sorted_keys)] = 0
+    return sorted_keys[inds] == keys
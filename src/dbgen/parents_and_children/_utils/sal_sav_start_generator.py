@@ -95,6 +95,17 @@ class SalSavStartGen:
     
     plt.hist(sav, bins=100)
     plt.show()
+
+    Batches
+    --------------------------------------------------
+    SalSavStartGen.batch draws the same distributions for a whole population 
+    at once with a numpy.random.Generator. The returned object has the same 
+    attributes as above, except that they are numpy arrays.
+
+    rng = np.random.default_rng(0)
+    avg_sals = np.array([100, 0, 35, 210])
+    salsav = SalSavStartGen.batch(avg_sals, rng=rng)
+    salsav.salary, salsav.savings, salsav.startdate
     """
 
     def __init__(self, avg, fkr):
@@ -140,3 +151,92 @@ class SalSavStartGen:
         work_duration = work_duration.days / 365
 
         return start_date, work_duration
+
+    @classmethod
+    def batch(
+        cls,
+        avg_salaries,
+        n=None,
+        rng=None,
+        start=dt.datetime(2000, 1, 1),
+        end=dt.datetime(2023, 8, 15),
+    ):
+        """
+        Generates the salaries, savings and startdates of an entire 
+        population with a handful of vectorized numpy calls.
+
+        Parameters
+        --------------------------------------------------
+        avg_salaries : array_like or int
+            The average salary of the job of each person. If a single number
+            is given, then it is used for n people.
+
+        n : int, Default None
+            The number of people. Only needed if avg_salaries is a number.
+
+        rng : numpy.random.Generator, Default None
+            The generator used for all of the draws. Defaults to
+            np.random.default_rng().
+
+        start : datetime, Default dt.datetime(2000, 1, 1)
+            The earliest possible startdate.
+
+        end : datetime, Default dt.datetime(2023, 8, 15)
+            The latest possible startdate.
+
+        Returns
+        --------------------------------------------------
+        salsav : SalSavStartGen
+            An instance whose salary, savings, work_duration and startdate
+            attributes are numpy arrays of length n. The startdates are 
+            strings of the form '%Y-%m-%d'.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+
+        avg = np.asarray(avg_salaries, dtype=float)
+        if avg.ndim == 0:
+            avg = np.full(n, float(avg))
+        n = len(avg)
+        employed = avg > 0
+
+        # each distribution is only drawn for the people that it applies to
+        emp_avg = avg[employed]
+        no_emp = len(emp_avg)
+        sal_noise_r = rng.standard_gamma(.1, size=no_emp) * emp_avg
+        sal_noise_r -= rng.standard_gamma(.1, size=no_emp) * emp_avg
+        sal_noise_l = np.abs(rng.normal(emp_avg, emp_avg / 4))
+        salary = np.zeros(n)
+        salary[employed] = np.where(
+            sal_noise_r > 0,
+            sal_noise_r + sal_noise_l,
+            np.maximum(sal_noise_l, emp_avg / 10),
+        )
+
+        no_days = (end - start).days
+        days = rng.integers(0, no_days + 1, size=n)
+        # format each possible day once and index into it
+        day_strings = np.datetime_as_string(
+            np.datetime64(start.date(), 'D') + np.arange(no_days + 1), 
+            unit='D'
+        ).astype('U10')
+        startdate = day_strings[days]
+        work_duration = (no_days - days) / 365
+
+        savings = np.empty(n)
+        savings[employed] = rng.normal(
+            salary[employed] * work_duration[employed] / 4,
+            salary[employed] / 8,
+        )
+        no_unemp = n - no_emp
+        savings[~employed] = 50 * (
+            rng.standard_gamma(.5, size=no_unemp) 
+            - rng.standard_gamma(.1, size=no_unemp)
+        )
+
+        salsav = cls.__new__(cls)
+        salsav.salary = salary
+        salsav.startdate = startdate
+        salsav.work_duration = work_duration
+        salsav.savings = savings
+        return salsav
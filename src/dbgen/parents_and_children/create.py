@@ -1,11 +1,21 @@
+import asyncio
+from collections import deque
+import itertools
+import sqlalchemy as db
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.orm import declarative_base as Base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy_utils import create_database, database_exists, drop_database
 import faker
 import numpy as np
 from ._constants import JOBS, SALARY_AVG
-from ._utils import SalSavStartGen
+from ._utils import (
+    SalSavStartGen, FakePool, default_pool_size, generate_batches
+)
 from ._tables import Mailing, Finances, Employment, Children
+from .._load import DatabaseSink, AsyncDatabaseSink, convert_columns
+from .._stats import Stats
+from .._checkpoint import as_checkpoint, completed_prefix
 
 
 _fk = faker.Faker()
@@ -21,21 +31,24 @@ class Create:
         Mailing=Mailing,
         Employment=Employment,
         Finances=Finances,
-        Children=Children
+        Children=Children,
+        indexes=None,
     ):
         self.engine = engine
         self.base = base
-        self.Mailing = Mailing(base)
-        self.Employment = Employment(base)
-        self.Finances = Finances(base) 
-        self.Children = Children(base)
+        kwargs = {} if indexes is None else {'indexes': indexes}
+        self.Mailing = Mailing(base, **kwargs)
+        self.Employment = Employment(base, **kwargs)
+        self.Finances = Finances(base, **kwargs) 
+        self.Children = Children(base, **kwargs)
         self._initialized = False
 
     """
     Parameters
     --------------------------------------------------
     engine : sqlalchemy engine
-        The engine connecting sqlalchemy to the database.
+        The engine connecting sqlalchemy to the database. An AsyncEngine 
+        can only be used with initialize_async.
         
     base : sqlalchemy.orm.declarative_base, default _base = declarative_base()
         A default is set to a declarative_base().
@@ -48,12 +61,25 @@ class Create:
 
     Children : default Children(base)
 
+    indexes : str or dict, Default None
+        Passed to the table factories, either the name of a profile or a 
+        profile of the form {table_name: [columns, ...]}. 'analytics' 
+        indexes the columns that the queries filter and join on, ie 
+        children.parent1_id, children.parent2_id and employment.job. See 
+        INDEX_PROFILES in _constants.py.
+
     Methods
     --------------------------------------------------
     initialize
         Initializes the database and tables as well as populates the tables
         with fake data.
 
+    initialize_async
+        The same for an async engine, loading the tables concurrently.
+
+    iter_batches
+        Yields the fake data of one table in batches without a database.
+
     Example Usage
     --------------------------------------------------
     import sqlalchemy as db
@@ -99,7 +125,18 @@ class Create:
         no_parents=500,
         no_children=600,
         faker_seed=0,
-        numpy_seed=0
+        numpy_seed=0,
+        bulk=False,
+        chunk_size=10000,
+        fake_pool=None,
+        workers=1,
+        sink=None,
+        load_method='insert',
+        defer_constraints=False,
+        chunked=False,
+        resume=False,
+        checkpoint=None,
+        stats=None,
     ):
         """
         This function will initialize the database, create the tables and then
@@ -134,7 +171,96 @@ class Create:
         numpy_seed : int, Default 0
             The numpy.random seed to allow for reproducability
 
+        bulk : boolean, Default False
+            If true, the rows are generated as column batches and pushed to
+            the database with core sqlalchemy inserts, chunk_size rows at a
+            time, instead of adding one ORM object per row to a session.
+            The ids are assigned explicitly, starting at 1. The salaries,
+            savings and start dates are drawn in vectorized batches from a 
+            numpy.random.default_rng(numpy_seed) generator, so the data 
+            differs from the data of the session based path.
+
+        chunk_size : int, Default 10000
+            The number of parents (and children) generated and inserted per
+            batch when bulk or chunked is true.
+
+        fake_pool : FakePool, Default None
+            Only used when bulk is true. The names, addresses and bank
+            accounts are drawn from this pool of fake values instead of 
+            calling faker for every row. Defaults to FakePool(faker_seed) 
+            with default_pool_size(no_parents + no_children) values per 
+            field, ie a fifth of the rows but at least 1000 and at most 
+            10000. The pool is generated once per process.
+            Pass your own pool to change its size, cache it on disk or 
+            control the number of distinct values of a field.
+
+        workers : int, Default 1
+            Only used when bulk is true. The number of processes that 
+            generate the batches. The parents and the children are split 
+            into shards of chunk_size rows and every shard gets its own seed
+            spawned from np.random.SeedSequence(numpy_seed). The shards are
+            inserted in id order, so for a given numpy_seed, faker_seed and 
+            chunk_size the data does not depend on the number of workers.
+
+        sink : dbgen.sinks.Sink, Default None
+            If given, the tables are written to this sink instead of the 
+            database of the engine and bulk is implied. The database is not
+            created or dropped. Use ParquetSink or CSVSink to write one 
+            directory of part files per table, or SQLiteSink to write a 
+            sqlite file with journaling turned off.
+
+        load_method : str, Default 'insert'
+            Only used when bulk is true and sink is None. With 'native' the
+            batches are loaded with LOAD DATA LOCAL INFILE on MySQL (pymysql,
+            the engine needs connect_args={'local_infile': True}) and with 
+            COPY on PostgreSQL (psycopg). Other dialects fall back to the 
+            batched inserts of 'insert'.
+
+        defer_constraints : boolean, Default False
+            Only used when bulk is true and sink is None. The tables are 
+            created without primary keys, constraints and indexes, the data 
+            is loaded and the keys, constraints and indexes are built 
+            afterwards, so the load does not pay for any index maintenance.
+            Syncing, journaling and unique checks are also relaxed for the 
+            duration of the load.
+
+        chunked : boolean, Default False
+            Only used when bulk is false. The session based path adds, 
+            flushes and commits the rows chunk_size parents or children at a
+            time, each chunk in its own transaction, instead of holding every
+            row in one session until a single commit, so the memory is 
+            bounded by chunk_size rather than by no_parents + no_children. 
+            The ids are set explicitly in the order of generation, starting
+            at 1, and the data is the same as that of chunked=False.
+
+        resume : boolean, Default False
+            Only used with chunked. Continues a chunked run that died 
+            mid-way. The database is not dropped, the rows of the chunks 
+            that were committed are regenerated to keep the seeds in step 
+            but not added, and the run continues with the next chunk. Use 
+            the same seeds and parameters as the run that died.
+
+        checkpoint : str or dbgen.checkpoint.Checkpoint, Default None
+            The path of a checkpoint manifest. Requires bulk or chunked and 
+            a database. Every shard of the bulk path, or chunk of the 
+            chunked path, is committed on its own and recorded in the 
+            manifest, with the state of faker and numpy.random for the 
+            chunked path. If the manifest is of a run with the same 
+            parameters, the database is not dropped, the shards and chunks 
+            that are done are skipped and the tables end up the same as 
+            those of an uninterrupted run. The bulk shards have their own 
+            seeds, so they need no random state.
+
+        stats : dbgen.stats.Stats, Default None
+            Records the time, rows and bytes of every stage of the run, ie 
+            "schema", "generate.parents", "generate.children" and 
+            "load.children". Pass Stats(profile=True) or 
+            Stats(trace_memory=True) to also profile the run or trace its 
+            memory. Defaults to Stats().
+
         returns:
+            The summary of stats, see Stats.summary.
+
             The function will create a database with name specified in the 
             engine which is inputed by the user. It will populate the database
             with four tables named "mailing", "children", "finances" and 
@@ -147,35 +273,258 @@ class Create:
             given the average salary of the job that the person has.
         """
 
+        if stats is None:
+            stats = Stats()
+
+        with stats.run():
+            self._initialize(
+                no_jobs,
+                include_unemployed,
+                with_entries,
+                drop_db_if_exists,
+                no_parents,
+                no_children,
+                faker_seed,
+                numpy_seed,
+                bulk,
+                chunk_size,
+                fake_pool,
+                workers,
+                sink,
+                load_method,
+                defer_constraints,
+                chunked,
+                resume,
+                checkpoint,
+                stats,
+            )
+
+        return stats.summary()
+
+    def _initialize(
+        self,
+        no_jobs,
+        include_unemployed,
+        with_entries,
+        drop_db_if_exists,
+        no_parents,
+        no_children,
+        faker_seed,
+        numpy_seed,
+        bulk,
+        chunk_size,
+        fake_pool,
+        workers,
+        sink,
+        load_method,
+        defer_constraints,
+        chunked,
+        resume,
+        checkpoint,
+        stats,
+    ):
         np.random.seed(numpy_seed) 
         faker.Faker.seed(faker_seed)
 
-        jobs = JOBS[: min(no_jobs, len(JOBS))]
-        salary_avg = {j: SALARY_AVG[j] for j in jobs}
-
-        if include_unemployed:
-            jobs.append('unemployed')
-            salary_avg['unemployed'] = 0
+        jobs, salary_avg = _jobs_and_salaries(no_jobs, include_unemployed)
 
         if self._initialized:
           raise Exception("Database already initialized.")
-        
-        if drop_db_if_exists:
-            if database_exists(self.engine.url):
-                drop_database(self.engine.url) 
 
-        if not database_exists(self.engine.url):
-            create_database(self.engine.url) 
+        if defer_constraints and not bulk:
+            raise Exception("defer_constraints requires bulk=True.")
+
+        if chunked and (bulk or sink is not None):
+            raise Exception(
+                "chunked requires bulk=False, the bulk path is always "
+                "chunked."
+            )
+
+        if resume and not chunked:
+            raise Exception("resume requires chunked=True.")
+
+        if resume:
+            drop_db_if_exists = False
 
-        self.base.metadata.create_all(bind=self.engine)
+        checkpoint = as_checkpoint(checkpoint)
+        if checkpoint is not None:
+            if sink is not None or not (bulk or chunked):
+                raise Exception(
+                    "checkpoint requires a database and bulk or chunked."
+                )
+            if defer_constraints:
+                raise Exception(
+                    "checkpoint can not be combined with defer_constraints."
+                )
+            resumed = checkpoint.start(
+                {
+                    'no_jobs': no_jobs,
+                    'include_unemployed': include_unemployed,
+                    'no_parents': no_parents,
+                    'no_children': no_children,
+                    'faker_seed': faker_seed,
+                    'numpy_seed': numpy_seed,
+                    'bulk': bulk,
+                    'chunk_size': chunk_size,
+                }
+            )
+            if resumed:
+                drop_db_if_exists = False
+
+        defer = defer_constraints and with_entries and sink is None
+
+        if sink is None:
+            with stats.stage('schema'):
+                if drop_db_if_exists:
+                    if database_exists(self.engine.url):
+                        drop_database(self.engine.url) 
+
+                if not database_exists(self.engine.url):
+                    create_database(self.engine.url) 
+
+                if not defer:
+                    self.base.metadata.create_all(bind=self.engine)
 
         self._initialized = True
         
         if not with_entries:
             return None
 
+        if checkpoint is not None and resumed:
+            self._discard_unrecorded(
+                completed_prefix(checkpoint.completed('parents')) * chunk_size,
+                completed_prefix(checkpoint.completed('children')) * chunk_size,
+            )
+
+        if bulk or sink is not None:
+            if sink is None:
+                sink = DatabaseSink(
+                    self.engine, chunk_size, load_method, defer
+                )
+            if fake_pool is None:
+                with stats.stage('generate.fake_pool'):
+                    fake_pool = _default_pool(
+                        faker_seed, no_parents + no_children
+                    )
+            skip, shards = None, None
+            if checkpoint is not None:
+                skip = {
+                    name: range(completed_prefix(checkpoint.completed(name)))
+                    for name in ['parents', 'children']
+                }
+                shards = deque(
+                    (name, shard_no)
+                    for name, no_rows in [
+                        ('parents', no_parents), ('children', no_children)
+                    ]
+                    for shard_no in range(-(-no_rows // chunk_size))
+                    if shard_no not in skip[name]
+                )
+            batches = generate_batches(
+                no_parents,
+                no_children,
+                jobs,
+                [salary_avg[j] for j in jobs],
+                fake_pool,
+                numpy_seed=numpy_seed,
+                chunk_size=chunk_size,
+                workers=workers,
+                skip=skip,
+            )
+            self._bulk_entries(
+                stats.iterate(batches, _generate_stage),
+                sink,
+                stats,
+                checkpoint,
+                shards,
+            )
+            return None
+
+        if workers > 1:
+            raise Exception("workers > 1 requires bulk=True.")
+
+        if chunked and checkpoint is not None:
+            self._checkpointed_chunks(
+                jobs, salary_avg, no_parents, no_children, chunk_size, 
+                checkpoint, stats,
+            )
+            return None
+
+        parents = self._orm_parents(jobs, salary_avg, no_parents, chunked)
+        children = self._orm_children(no_parents, no_children, chunked)
+
+        if chunked:
+            skip_parents, skip_children = (
+                self._committed_rows() if resume else (0, 0)
+            )
+            self._add_in_chunks(parents, chunk_size, skip_parents, stats)
+            self._add_in_chunks(children, chunk_size, skip_children, stats)
+            return None
+
         session  = sessionmaker(bind=self.engine)()
-        for _ in range(no_parents):
+        with stats.stage('generate.orm') as record:
+            for objects in itertools.chain(parents, children):
+                session.add_all(objects)
+            record['rows'] = len(session.new)
+
+        with stats.stage('load.orm', rows=record['rows']):
+            session.commit()
+
+        return None
+
+    def _checkpointed_chunks(
+        self,
+        jobs,
+        salary_avg,
+        no_parents,
+        no_children,
+        chunk_size,
+        checkpoint,
+        stats,
+    ):
+        """
+        The chunked session based path with a checkpoint. The state of 
+        faker and numpy.random is recorded with every chunk of parents, so 
+        the parents that are done are not generated again. The children 
+        depend on the pairs of parents that were drawn before them, so the
+        children that are done are regenerated, but not added.
+        """
+        parent_chunks = completed_prefix(checkpoint.completed('parents'))
+        if parent_chunks:
+            _set_random_state(checkpoint.state('parents', parent_chunks - 1))
+        parents = self._orm_parents(
+            jobs, salary_avg, no_parents, True, parent_chunks * chunk_size + 1
+        )
+        self._add_in_chunks(
+            parents, 
+            chunk_size, 
+            0, 
+            stats,
+            lambda chunk_no: checkpoint.done(
+                'parents', parent_chunks + chunk_no, _random_state()
+            ),
+        )
+
+        child_chunks = completed_prefix(checkpoint.completed('children'))
+        self._add_in_chunks(
+            self._orm_children(no_parents, no_children, True),
+            chunk_size,
+            child_chunks * chunk_size,
+            stats,
+            lambda chunk_no: checkpoint.done(
+                'children', child_chunks + chunk_no
+            ),
+        )
+
+    def _orm_parents(
+        self, jobs, salary_avg, no_parents, with_ids, first_id=1
+    ):
+        """
+        Yields the "mailing", "employment" and "finances" rows of every 
+        parent of the session based path, from the parent first_id on. With
+        with_ids the parent_ids are set explicitly.
+        """
+        for parent_id in range(first_id, no_parents + 1):
             mailing = self.Mailing(
                 _fk.first_name(),
                 _fk.last_name(),
@@ -184,7 +533,6 @@ class Create:
                 _fk.state(),
                 _fk.zipcode(),
             )
-            session.add(mailing)
 
             job = np.random.choice(jobs)
             sal_sav = SalSavStartGen(salary_avg[job] ,_fk)
@@ -193,47 +541,24 @@ class Create:
                 job,
                 sal_sav.startdate,
             )
-            session.add(employment)
 
             finances = self.Finances(
                 _fk.bban(),
                 sal_sav.savings,
             )
-            session.add(finances)
-
-        count = 0
-        p = np.exp(-np.arange(6) / 1.3)
-        p /= p.sum()
-        pairs = []
-        while count < no_children:
-
-            parent_ids = np.hstack((np.array([None]), np.arange(1, no_parents)))
-            
-            parents = np.random.choice(parent_ids, replace=False, size=2)
-            
-            try:
-                p1 = int(parents[0])
-            except:
-                p1 = None
-            try:
-                p2 = int(parents[1])
-            except:
-                p2 = None
-
-            if p1 is None:
-                p1, p2 = p2, p1
-
-            if (p1, p2) in pairs:
-                continue
-
-            if (p2, p1) in pairs:
-                continue
-
-            pairs.append((p1, p2))
-
-            amt = np.random.choice(np.arange(6), p=p)
-            amt = amt if count + amt <= no_children else no_children - count
-            count += amt
+
+            if with_ids:
+                for row in [mailing, employment, finances]:
+                    row.parent_id = parent_id
+            yield mailing, employment, finances
+
+    def _orm_children(self, no_parents, no_children, with_ids):
+        """
+        Yields the "children" rows of the session based path. With with_ids
+        the child_ids are set explicitly, starting at 1.
+        """
+        child_id = 0
+        for p1, p2, amt in _families(no_parents, no_children):
             for _ in range(amt):
                 child = self.Children(
                     parent1_id=p1,
@@ -244,8 +569,346 @@ class Create:
                     is_student=[False, True][np.random.binomial(1, .8)],
                     is_employed=[False, True][np.random.binomial(1, .6)]
                 )
-                session.add(child)
+                child_id += 1
+                if with_ids:
+                    child.child_id = child_id
+                yield (child,)
 
-        session.commit()
+    def _add_in_chunks(self, rows, chunk_size, skip, stats, on_commit=None):
+        """
+        Adds the rows yielded by _orm_parents or _orm_children chunk_size at
+        a time, every chunk in its own session and transaction, so that at
+        most one chunk of objects is held in memory. The first skip rows are
+        generated, which keeps faker and numpy.random in step, but not 
+        added. on_commit(chunk_no) is called after every commit, while rows
+        is paused right after the last row of the chunk.
+        """
+        rows = iter(rows)
+        with stats.stage('generate.orm'):
+            for _ in itertools.islice(rows, skip):
+                pass
+
+        session_maker = sessionmaker(bind=self.engine)
+        for chunk_no in itertools.count():
+            with stats.stage('generate.orm') as record:
+                chunk = list(itertools.islice(rows, chunk_size))
+                record['rows'] = sum(len(objects) for objects in chunk)
+            if not chunk:
+                return None
+            with stats.stage('load.orm', rows=record['rows']):
+                with session_maker() as session:
+                    for objects in chunk:
+                        session.add_all(objects)
+                    session.commit()
+            if on_commit is not None:
+                on_commit(chunk_no)
+
+    def _discard_unrecorded(self, no_parents, no_children):
+        """
+        Deletes the rows past the first no_parents parents and no_children 
+        children, ie the rows of a chunk that was committed by a run that 
+        died before the chunk was recorded in its checkpoint.
+        """
+        with self.engine.begin() as conn:
+            for table in [
+                self.Mailing.__table__,
+                self.Employment.__table__,
+                self.Finances.__table__,
+            ]:
+                conn.execute(
+                    table.delete().where(table.c.parent_id > no_parents)
+                )
+            table = self.Children.__table__
+            conn.execute(table.delete().where(table.c.child_id > no_children))
 
-        return None
+    def _committed_rows(self):
+        """
+        The number of parents and children that a chunked run has committed.
+        """
+        with self.engine.connect() as conn:
+            return tuple(
+                conn.execute(
+                    db.select(db.func.count()).select_from(table)
+                ).scalar()
+                for table in [self.Mailing.__table__, self.Children.__table__]
+            )
+
+    async def initialize_async(
+        self,
+        no_jobs=len(JOBS),
+        include_unemployed=True,
+        with_entries=True,
+        drop_db_if_exists=True,
+        no_parents=500,
+        no_children=600,
+        faker_seed=0,
+        numpy_seed=0,
+        chunk_size=10000,
+        fake_pool=None,
+        workers=1,
+        max_connections=4,
+        stats=None,
+    ):
+        """
+        The asyncio counterpart of initialize(bulk=True) for an engine of 
+        create_async_engine, ie with aiosqlite, asyncmy or asyncpg. The 
+        batches are generated in a worker thread and loaded with an 
+        AsyncDatabaseSink, which inserts into "mailing", "employment", 
+        "finances" and "children" concurrently, over up to max_connections
+        connections, while the next batches are generated. Every batch is 
+        committed on its own. The data is the same as that of 
+        initialize(bulk=True) with the same seeds and chunk_size.
+
+        The database must exist. drop_db_if_exists drops and recreates the
+        tables instead, since an async driver can not create a database.
+
+        Parameters
+        --------------------------------------------------
+        max_connections : int, Default 4
+            The largest number of batches that are inserted at once. SQLite 
+            only has one writer, so it always loads over one connection.
+
+        The remaining parameters are the same as those of initialize.
+
+        Example Usage
+        --------------------------------------------------
+        import asyncio
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        engine = create_async_engine("postgresql+asyncpg://...")
+        database = Create(engine=engine)
+        summary = asyncio.run(
+            database.initialize_async(no_parents=10**6, no_children=10**6)
+        )
+        """
+        if not isinstance(self.engine, AsyncEngine):
+            raise Exception(
+                "initialize_async requires an AsyncEngine, ie of "
+                "sqlalchemy.ext.asyncio.create_async_engine."
+            )
+
+        if self._initialized:
+          raise Exception("Database already initialized.")
+
+        if stats is None:
+            stats = Stats()
+
+        with stats.run():
+            jobs, salary_avg = _jobs_and_salaries(no_jobs, include_unemployed)
+
+            with stats.stage('schema'):
+                async with self.engine.begin() as conn:
+                    if drop_db_if_exists:
+                        await conn.run_sync(self.base.metadata.drop_all)
+                    await conn.run_sync(self.base.metadata.create_all)
+
+            self._initialized = True
+
+            if with_entries:
+                if fake_pool is None:
+                    with stats.stage('generate.fake_pool'):
+                        fake_pool = await asyncio.to_thread(
+                            _default_pool, faker_seed, no_parents + no_children
+                        )
+                batches = generate_batches(
+                    no_parents,
+                    no_children,
+                    jobs,
+                    [salary_avg[j] for j in jobs],
+                    fake_pool,
+                    numpy_seed=numpy_seed,
+                    chunk_size=chunk_size,
+                    workers=workers,
+                )
+                sink = AsyncDatabaseSink(
+                    self.engine, chunk_size, max_connections
+                )
+                tables = [
+                    self.Mailing.__table__,
+                    self.Employment.__table__,
+                    self.Finances.__table__,
+                    self.Children.__table__,
+                ]
+                async with sink.open(tables, stats=stats):
+                    await sink.write_from(
+                        stats.iterate(batches, _generate_stage)
+                    )
+
+        return stats.summary()
+
+    def iter_batches(
+        self,
+        table,
+        batch_size=10000,
+        format='columns',
+        no_jobs=len(JOBS),
+        include_unemployed=True,
+        no_parents=500,
+        no_children=600,
+        faker_seed=0,
+        numpy_seed=0,
+        fake_pool=None,
+        workers=1
+    ):
+        """
+        This function generates the fake data of a single table and yields it
+        in batches of batch_size rows. No database or engine is needed and 
+        at most a few batches are held in memory at once, so the data can be
+        written to files or streamed to another process. The data is the same
+        as the data that initialize(bulk=True, chunk_size=batch_size) inserts
+        with the same seeds.
+
+        Parameters
+        --------------------------------------------------
+        table : str
+            One of "mailing", "employment", "finances" or "children".
+
+        batch_size : int, Default 10000
+            The number of rows per batch. This is the chunk_size of 
+            initialize.
+
+        format : str, Default 'columns'
+            * 'columns' yields dictionaries of the form 
+                {column_name: np.array}. parent2_id of "children" is a 
+                numpy.ma.MaskedArray that is masked where it is NULL.
+            * 'numpy' yields numpy structured arrays, wrapped in a 
+                numpy.ma.MaskedArray that marks the NULL values.
+            * 'arrow' yields pyarrow.RecordBatch objects. Requires pyarrow.
+
+        The remaining parameters are the same as those of initialize.
+
+        Example Usage
+        --------------------------------------------------
+        database = Create(engine=None)
+
+        for batch in database.iter_batches(
+            'children', batch_size=100000, no_parents=10**6, no_children=10**6
+        ):
+            ...
+        """
+        tables = ['mailing', 'employment', 'finances', 'children']
+        if table not in tables:
+            raise Exception(f"table must be one of {tables}, not {table}.")
+
+        jobs, salary_avg = _jobs_and_salaries(no_jobs, include_unemployed)
+        if fake_pool is None:
+            fake_pool = _default_pool(faker_seed, no_parents + no_children)
+
+        for batch in generate_batches(
+            no_parents,
+            no_children,
+            jobs,
+            [salary_avg[j] for j in jobs],
+            fake_pool,
+            numpy_seed=numpy_seed,
+            chunk_size=batch_size,
+            workers=workers,
+            tables=[table],
+        ):
+            yield convert_columns(batch[table], format)
+
+    def _bulk_entries(
+        self, batches, sink, stats=None, checkpoint=None, shards=None
+    ):
+        """
+        Writes the batches yielded by generate_batches to sink. With a 
+        checkpoint, every batch is committed and recorded as the next shard 
+        of shards, a deque of (table, shard_no).
+        """
+        tables = [
+            self.Mailing.__table__,
+            self.Employment.__table__,
+            self.Finances.__table__,
+            self.Children.__table__,
+        ]
+        with sink.open(tables, stats=stats):
+            for batch in batches:
+                for name, columns in batch.items():
+                    sink.write(name, columns)
+                if checkpoint is not None:
+                    sink.flush()
+                    checkpoint.done(*shards.popleft())
+
+
+def _random_state():
+    """
+    The state of numpy.random and of the random generator of faker, as json.
+    """
+    name, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+    return {
+        'numpy': [name, keys.tolist(), pos, has_gauss, cached_gaussian],
+        'faker': _fk.random.getstate(),
+    }
+
+
+def _set_random_state(state):
+    np.random.set_state(
+        (
+            state['numpy'][0],
+            np.array(state['numpy'][1], dtype=np.uint32),
+            *state['numpy'][2:],
+        )
+    )
+    version, internal, gauss_next = state['faker']
+    _fk.random.setstate((version, tuple(internal), gauss_next))
+
+
+def _generate_stage(batch):
+    # the parents are generated for three tables at once
+    return 'generate.children' if 'children' in batch else 'generate.parents'
+
+
+def _jobs_and_salaries(no_jobs, include_unemployed):
+    jobs = JOBS[: min(no_jobs, len(JOBS))]
+    salary_avg = {j: SALARY_AVG[j] for j in jobs}
+
+    if include_unemployed:
+        jobs.append('unemployed')
+        salary_avg['unemployed'] = 0
+
+    return jobs, salary_avg
+
+
+def _default_pool(faker_seed, no_rows):
+    return FakePool(faker_seed, pool_size=default_pool_size(no_rows))
+
+
+def _families(no_parents, no_children):
+    """
+    Randomly pairs up parents and yields (parent1_id, parent2_id, amt) where 
+    amt is the number of children of the pair. parent2_id may be None. The 
+    generator stops once no_children children have been handed out.
+    """
+    count = 0
+    p = np.exp(-np.arange(6) / 1.3)
+    p /= p.sum()
+    pairs = set()
+    parent_ids = np.hstack((np.array([None]), np.arange(1, no_parents)))
+    while count < no_children:
+
+        parents = np.random.choice(parent_ids, replace=False, size=2)
+        
+        try:
+            p1 = int(parents[0])
+        except:
+            p1 = None
+        try:
+            p2 = int(parents[1])
+        except:
+            p2 = None
+
+        if p1 is None:
+            p1, p2 = p2, p1
+
+        if (p1, p2) in pairs:
+            continue
+
+        if (p2, p1) in pairs:
+            continue
+
+        pairs.add((p1, p2))
+
+        amt = np.random.choice(np.arange(6), p=p)
+        amt = amt if count + amt <= no_children else no_children - count
+        count += amt
+        yield p1, p2, amt
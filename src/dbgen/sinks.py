@@ -0,0 +1,9 @@
+from ._load.sinks import (
+    Sink,
+    DatabaseSink,
+    ParquetSink,
+    CSVSink,
+    SQLiteSink,
+    columns_to_frame
+)
+from ._load.async_sink import AsyncDatabaseSink
@@ -0,0 +1 @@
+from ._stats import Stats
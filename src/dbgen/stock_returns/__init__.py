@@ -1 +1,2 @@
 from .create import Create
+from ._utils import DownloadCache, MarketSimulator, simulated_tickers
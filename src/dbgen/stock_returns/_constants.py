@@ -0,0 +1,8 @@
+# the secondary indexes of the tables for each index profile, see the indexes
+# argument of the table factories in _tables.py
+INDEX_PROFILES = {
+    'analytics': {
+        'ohlcv': [('ticker', 'datetime')],
+        'transaction_history': [('user_id', 'ticker', 'position_type')],
+    },
+}
@@ -1,8 +1,12 @@
 import sqlalchemy as db
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm.decl_api import DeclarativeMeta
+from sqlalchemy.schema import CreateColumn
+from .._indexes import index_args
+from ._constants import INDEX_PROFILES
 
 
-def OHLCV(base) -> DeclarativeMeta:
+def OHLCV(base, indexes=None) -> DeclarativeMeta:
     """
     This function takes a SQLAlchemy declarative_base and returns a SQLAlchemy 
     table/mapper. The mapper will take the open, low, high, close and volume
@@ -17,6 +21,12 @@ def OHLCV(base) -> DeclarativeMeta:
     --------------------------------------------------
     base : sqlalchemy.orm.declarative_base
         A declarative_base that will be inheirited by the underlying class
+
+    indexes : str, dict or list, Default None
+        The secondary indexes of the table. Either the name of a profile in 
+        INDEX_PROFILES, ie 'analytics', a profile of the form 
+        {table_name: [columns, ...]} or a list of columns and tuples of 
+        columns, one per index. By default only the primary key is indexed.
        
 
     Returns
@@ -54,6 +64,7 @@ def OHLCV(base) -> DeclarativeMeta:
     class _OHLCV(base):
         # table name for User model
         __tablename__ = "ohlcv"
+        __table_args__ = index_args("ohlcv", indexes, INDEX_PROFILES)
     
         # user columns
         datetime = db.Column(
@@ -125,7 +136,7 @@ def OHLCV(base) -> DeclarativeMeta:
     return _OHLCV
 
 
-def TransactionHistory(base) -> DeclarativeMeta:
+def TransactionHistory(base, indexes=None) -> DeclarativeMeta:
     """
     This function takes a SQLAlchemy declarative_base and returns a SQLAlchemy 
     table/mapper. The mapper will take information of a stock transaction and 
@@ -138,6 +149,12 @@ def TransactionHistory(base) -> DeclarativeMeta:
     --------------------------------------------------
     base : sqlalchemy.orm.declarative_base
         A declarative_base that will be inheirited by the underlying class
+
+    indexes : str, dict or list, Default None
+        The secondary indexes of the table. Either the name of a profile in 
+        INDEX_PROFILES, ie 'analytics', a profile of the form 
+        {table_name: [columns, ...]} or a list of columns and tuples of 
+        columns, one per index. By default only the primary key is indexed.
        
 
     Returns
@@ -164,7 +181,8 @@ def TransactionHistory(base) -> DeclarativeMeta:
     session = sessionmaker(bind=engine)()
 
     entry = _Transaction_History(
-        datetime, ticker, position_type, action, no_shares, at_price
+        user_id, datetime, ticker, position_type, action, no_shares, 
+        at_price, trans_id
     )
 
     session.add(entry)
@@ -175,13 +193,19 @@ def TransactionHistory(base) -> DeclarativeMeta:
     class _TransactionHistory(base):
         # table name for User model
         __tablename__ = "transaction_history"
+        __table_args__ = index_args(
+            "transaction_history", indexes, INDEX_PROFILES
+        )
     
         # user columns
         user_id = db.Column(
             db.Integer(), primary_key=True, autoincrement=False
         )
+        # SQLite has no auto increment on a composite primary key, there
+        # the generators assign the trans_ids themselves
         trans_id = db.Column(
-            db.Integer(), primary_key=True, autoincrement=True
+            db.Integer(), primary_key=True, autoincrement=True, 
+            info={'sqlite_autoincrement': False}
         )
         datetime = db.Column(
             db.DateTime()
@@ -207,7 +231,8 @@ def TransactionHistory(base) -> DeclarativeMeta:
             position_type,
             action,
             no_shares,
-            at_price
+            at_price,
+            trans_id=None,
         ):
             """
             Parameters
@@ -235,6 +260,11 @@ def TransactionHistory(base) -> DeclarativeMeta:
             at_price : float 
                 The price per share of the transaction.
 
+            trans_id : int, Default None
+                The ID of the transaction, unique per investor. Filled in by
+                the server if not given, except on SQLite where it has to be
+                given.
+
             Returns
             --------------------------------------------------
             A mapable object that can be sent to a sql table with the use of
@@ -248,11 +278,27 @@ def TransactionHistory(base) -> DeclarativeMeta:
             self.action = action
             self.no_shares = no_shares
             self.at_price = at_price
+            self.trans_id = trans_id
 
     return _TransactionHistory 
 
 
-def Portfolio(base) -> DeclarativeMeta:
+@compiles(CreateColumn, 'sqlite')
+def _sqlite_column(create, compiler, **kw):
+    """
+    Renders the primary key columns marked with sqlite_autoincrement=False 
+    without the auto increment SQLite refuses on a composite primary key. 
+    Other dialects keep it.
+    """
+    column = create.element
+    if column.primary_key and column.info.get('sqlite_autoincrement') is False:
+        # the primary key constraint is rendered with the table
+        column = db.Column(column.name, column.type, nullable=False)
+        return compiler.get_column_specification(column)
+    return compiler.visit_create_column(create, **kw)
+
+
+def Portfolio(base, indexes=None) -> DeclarativeMeta:
     """
     Suggestion
     --------------------------------------------------
@@ -275,6 +321,12 @@ def Portfolio(base) -> DeclarativeMeta:
     --------------------------------------------------
     base : sqlalchemy.orm.declarative_base
         A declarative_base that will be inheirited by the underlying class
+
+    indexes : str, dict or list, Default None
+        The secondary indexes of the table. Either the name of a profile in 
+        INDEX_PROFILES, ie 'analytics', a profile of the form 
+        {table_name: [columns, ...]} or a list of columns and tuples of 
+        columns, one per index. By default only the primary key is indexed.
        
 
     Returns
@@ -312,6 +364,7 @@ def Portfolio(base) -> DeclarativeMeta:
     class _Portfolio(base):
         # table name for User model
         __tablename__ = "portfolio"
+        __table_args__ = index_args("portfolio", indexes, INDEX_PROFILES)
     
         # user columns
         user_id = db.Column(
@@ -437,3 +490,76 @@ def Portfolio(base) -> DeclarativeMeta:
             self.gain = gain
 
     return _Portfolio 
+
+
+def OHLCVGaps(base, indexes=None) -> DeclarativeMeta:
+    """
+    This function takes a SQLAlchemy declarative_base and returns a SQLAlchemy 
+    table/mapper for the table "ohlcv_gaps". Every row is one run of 
+    consecutive NULLs of one of the columns open, high, low, close and volume
+    of a ticker in the "ohlcv" table, see Create.find_gaps. 
+    
+    Parameters
+    --------------------------------------------------
+    base : sqlalchemy.orm.declarative_base
+        A declarative_base that will be inheirited by the underlying class
+
+    indexes : str, dict or list, Default None
+        The secondary indexes of the table, see OHLCV.
+
+    Returns
+    --------------------------------------------------
+    _OHLCVGaps(base) : SQLAlchemy table/mapper class 
+        _OHLCVGaps maps rows to a sql table names "ohlcv_gaps" under a 
+        sqlalchemy.orm.sessionmaker setting. 
+    """
+
+    class _OHLCVGaps(base):
+        __tablename__ = "ohlcv_gaps"
+        __table_args__ = index_args("ohlcv_gaps", indexes, INDEX_PROFILES)
+    
+        ticker = db.Column(
+            db.String(5), primary_key=True, autoincrement=False
+        )
+        ohlcv = db.Column(
+            db.String(6), primary_key=True, autoincrement=False
+        )
+        start_datetime = db.Column(
+            db.DateTime(), primary_key=True, autoincrement=False
+        )
+        end_datetime = db.Column(db.DateTime())
+        length = db.Column(db.Integer())
+     
+        def __init__(
+            self,
+            ticker,
+            ohlcv,
+            start_datetime,
+            end_datetime,
+            length,
+        ):
+            """
+            Parameters
+            --------------------------------------------------
+            ticker : str
+                stock ticker
+
+            ohlcv : str
+                The column of the "ohlcv" table, ie 'open'.
+
+            start_datetime : datetime.datetime
+                The datetime of the first NULL of the run.
+
+            end_datetime : datetime.datetime
+                The datetime of the last NULL of the run.
+
+            length : int
+                The number of rows of the run.
+            """
+            self.ticker = ticker
+            self.ohlcv = ohlcv
+            self.start_datetime = start_datetime
+            self.end_datetime = end_datetime
+            self.length = length
+
+    return _OHLCVGaps
@@ -1,5 +1,13 @@
 from .utils import (
     convert_sql_to_string, 
     longest_chain_of_nans, 
-    transaction_chain
+    transaction_chain,
+    transaction_chains
 )
+from .prices import PriceIndex
+from .gaps import GAP_COLUMNS, GapInjector, inject_gaps_in_table, find_gaps
+from .portfolio import (
+    PORTFOLIO_ENGINES, portfolio_from_transactions, mark_portfolio
+)
+from .cache import DownloadCache
+from .simulator import MarketSimulator, simulated_tickers
@@ -0,0 +1,282 @@
+import os
+import json
+import time
+import datetime as dt
+import threading
+import numpy as np
+import pandas as pd
+
+
+_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+_COLUMNS = [
+    'datetime', 'ticker', 'open', 'high', 'low', 'close', 'volume', 'timestamp'
+]
+
+
+class DownloadCache:
+    """
+    An on-disk cache of the yfinance downloads. Every downloaded batch is
+    stored per ticker as a compressed .npz file under cache_dir, keyed by
+    (ticker, interval, start, end), and a manifest.json keeps track of the
+    entries, their size and when they were last used. A request is served
+    from the cache when one entry of the ticker and interval covers its
+    whole window, so an entry of a month also serves the 5 day batches
+    within it. The windows are keyed in UTC: naive datetimes are taken to be
+    in UTC and timezone aware ones are converted to UTC.
+
+    When an entry is used its last_used is only updated in memory. The
+    manifest is written by put and clear, and by flush, which the downloads 
+    of Create call once they are done.
+
+    The cache can be pre-seeded from files with seed, which allows the
+    stock data to be generated without a network connection.
+
+    Parameters
+    --------------------------------------------------
+    cache_dir : str
+        The directory of the cache. It is created if it does not exist.
+
+    max_bytes : int, Default None
+        If given, the least recently used entries are evicted once the
+        entries take up more than max_bytes.
+
+    offline : boolean, Default False
+        Raises an Exception instead of downloading a window that is not
+        cached.
+
+    Example Usage
+    --------------------------------------------------
+    import datetime as dt
+    from dbgen.stock_returns import Create, DownloadCache
+
+    cache = DownloadCache('.dbgen/yf', max_bytes=2 * 1024 ** 3)
+    cache.seed(
+        'spy_sep.csv',
+        interval='1m',
+        start=dt.datetime(2023, 9, 1),
+        end=dt.datetime(2023, 10, 1),
+    )
+    database = Create(engine=engine, cache=cache)
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, cache_dir, max_bytes=None, offline=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.offline = offline
+        os.makedirs(cache_dir, exist_ok=True)
+        self.entries = self._read_manifest()
+        # the downloads are prefetched in a background thread
+        self._lock = threading.RLock()
+        # last_used of entries that changed since the manifest was written
+        self._dirty = False
+
+    def get(self, ticker, interval, start, end):
+        """
+        Returns the dataframe of ticker between start, inclusive, and end,
+        exclusive, with the columns of the "ohlcv" table or None if no entry
+        covers the window.
+        """
+        with self._lock:
+            return self._get(ticker, interval, _utc(start), _utc(end))
+
+    def _get(self, ticker, interval, start, end):
+        name = self._find(ticker, interval, start, end)
+        if name is None:
+            return None
+
+        entry = self.entries[name]
+        with np.load(os.path.join(self.cache_dir, name)) as cached:
+            df = pd.DataFrame({col: cached[col] for col in _COLUMNS})
+        df['datetime'] = df['datetime'].astype(object)
+        df['ticker'] = df['ticker'].astype(object)
+
+        if (entry['start'], entry['end']) != (
+            start.strftime(_FORMAT), end.strftime(_FORMAT)
+        ):
+            # the datetimes are in the timezone of the exchange
+            timestamps = df['timestamp'].to_numpy()
+            df = df[
+                (timestamps >= _timestamp(start)) 
+                & (timestamps < _timestamp(end))
+            ]
+            df = df.reset_index(drop=True)
+
+        entry['last_used'] = time.time()
+        self._dirty = True
+        return df
+
+    def put(self, ticker, interval, start, end, df):
+        """
+        Stores the dataframe of ticker, with the columns of the "ohlcv"
+        table, as the entry of the window from start to end and evicts the
+        least recently used entries if the cache is too large.
+        """
+        with self._lock:
+            self._put(ticker, interval, _utc(start), _utc(end), df)
+
+    def _put(self, ticker, interval, start, end, df):
+        name = _entry_name(ticker, interval, start, end)
+        path = os.path.join(self.cache_dir, name)
+        np.savez_compressed(
+            path,
+            datetime=df['datetime'].to_numpy().astype(str),
+            ticker=df['ticker'].to_numpy().astype(str),
+            **{
+                col: df[col].to_numpy(dtype=float)
+                for col in _COLUMNS[2:]
+            },
+        )
+        self.entries[name] = {
+            'ticker': ticker,
+            'interval': interval,
+            'start': start.strftime(_FORMAT),
+            'end': end.strftime(_FORMAT),
+            'bytes': os.path.getsize(path),
+            'last_used': time.time(),
+        }
+        self._evict(keep=name)
+        self._write_manifest()
+
+    def flush(self):
+        """
+        Writes the manifest if entries were used since it was written.
+        """
+        with self._lock:
+            if self._dirty:
+                self._write_manifest()
+
+    def seed(self, frame, interval, start, end):
+        """
+        Pre-seeds the cache with data that was downloaded elsewhere.
+
+        Parameters
+        --------------------------------------------------
+        frame : pd.DataFrame or str
+            A dataframe or the path of a .csv or .parquet file with the
+            columns datetime, ticker, open, high, low, close and volume, ie
+            an export of the "ohlcv" table. timestamp is computed from
+            datetime if it is missing. Naive datetimes are taken to be in
+            UTC and timezone aware ones are stored in their local time, as
+            yfinance gives them.
+
+        interval : str
+            The time_step of the data, ie '1m'.
+
+        start, end : datetime.datetime
+            The window that the data covers. Every ticker of frame becomes
+            one entry with this window. Naive windows are in UTC as well and
+            timezone aware ones are converted to UTC.
+        """
+        if isinstance(frame, str):
+            if frame.endswith('.parquet'):
+                frame = pd.read_parquet(frame)
+            else:
+                frame = pd.read_csv(frame)
+
+        frame = frame.copy()
+        datetimes = pd.to_datetime(frame['datetime'])
+        # the same as the downloads, whatever the timezone of the machine
+        if datetimes.dt.tz is not None:
+            timestamps = datetimes.dt.tz_convert('UTC').dt.tz_localize(None)
+            datetimes = datetimes.dt.tz_localize(None)
+        else:
+            timestamps = datetimes
+        frame['datetime'] = datetimes.dt.strftime('%Y-%m-%d %H:%M:%S')
+        if 'timestamp' not in frame:
+            frame['timestamp'] = (
+                timestamps.to_numpy().astype('datetime64[s]').astype(np.int64)
+            )
+        for ticker, sub_df in frame.groupby('ticker', sort=False):
+            self.put(ticker, interval, start, end, sub_df[_COLUMNS])
+
+    @property
+    def size(self):
+        """
+        The number of bytes of all of the entries.
+        """
+        return sum(entry['bytes'] for entry in self.entries.values())
+
+    def clear(self):
+        with self._lock:
+            for name in list(self.entries):
+                self._remove(name)
+            self._write_manifest()
+
+    def _find(self, ticker, interval, start, end):
+        start, end = start.strftime(_FORMAT), end.strftime(_FORMAT)
+        covering = [
+            name for name, entry in self.entries.items()
+            if entry['ticker'] == ticker
+            and entry['interval'] == interval
+            and entry['start'] <= start
+            and entry['end'] >= end
+        ]
+        if not covering:
+            return None
+        # the smallest entry that covers the window is the cheapest to load
+        return min(covering, key=lambda name: self.entries[name]['bytes'])
+
+    def _evict(self, keep):
+        if self.max_bytes is None:
+            return None
+        lru = sorted(
+            (name for name in self.entries if name != keep),
+            key=lambda name: self.entries[name]['last_used'],
+        )
+        while lru and self.size > self.max_bytes:
+            self._remove(lru.pop(0))
+
+    def _remove(self, name):
+        path = os.path.join(self.cache_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+        del self.entries[name]
+
+    def _read_manifest(self):
+        path = os.path.join(self.cache_dir, self.MANIFEST)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as file:
+            entries = json.load(file)
+        # entries whose file was deleted by hand are dropped
+        return {
+            name: entry for name, entry in entries.items()
+            if os.path.exists(os.path.join(self.cache_dir, name))
+        }
+
+    def _write_manifest(self):
+        path = os.path.join(self.cache_dir, self.MANIFEST)
+        with open(path + '.tmp', 'w') as file:
+            json.dump(self.entries, file, indent=1)
+        os.replace(path + '.tmp', path)
+        self._dirty = False
+
+
+def _utc(moment):
+    """
+    Returns the naive UTC datetime of a timezone aware moment, so that the
+    keys of the entries do not depend on the timezone of the machine. Naive
+    datetimes are already taken to be in UTC and are returned as they are.
+    """
+    if moment.tzinfo is None or moment.utcoffset() is None:
+        return moment
+    return moment.astimezone(dt.timezone.utc).replace(tzinfo=None)
+
+
+def _timestamp(moment):
+    """
+    The seconds since the epoch of a naive UTC datetime, as in the timestamp
+    column.
+    """
+    return int(moment.replace(tzinfo=dt.timezone.utc).timestamp())
+
+
+def _entry_name(ticker, interval, start, end):
+    ticker = ticker.replace(os.sep, '_')
+    return (
+        f'{ticker}_{interval}_{start.strftime("%Y%m%dT%H%M%S")}_'
+        f'{end.strftime("%Y%m%dT%H%M%S")}.npz'
+    )
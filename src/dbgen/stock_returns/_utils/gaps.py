@@ -0,0 +1,286 @@
+import numpy as np
+import pandas as pd
+import sqlalchemy as db
+from ..._load import insert_columns
+
+
+GAP_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class GapInjector:
+    """
+    Sets runs of consecutive rows of the "ohlcv" columns to NULL, the way
+    yfinance reports minutes without any trades, before the rows are loaded.
+    For every ticker and every one of the columns open, high, low, close and
+    volume, make_nans gaps are started at random rows and every gap is 1 to
+    max_nans_in_a_row rows long. The columns are independent of each other.
+
+    The data arrives in several batches per ticker, so the gaps of a ticker
+    are spread over its no_batches batches up front and the injector only
+    needs to see one batch at a time. Gaps do not cross batch boundaries.
+
+    Parameters
+    --------------------------------------------------
+    make_nans : int or dict
+        The number of gaps per ticker and column, or a dictionary of the
+        form {ticker: make_nans}. Tickers missing from the dictionary get no
+        gaps.
+
+    max_nans_in_a_row : int or dict
+        The longest gap, or a dictionary of the form
+        {ticker: max_nans_in_a_row}. Defaults to 1 for tickers missing from
+        the dictionary.
+
+    no_batches : int, Default 1
+        The number of batches per ticker that will be passed to apply.
+
+    rng : np.random.Generator, Default None
+        Defaults to np.random.default_rng().
+    """
+
+    def __init__(self, make_nans, max_nans_in_a_row, no_batches=1, rng=None):
+        self.make_nans = make_nans
+        self.max_nans_in_a_row = max_nans_in_a_row
+        self.no_batches = no_batches
+        self.rng = np.random.default_rng() if rng is None else rng
+        self._counts = {}
+        self._batch_no = {}
+
+    def apply(self, columns):
+        """
+        Returns a copy of the column batch of a single ticker, in datetime
+        order, with the gaps of this batch masked out.
+        """
+        ticker = str(columns['ticker'][0]) if len(columns['ticker']) else None
+        if ticker is None:
+            return columns
+
+        if ticker not in self._counts:
+            self._counts[ticker] = self.rng.multinomial(
+                _for_ticker(self.make_nans, ticker, 0),
+                np.full(self.no_batches, 1 / self.no_batches),
+                size=len(GAP_COLUMNS),
+            )
+            self._batch_no[ticker] = 0
+        batch_no = min(self._batch_no[ticker], self.no_batches - 1)
+        self._batch_no[ticker] += 1
+
+        max_len = max(_for_ticker(self.max_nans_in_a_row, ticker, 1), 1)
+        no_rows = len(columns['ticker'])
+        columns = dict(columns)
+        for col, count in zip(GAP_COLUMNS, self._counts[ticker][:, batch_no]):
+            if count == 0 or no_rows == 0:
+                continue
+            rows = gap_rows(no_rows, count, max_len, self.rng)
+            mask = np.ma.getmaskarray(columns[col]).copy()
+            mask[rows] = True
+            columns[col] = np.ma.array(np.ma.getdata(columns[col]), mask=mask)
+        return columns
+
+    def get_state(self):
+        """
+        The state of the injector as json, to continue from with set_state.
+        """
+        return {
+            'rng': self.rng.bit_generator.state,
+            'counts': {
+                ticker: counts.tolist()
+                for ticker, counts in self._counts.items()
+            },
+            'batch_no': dict(self._batch_no),
+        }
+
+    def set_state(self, state):
+        self.rng.bit_generator.state = state['rng']
+        self._counts = {
+            ticker: np.array(counts, dtype=np.int64)
+            for ticker, counts in state['counts'].items()
+        }
+        self._batch_no = dict(state['batch_no'])
+
+
+def gap_rows(no_rows, no_gaps, max_len, rng):
+    """
+    Draws no_gaps gaps of 1 to max_len consecutive rows out of no_rows rows
+    and returns the indices of the rows that fall into a gap.
+    """
+    starts = rng.integers(0, no_rows, size=no_gaps)
+    lengths = rng.integers(1, max_len + 1, size=no_gaps)
+    offsets = np.arange(lengths.sum()) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths
+    )
+    rows = np.repeat(starts, lengths) + offsets
+    return np.unique(rows[rows < no_rows])
+
+
+def inject_gaps_in_table(
+    engine, make_nans, max_nans_in_a_row, rng=None, table='ohlcv'
+):
+    """
+    Injects gaps, see GapInjector, into an existing "ohlcv" table. The keys
+    are read with one query, the gaps are drawn in memory and written to a
+    temporary table keyed on (datetime, ticker), and a single UPDATE joins 
+    the temporary table to set all of the gaps to NULL at once. The join is
+    rendered as UPDATE ... JOIN on MySQL and as UPDATE ... FROM on 
+    PostgreSQL and SQLite (3.33 or later), so every row is matched once.
+
+    Returns
+    --------------------------------------------------
+    no_rows : int
+        The number of rows that got at least one NULL.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    keys = pd.read_sql(
+        f"select datetime, ticker from {table} order by ticker, datetime",
+        engine,
+        parse_dates=['datetime'],
+    )
+    injector = GapInjector(make_nans, max_nans_in_a_row, rng=rng)
+
+    gaps = []
+    for ticker, sub_df in keys.groupby('ticker', sort=False):
+        n = len(sub_df)
+        columns = injector.apply(
+            {
+                'ticker': np.full(n, ticker),
+                **{
+                    col: np.ma.array(np.zeros(n), mask=np.zeros(n, bool))
+                    for col in GAP_COLUMNS
+                },
+            }
+        )
+        flags = {col: np.ma.getmaskarray(columns[col]) for col in GAP_COLUMNS}
+        hit = np.logical_or.reduce(list(flags.values()))
+        gaps.append(
+            {
+                'datetime': sub_df['datetime'].to_numpy().astype(
+                    'datetime64[us]'
+                )[hit],
+                'ticker': np.full(hit.sum(), ticker),
+                **{col: flags[col][hit] for col in GAP_COLUMNS},
+            }
+        )
+    gaps = [g for g in gaps if len(g['ticker'])]
+    if not gaps:
+        return 0
+
+    ohlcv = db.Table(table, db.MetaData(), autoload_with=engine)
+    temp = db.Table(
+        f'{table}_gap_keys',
+        db.MetaData(),
+        db.Column('datetime', ohlcv.c.datetime.type, primary_key=True),
+        db.Column('ticker', ohlcv.c.ticker.type, primary_key=True),
+        *[db.Column(col, db.Boolean()) for col in GAP_COLUMNS],
+        prefixes=['TEMPORARY'],
+    )
+    # a where clause on a second table makes a multi table update, which 
+    # MySQL also needs since it can not reopen a temporary table in a 
+    # subquery of the same statement
+    update = db.update(ohlcv).where(
+        temp.c.datetime == ohlcv.c.datetime, temp.c.ticker == ohlcv.c.ticker
+    ).values(
+        {
+            col: db.case((temp.c[col], db.null()), else_=ohlcv.c[col])
+            for col in GAP_COLUMNS
+        }
+    )
+
+    no_rows = 0
+    with engine.begin() as conn:
+        temp.create(conn)
+        for columns in gaps:
+            no_rows += insert_columns(conn, temp, columns)
+        conn.execute(update)
+        temp.drop(conn)
+    return no_rows
+
+
+def find_gaps(engine, columns=GAP_COLUMNS, table='ohlcv'):
+    """
+    Finds every run of consecutive NULLs of the columns of every ticker of 
+    the "ohlcv" table with one query. The rows are numbered per ticker in 
+    datetime order with the row_number window function on the server and 
+    only the rows with a NULL are read, so a run is a sequence of 
+    consecutive row numbers. The run lengths are then encoded with numpy 
+    for all of the tickers and columns at once.
+
+    Parameters
+    --------------------------------------------------
+    engine : sqlalchemy engine
+
+    columns : list[str], Default GAP_COLUMNS
+        The columns to scan, any of open, high, low, close and volume.
+
+    table : str, Default 'ohlcv'
+        The name of the table.
+
+    Returns
+    --------------------------------------------------
+    gaps : dict
+        A dictionary of the form {column_name: np.array} with the columns
+        ticker, ohlcv, start_datetime, end_datetime and length of the 
+        "ohlcv_gaps" table, one row per run, sorted by ticker, column and 
+        start_datetime.
+    """
+    ohlcv = db.Table(table, db.MetaData(), autoload_with=engine)
+    row_no = db.func.row_number().over(
+        partition_by=ohlcv.c.ticker, order_by=ohlcv.c.datetime
+    )
+    numbered = db.select(
+        ohlcv.c.ticker,
+        ohlcv.c.datetime,
+        row_no.label('row_no'),
+        *[
+            db.case((ohlcv.c[col].is_(None), 1), else_=0).label(col)
+            for col in columns
+        ],
+    ).subquery()
+    query = db.select(numbered).where(
+        db.or_(*[numbered.c[col] == 1 for col in columns])
+    ).order_by(numbered.c.ticker, numbered.c.row_no)
+    df = pd.read_sql(query, engine, parse_dates=['datetime'])
+
+    tickers = df['ticker'].to_numpy().astype(str)
+    datetimes = df['datetime'].to_numpy().astype('datetime64[us]')
+    row_nos = df['row_no'].to_numpy(dtype=np.int64)
+
+    gaps = {
+        'ticker': [], 'ohlcv': [], 'start_datetime': [], 'end_datetime': [],
+        'length': [],
+    }
+    for col in columns:
+        rows = np.flatnonzero(df[col].to_numpy() == 1)
+        if len(rows) == 0:
+            continue
+        # a run breaks where the ticker changes or a row number is skipped
+        breaks = (np.diff(row_nos[rows]) != 1) | (
+            tickers[rows][1:] != tickers[rows][:-1]
+        )
+        starts = rows[np.concatenate(([True], breaks))]
+        ends = rows[np.concatenate((breaks, [True]))]
+        gaps['ticker'].append(tickers[starts])
+        gaps['ohlcv'].append(np.full(len(starts), col))
+        gaps['start_datetime'].append(datetimes[starts])
+        gaps['end_datetime'].append(datetimes[ends])
+        gaps['length'].append(row_nos[ends] - row_nos[starts] + 1)
+
+    if not gaps['ticker']:
+        return {
+            'ticker': np.array([], dtype=str),
+            'ohlcv': np.array([], dtype=str),
+            'start_datetime': np.array([], dtype='datetime64[us]'),
+            'end_datetime': np.array([], dtype='datetime64[us]'),
+            'length': np.array([], dtype=np.int64),
+        }
+
+    gaps = {name: np.concatenate(parts) for name, parts in gaps.items()}
+    order = np.lexsort(
+        (gaps['start_datetime'], gaps['ohlcv'], gaps['ticker'])
+    )
+    return {name: col[order] for name, col in gaps.items()}
+
+
+def _for_ticker(value, ticker, default):
+    if isinstance(value, dict):
+        return value.get(ticker, default)
+    return value
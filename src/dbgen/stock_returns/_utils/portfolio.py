@@ -0,0 +1,220 @@
+import numpy as np
+import sqlalchemy as db
+
+
+PORTFOLIO_ENGINES = ['trigger', 'python']
+
+
+def portfolio_from_transactions(transactions):
+    """
+    Computes the "portfolio" table from the "transaction_history" rows the
+    same way the trigger in _sql/trigger.sql does, but for all of the rows
+    at once and on any database. Like MySQL, the assignments of an update
+    are evaluated from left to right, ie the new cost_basis is computed from
+    the new position and last_price.
+
+    The transactions of every (user_id, ticker, position_type) position are
+    applied in the order of the rows. The positions are updated side by
+    side: the k-th transaction of every position is applied in one
+    vectorized step, so the number of steps is the length of the longest
+    chain, not the number of rows.
+
+    Parameters
+    --------------------------------------------------
+    transactions : dict
+        A dictionary of the form {column_name: np.array} with at least the
+        columns user_id, ticker, position_type, action, no_shares and
+        at_price, in the order they would be inserted.
+
+    Returns
+    --------------------------------------------------
+    portfolio : dict
+        A dictionary of the form {column_name: np.array} with the columns of
+        the "portfolio" table and one row per position. Values that divide
+        by zero are masked, ie NULL, as they would be in MySQL.
+    """
+    user_id = np.asarray(transactions['user_id'], dtype=np.int64)
+    ticker = np.asarray(transactions['ticker']).astype(str)
+    position_type = np.asarray(transactions['position_type'], dtype=np.int64)
+    action = np.asarray(transactions['action'], dtype=float)
+    no_shares = np.asarray(transactions['no_shares'], dtype=float)
+    at_price = np.asarray(transactions['at_price'], dtype=float)
+
+    keys = np.empty(
+        len(user_id),
+        dtype=[('u', np.int64), ('t', ticker.dtype), ('p', np.int64)],
+    )
+    keys['u'], keys['t'], keys['p'] = user_id, ticker, position_type
+    positions, group = np.unique(keys, return_inverse=True)
+    group = group.reshape(-1)
+    no_groups = len(positions)
+
+    order = np.argsort(group, kind='stable')
+    starts = np.searchsorted(group[order], np.arange(no_groups))
+    rank = np.empty(len(group), dtype=np.int64)
+    rank[order] = np.arange(len(group)) - starts[group[order]]
+
+    state = {
+        name: np.full(no_groups, np.nan)
+        for name in [
+            'position', 'last_price', 'cost_basis', 'total_invested',
+            'current_value', 'realized_profit', 'gain'
+        ]
+    }
+    exists = np.zeros(no_groups, dtype=bool)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for k in range(rank.max() + 1 if len(rank) else 0):
+            rows = np.nonzero(rank == k)[0]
+            g = group[rows]
+            long = position_type[rows] > 0
+            short = position_type[rows] < 0
+            buy = action[rows] > 0
+            sell = action[rows] < 0
+            n, p = no_shares[rows], at_price[rows]
+
+            _open_or_add(state, exists, g, n, p, long & buy, 1.0)
+            _reduce(state, exists, g, n, p, long & sell, 1.0)
+            _open_or_add(state, exists, g, n, p, short & sell, -1.0)
+            _reduce(state, exists, g, n, p, short & buy, -1.0)
+
+    portfolio = {
+        'user_id': positions['u'][exists],
+        'ticker': positions['t'][exists],
+        'position_type': positions['p'][exists],
+        'position': np.round(state['position'][exists]).astype(np.int64),
+    }
+    for name in [
+        'last_price', 'cost_basis', 'total_invested', 'current_value',
+        'realized_profit', 'gain'
+    ]:
+        portfolio[name] = np.ma.masked_invalid(state[name][exists])
+    return portfolio
+
+
+def mark_portfolio(conn, portfolio, prices):
+    """
+    Marks the positions of the "portfolio" table to market. For every ticker
+    in prices, last_price is set to its price and current_value and gain are
+    recomputed the way the trigger does, with a single executemany UPDATE.
+    The new values are computed from the old columns only, so the result does
+    not depend on the order in which the server evaluates the assignments.
+
+    Parameters
+    --------------------------------------------------
+    conn : sqlalchemy connection
+
+    portfolio : sqlalchemy.Table
+        The "portfolio" table.
+
+    prices : dict
+        A dictionary of the form {ticker: price}. NaN prices are skipped.
+    """
+    params = [
+        {'mark_ticker': ticker, 'mark_price': float(price)}
+        for ticker, price in prices.items() if not np.isnan(price)
+    ]
+    if not params:
+        return None
+
+    c = portfolio.c
+    current_value = c.position * db.bindparam('mark_price', type_=db.Float())
+    gain = db.case(
+        (
+            c.position_type > 0,
+            100.0 * (current_value + c.realized_profit - c.total_invested)
+            / db.func.nullif(c.total_invested, 0),
+        ),
+        else_=100.0 * (c.realized_profit + current_value)
+        / db.func.nullif(c.realized_profit, 0),
+    )
+    update = db.update(portfolio).where(
+        c.ticker == db.bindparam('mark_ticker')
+    ).values(
+        last_price=db.bindparam('mark_price', type_=db.Float()),
+        current_value=current_value,
+        gain=gain,
+    )
+    conn.execute(update, params)
+    return None
+
+
+def _open_or_add(state, exists, g, n, p, mask, sign):
+    """
+    A buy of a long (sign 1.0) or a sell of a short (sign -1.0) position, ie
+    the INSERT ... ON DUPLICATE KEY UPDATE branches of the trigger.
+    """
+    new = mask & ~exists[g]
+    gi, ni, pi = g[new], n[new], p[new]
+    if sign > 0:
+        state['position'][gi] = ni
+        state['total_invested'][gi] = pi * ni
+        state['current_value'][gi] = pi * ni
+        state['realized_profit'][gi] = 0
+    else:
+        state['position'][gi] = -ni
+        state['total_invested'][gi] = 0
+        state['current_value'][gi] = -pi * ni
+        state['realized_profit'][gi] = pi * ni
+    state['last_price'][gi] = pi
+    state['cost_basis'][gi] = pi
+    state['gain'][gi] = 0
+    exists[gi] = True
+
+    dup = mask & ~new
+    gi, ni, pi = g[dup], n[dup], p[dup]
+    position = state['position'][gi] + sign * ni
+    cost_basis = state['cost_basis'][gi]
+    realized_profit = state['realized_profit'][gi]
+    if sign > 0:
+        cost_basis = ((position - ni) * cost_basis + ni * pi) / position
+        total_invested = state['total_invested'][gi] + ni * pi
+        current_value = position * pi
+        gain = 100.0 * (
+            current_value + realized_profit - total_invested
+        ) / total_invested
+    else:
+        cost_basis = (-1.0 * (position + ni) * cost_basis + ni * pi) / (
+            -1.0 * position
+        )
+        total_invested = np.zeros(len(gi))
+        current_value = position * pi
+        realized_profit = realized_profit + pi * ni
+        gain = 100.0 * (realized_profit + current_value) / realized_profit
+
+    state['position'][gi] = position
+    state['last_price'][gi] = pi
+    state['cost_basis'][gi] = cost_basis
+    state['total_invested'][gi] = total_invested
+    state['current_value'][gi] = current_value
+    state['realized_profit'][gi] = realized_profit
+    state['gain'][gi] = gain
+
+
+def _reduce(state, exists, g, n, p, mask, sign):
+    """
+    A sell of a long (sign 1.0) or a buy of a short (sign -1.0) position, ie
+    the UPDATE branches of the trigger. Positions that do not exist yet are
+    not touched.
+    """
+    upd = mask & exists[g]
+    gi, ni, pi = g[upd], n[upd], p[upd]
+    position = state['position'][gi] - sign * ni
+    total_invested = state['total_invested'][gi]
+    current_value = position * pi
+    if sign > 0:
+        realized_profit = state['realized_profit'][gi] + ni * pi
+        gain = 100.0 * (
+            current_value + realized_profit - total_invested
+        ) / total_invested
+    else:
+        total_invested = np.zeros(len(gi))
+        realized_profit = state['realized_profit'][gi] - pi * ni
+        gain = 100.0 * (realized_profit + current_value) / realized_profit
+
+    state['position'][gi] = position
+    state['last_price'][gi] = pi
+    state['total_invested'][gi] = total_invested
+    state['current_value'][gi] = current_value
+    state['realized_profit'][gi] = realized_profit
+    state['gain'][gi] = gain
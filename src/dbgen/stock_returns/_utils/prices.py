@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+
+class PriceIndex:
+    """
+    Keeps one price column of the "ohlcv" table in memory, as an array of
+    datetimes sorted ascending and an array of prices per ticker. The prices
+    of any number of transactions are then looked up with a single
+    np.searchsorted per ticker instead of one query per transaction.
+
+    Parameters
+    --------------------------------------------------
+    column : str, Default 'open'
+        Either 'open', 'high', 'low' or 'close'.
+
+    Example Usage
+    --------------------------------------------------
+    index = PriceIndex()
+    for columns in batches:
+        index.add(columns)
+
+    index.lookup('SPY', np.array(['2023-09-01T09:30'], dtype='datetime64[us]'))
+    """
+
+    def __init__(self, column='open'):
+        self.column = column
+        self._parts = {}
+        self._index = {}
+
+    @classmethod
+    def from_table(cls, engine, column='open', table='ohlcv'):
+        """
+        Builds the index from an existing table with a single query.
+        """
+        df = pd.read_sql(
+            f"select datetime, ticker, {column} from {table}",
+            engine,
+            parse_dates=['datetime'],
+        )
+        index = cls(column)
+        index.add(
+            {
+                'datetime': df['datetime'].to_numpy().astype('datetime64[us]'),
+                'ticker': df['ticker'].to_numpy().astype(str),
+                column: df[column].to_numpy(dtype=float),
+            }
+        )
+        return index
+
+    def add(self, columns):
+        """
+        Adds a column batch of the "ohlcv" table, ie a dictionary with at
+        least the keys 'datetime', 'ticker' and self.column. Rows of a ticker
+        and datetime that is already in the index replace the old price.
+        """
+        tickers = np.asarray(columns['ticker'])
+        datetimes = np.asarray(columns['datetime']).astype('datetime64[us]')
+        prices = np.ma.filled(
+            np.ma.asarray(columns[self.column], dtype=float), np.nan
+        )
+        for ticker in np.unique(tickers):
+            mask = tickers == ticker
+            self._parts.setdefault(ticker, []).append(
+                (datetimes[mask], prices[mask])
+            )
+            self._index.pop(ticker, None)
+
+    @property
+    def tickers(self):
+        return list(self._parts.keys())
+
+    def datetimes(self, ticker, dropna=True):
+        """
+        The sorted datetimes of ticker. With dropna, only the datetimes that
+        have a price.
+        """
+        datetimes, prices = self._get(ticker)
+        if dropna:
+            return datetimes[~np.isnan(prices)]
+        return datetimes
+
+    def lookup(self, ticker, datetimes):
+        """
+        Returns the prices of ticker at datetimes. The price is NaN where the
+        datetime is not in the index or the price is NULL.
+        """
+        index_datetimes, prices = self._get(ticker)
+        datetimes = np.asarray(datetimes).astype('datetime64[us]')
+        if len(index_datetimes) == 0:
+            return np.full(len(datetimes), np.nan)
+
+        pos = np.searchsorted(index_datetimes, datetimes)
+        pos = np.minimum(pos, len(index_datetimes) - 1)
+        found = index_datetimes[pos] == datetimes
+        return np.where(found, prices[pos], np.nan)
+
+    def _get(self, ticker):
+        if ticker not in self._index:
+            parts = self._parts.get(ticker, [])
+            if not parts:
+                return (
+                    np.array([], dtype='datetime64[us]'), np.array([], float)
+                )
+            datetimes = np.concatenate([p[0] for p in parts])
+            prices = np.concatenate([p[1] for p in parts])
+
+            # sort and keep the last added price of duplicated datetimes
+            order = np.argsort(datetimes, kind='stable')
+            datetimes, prices = datetimes[order], prices[order]
+            keep = np.append(datetimes[1:] != datetimes[:-1], True)
+            self._parts[ticker] = [(datetimes[keep], prices[keep])]
+            self._index[ticker] = self._parts[ticker][0]
+        return self._index[ticker]
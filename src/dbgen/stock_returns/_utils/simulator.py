@@ -0,0 +1,291 @@
+import string
+import numpy as np
+import pandas as pd
+
+
+_MINUTES_PER_YEAR = 365 * 24 * 60
+
+# the sessions of a trading day in minutes since midnight, as in yfinance
+# with prepost=True
+_PRE_MARKET = 4 * 60
+_REGULAR = 9 * 60 + 30
+_POST_MARKET = 16 * 60
+_CLOSE = 20 * 60
+
+
+class MarketSimulator:
+    """
+    A source of simulated stock data that can be used in place of yfinance,
+    ie Create(engine, source=MarketSimulator(seed=0)). It needs no network
+    and is neither limited to the last 30 days of 1 minute data nor to the
+    tickers that yfinance knows of.
+
+    The prices follow a geometric brownian motion with normally distributed
+    jumps. The bars cover the pre-market, regular and post-market sessions,
+    4:00 to 20:00 on weekdays. The price moves between the close of one day
+    and the first bar of the next day, so days and weekends open with a gap.
+    The volatility and volume of the regular session follow a U-shaped
+    profile and the pre and post-market sessions trade a fraction of the
+    regular volume.
+
+    Like the yfinance downloads, the data is yielded in batches of 5 days
+    and one ticker. Every batch is generated for a block of tickers at once
+    with numpy and the generator of every batch and block is seeded from
+    seed, so the same arguments always give the same data.
+
+    Parameters
+    --------------------------------------------------
+    seed : int, Default None
+        The seed of the simulation.
+
+    mu : float, Default 0.05
+        The annual drift.
+
+    sigma : float, Default 0.3
+        The annual volatility.
+
+    jump_intensity : float, Default 2.0
+        The expected number of jumps per ticker and year.
+
+    jump_mean, jump_std : float, Default 0.0, 0.05
+        The mean and standard deviation of the log size of a jump.
+
+    price_range : tuple, Default (20.0, 500.0)
+        The first prices are drawn uniformly from this range.
+
+    volume : float, Default 100000.0
+        The median volume of a regular session minute.
+
+    extended_activity : float, Default 0.05
+        The volume and the variance of the pre and post-market sessions
+        relative to the regular session.
+
+    block_size : int, Default 256
+        The number of tickers that are simulated at once. Bounds the memory
+        of a batch.
+
+    Example Usage
+    --------------------------------------------------
+    import datetime as dt
+    from dbgen.stock_returns import Create, MarketSimulator, simulated_tickers
+
+    database = Create(engine=engine, source=MarketSimulator(seed=0))
+    database.initialize(
+        tickers=simulated_tickers(1000),
+        start=dt.datetime(2020, 1, 1),
+        end=dt.datetime(2023, 1, 1),
+        portfolio_engine='python',
+    )
+    """
+
+    def __init__(
+        self,
+        seed=None,
+        mu=0.05,
+        sigma=0.3,
+        jump_intensity=2.0,
+        jump_mean=0.0,
+        jump_std=0.05,
+        price_range=(20.0, 500.0),
+        volume=100000.0,
+        extended_activity=0.05,
+        block_size=256,
+    ):
+        self.seed = np.random.SeedSequence(seed).entropy
+        self.mu = mu
+        self.sigma = sigma
+        self.jump_intensity = jump_intensity
+        self.jump_mean = jump_mean
+        self.jump_std = jump_std
+        self.price_range = price_range
+        self.volume = volume
+        self.extended_activity = extended_activity
+        self.block_size = block_size
+
+    def batches(self, tickers, start, end, time_step='1m'):
+        """
+        Yields the simulated "ohlcv" rows from start to end in batches of 5
+        days and one ticker, as dictionaries of the form
+        {column_name: np.array}. timestamp is the datetime in seconds since
+        the epoch.
+
+        Parameters
+        --------------------------------------------------
+        tickers : list[str]
+
+        start, end : datetime.datetime
+
+        time_step : str, Default '1m'
+            The time between two bars, ie '1m', '5m', '1h' or '1d'. Daily
+            bars have no sessions.
+        """
+        # the intervals of yfinance, ie '5m' and '1d', are '5min' and '1D'
+        step = pd.Timedelta(time_step.replace('m', 'min').replace('d', 'D'))
+        tickers = np.asarray(tickers, dtype=str)
+        blocks = [
+            slice(i, i + self.block_size)
+            for i in range(0, len(tickers), self.block_size)
+        ]
+        rng = np.random.default_rng([self.seed, 0])
+        last = {
+            block.start: (
+                np.full(len(tickers[block]), np.datetime64('NaT', 'us')),
+                rng.uniform(*self.price_range, size=len(tickers[block])),
+                np.exp(rng.normal(0.0, 0.5, size=len(tickers[block]))),
+            )
+            for block in blocks
+        }
+
+        batch_time = pd.Timedelta(days=5)
+        batch_no = 0
+        while batch_no * batch_time < end - start:
+            batch_no += 1
+            times = _bar_times(
+                start + batch_time * (batch_no - 1),
+                min(start + batch_time * batch_no, end),
+                step,
+            )
+            for block in blocks:
+                rng = np.random.default_rng(
+                    [self.seed, batch_no, block.start]
+                )
+                columns, last[block.start] = self._simulate(
+                    times, last[block.start], step, rng
+                )
+                for i, ticker in enumerate(tickers[block]):
+                    yield {
+                        'datetime': times,
+                        'ticker': np.full(len(times), ticker),
+                        **{
+                            name: np.ma.masked_invalid(col[:, i])
+                            for name, col in columns.items()
+                        },
+                        'timestamp': times.astype('datetime64[s]').astype(
+                            np.int64
+                        ),
+                    }
+
+    def _simulate(self, times, last, step, rng):
+        """
+        Simulates the bars at times of a block of tickers. last holds the
+        time and close of the previous bar and the volume scale of every
+        ticker.
+        """
+        last_time, last_close, volume_scale = last
+        no_bars, no_tickers = len(times), len(last_close)
+        if no_bars == 0:
+            empty = np.empty((0, no_tickers))
+            columns = {
+                name: empty for name in ['open', 'high', 'low', 'close']
+            }
+            columns['volume'] = empty
+            return columns, last
+
+        # the time in years of the bars and of the gaps before them
+        step_minutes = step / pd.Timedelta(minutes=1)
+        previous = np.concatenate((last_time[:1], times[:-1]))
+        elapsed = (times - previous) / np.timedelta64(1, 'm')
+        elapsed = np.where(np.isnan(elapsed), step_minutes, elapsed)
+        gap = np.maximum(elapsed - step_minutes, 0.0)[:, None]
+        bar = np.full((no_bars, 1), step_minutes)
+        gap, bar = gap / _MINUTES_PER_YEAR, bar / _MINUTES_PER_YEAR
+
+        profile = _intraday_profile(
+            times, step, self.extended_activity
+        )[:, None]
+        gap_return = self._log_returns(gap, 1.0, (no_bars, no_tickers), rng)
+        bar_return = self._log_returns(
+            bar, np.sqrt(profile), (no_bars, no_tickers), rng
+        )
+
+        log_close = np.log(last_close) + np.cumsum(
+            gap_return + bar_return, axis=0
+        )
+        close = np.exp(log_close)
+        open_ = np.exp(log_close - bar_return)
+
+        wick = np.abs(rng.normal(
+            0.0,
+            0.5 * self.sigma * np.sqrt(bar * profile),
+            size=(2, no_bars, no_tickers)
+        ))
+        high = np.maximum(open_, close) * np.exp(wick[0])
+        low = np.minimum(open_, close) * np.exp(-wick[1])
+
+        volume = np.round(
+            self.volume
+            * volume_scale
+            * profile
+            * min(step_minutes, _POST_MARKET - _REGULAR)
+            * rng.lognormal(0.0, 0.5, size=(no_bars, no_tickers))
+        )
+
+        columns = {
+            'open': open_, 'high': high, 'low': low, 'close': close,
+            'volume': volume,
+        }
+        last = (np.full(no_tickers, times[-1]), close[-1], volume_scale)
+        return columns, last
+
+    def _log_returns(self, years, scale, size, rng):
+        """
+        The log returns of the jump diffusion over intervals of years.
+        """
+        drift = (self.mu - 0.5 * self.sigma ** 2) * years
+        diffusion = self.sigma * scale * np.sqrt(years) * rng.standard_normal(
+            size
+        )
+        no_jumps = rng.poisson(self.jump_intensity * years, size=size)
+        jumps = (
+            self.jump_mean * no_jumps
+            + self.jump_std * np.sqrt(no_jumps) * rng.standard_normal(size)
+        )
+        return drift + diffusion + jumps
+
+
+def simulated_tickers(no_tickers):
+    """
+    Returns no_tickers distinct ticker names of 1 to 5 letters, ie 'A', 'B',
+    ..., 'Z', 'AA', 'AB', ...
+    """
+    letters = np.array(list(string.ascii_uppercase))
+    tickers = []
+    for i in range(no_tickers):
+        name = ''
+        i += 1
+        while i > 0:
+            i, rest = divmod(i - 1, 26)
+            name = letters[rest] + name
+        tickers.append(name)
+    return tickers
+
+
+def _bar_times(start, end, step):
+    """
+    The times of the bars from start, inclusive, to end, exclusive, on
+    weekdays and within the sessions.
+    """
+    times = pd.date_range(
+        pd.Timestamp(start).ceil(step), end, freq=step, inclusive='left'
+    )
+    times = times[times.dayofweek < 5]
+    if step < pd.Timedelta(days=1):
+        minutes = times.hour * 60 + times.minute
+        times = times[(minutes >= _PRE_MARKET) & (minutes < _CLOSE)]
+    return times.to_numpy().astype('datetime64[us]')
+
+
+def _intraday_profile(times, step, extended):
+    """
+    The relative activity of the bars at times. U-shaped during the regular
+    session, 1 at its open and close and 1/3 at noon, and extended during
+    the pre and post-market sessions. Daily bars have a profile of 1.
+    """
+    if step >= pd.Timedelta(days=1):
+        return np.ones(len(times))
+    index = pd.DatetimeIndex(times)
+    minutes = np.asarray(index.hour * 60 + index.minute, dtype=float)
+    x = (minutes - _REGULAR) / (_POST_MARKET - _REGULAR)
+    regular = (x >= 0) & (x < 1)
+    profile = np.where(regular, 1 / 3 + 8 / 3 * (x - 0.5) ** 2, extended)
+    return profile
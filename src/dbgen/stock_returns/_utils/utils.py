@@ -1,5 +1,6 @@
 import numpy as np
 import pandas as pd
+import sqlalchemy as db
 
 
 def convert_sql_to_string(filepath):
@@ -155,6 +156,122 @@ def transaction_chain(
     return trans_history
 
 
+def transaction_chains(
+    trans_type,
+    no_investors,
+    dates,
+    no_investments,
+    rng=None,
+    ):
+    """
+    The vectorized version of transaction_chain. It produces one chain of at
+    most no_investments transactions for every investor and every ticker at 
+    once. Every chain opens with a transaction of size 20 to 499 in the 
+    direction of trans_type, followed by random buys and sells of size 1 to 
+    the opening size. The running position is a cumulative sum over the 
+    chain and a chain ends at the first transaction that closes the position.
+    That transaction is clipped so that no more shares are sold than held, 
+    or returned than borrowed.
+
+    Parameters
+    --------------------------------------------------
+    trans_type: float
+        1.0 for long and -1.0 for short positions.
+
+    no_investors: int
+        The investors get the ids 1, ..., no_investors.
+
+    dates: dict
+        A dictionary of the form {ticker: np.array} with the datetimes that
+        the ticker can be traded at. The transactions of a chain are made at
+        distinct dates in increasing order.
+
+    no_investments: int
+        The largest number of transactions in a chain. With 0 there are no
+        transactions.
+
+    rng: np.random.Generator, Default None
+        Defaults to np.random.default_rng().
+
+    Returns
+    --------------------------------------------------
+    transactions: dict
+        A dictionary of the form {column_name: np.array} with the columns
+        user_id, datetime, ticker, position_type, action and no_shares. The
+        chains are ordered by investor and then by ticker, and the 
+        transactions of a chain by datetime.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    tickers = list(dates.keys())
+    no_chains = no_investors * len(tickers)
+    k = no_investments
+
+    if no_chains == 0 or k <= 0:
+        return {
+            'user_id': np.array([], dtype=np.int64),
+            'datetime': np.array([], dtype='datetime64[us]'),
+            'ticker': np.asarray(tickers, dtype=str)[:0],
+            'position_type': np.array([], dtype=np.int64),
+            'action': np.array([], dtype=np.int64),
+            'no_shares': np.array([], dtype=float),
+        }
+
+    user_id = np.repeat(np.arange(1, no_investors + 1), len(tickers))
+    ticker_ind = np.tile(np.arange(len(tickers)), no_investors)
+    no_dates = np.array([len(dates[t]) for t in tickers])[ticker_ind]
+    if no_chains > 0 and no_dates.min() < k:
+        raise Exception(
+            f"Every ticker needs at least {k} dates for {k} investments."
+        )
+
+    # k distinct sorted date indices per chain
+    date_inds = np.sort(
+        (rng.random((no_chains, k)) * (no_dates - k + 1)[:, None]).astype(
+            np.int64
+        ),
+        axis=1,
+    ) + np.arange(k)
+
+    first_size = rng.integers(20, 500, size=no_chains)
+    actions = np.hstack(
+        (
+            np.full((no_chains, 1), trans_type),
+            np.where(rng.random((no_chains, k - 1)) < .5, 1.0, -1.0),
+        )
+    )
+    sizes = np.hstack(
+        (
+            first_size[:, None],
+            rng.integers(1, first_size[:, None], size=(no_chains, k - 1)),
+        )
+    )
+
+    # the position in shares of trans_type after every transaction
+    position = np.cumsum(np.where(actions == trans_type, sizes, -sizes), axis=1)
+    closed = position <= 0
+    stop = np.where(closed.any(axis=1), closed.argmax(axis=1), k - 1)
+    rows = np.arange(no_chains)
+    sizes[rows, stop] += np.minimum(position[rows, stop], 0)
+    keep = np.arange(k) <= stop[:, None]
+
+    chain_dates = np.empty((no_chains, k), dtype='datetime64[us]')
+    for i, ticker in enumerate(tickers):
+        mask = ticker_ind == i
+        chain_dates[mask] = np.asarray(dates[ticker]).astype(
+            'datetime64[us]'
+        )[date_inds[mask]]
+
+    no_trans = keep.sum(axis=1)
+    return {
+        'user_id': np.repeat(user_id, no_trans),
+        'datetime': chain_dates[keep],
+        'ticker': np.asarray(tickers)[np.repeat(ticker_ind, no_trans)],
+        'position_type': np.full(keep.sum(), int(trans_type)),
+        'action': actions[keep].astype(np.int64),
+        'no_shares': sizes[keep].astype(float),
+    }
+
+
 def longest_chain_of_nans(engine, ticker, ohlcv='open', table='ohlcv'):
     """
     During pre and post market when liquidity is low, if there is a period 
@@ -182,18 +299,21 @@ def longest_chain_of_nans(engine, ticker, ohlcv='open', table='ohlcv'):
 
     nan_loc: np.array
         The index locations of the start and end of the longest chain of NaNs.
+        The end is exclusive. Empty if there are no NaNs. See find_gaps for 
+        all of the chains of all of the tickers at once.
 
     """
 
-    query = f"select {ohlcv} from {table} where ticker = '{ticker}'"
-    df = pd.read_sql(query, engine)
-    inds = np.isnan(df.values)
-    df.iloc[inds] = np.repeat(999999, len(df.iloc[np.isnan(df.values)]))
-    nan_in_a_row = df.values.reshape(-1)
-    nan_in_a_row = np.where(
-        np.diff(np.hstack(([False], nan_in_a_row==999999, [False])))
-    )[0].reshape((-1, 2))
+    query = db.text(
+        f"select {ohlcv} from {table} where ticker = :ticker order by datetime"
+    )
+    df = pd.read_sql(query, engine, params={'ticker': ticker})
+    is_nan = np.isnan(df[ohlcv].to_numpy(dtype=float))
+    nan_in_a_row = np.flatnonzero(
+        np.diff(np.hstack(([False], is_nan, [False])).astype(np.int8))
+    ).reshape((-1, 2))
+    if len(nan_in_a_row) == 0:
+        return nan_in_a_row.reshape(-1)
     nan_loc = nan_in_a_row[np.argmax(np.diff(nan_in_a_row, axis=1))]
 
     return nan_loc
-
@@ -1,19 +1,52 @@
+from collections import deque
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 from importlib import resources
+import asyncio
 from types import NoneType
 import sqlalchemy as db
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.orm import declarative_base as Base
-from sqlalchemy.orm import sessionmaker
 from sqlalchemy_utils import create_database, database_exists, drop_database
 import numpy as np
 import datetime as dt
 import yfinance as yf
 import pandas as pd
-from ._utils import convert_sql_to_string, transaction_chain
-from ._tables import OHLCV, TransactionHistory, Portfolio
+from ._utils import (
+    convert_sql_to_string, transaction_chains, PriceIndex, GapInjector,
+    inject_gaps_in_table, PORTFOLIO_ENGINES, portfolio_from_transactions,
+    mark_portfolio, DownloadCache, GAP_COLUMNS, find_gaps
+)
+from ._utils.cache import _utc
+from ._tables import OHLCV, TransactionHistory, Portfolio, OHLCVGaps
+from .._load import (
+    Sink, DatabaseSink, AsyncDatabaseSink, convert_columns, rebatch, 
+    insert_columns
+)
+from .._stats import Stats, batch_size
+from .._checkpoint import Checkpoint, as_checkpoint, completed_prefix
 
 
 _base = Base()
 
+# naive datetimes are in UTC, the defaults are picked in the local time of 
+# the machine
+_start = _utc(
+    dt.datetime.now().astimezone().replace(
+        hour=4-3, minute=0, second=0, microsecond=0
+    ) - dt.timedelta(days=29)
+)
+
+_end = _utc(
+    dt.datetime.now().astimezone().replace(
+        hour=20-3, minute=0, second=0, microsecond=0
+    )
+)
+
+
+def _print_progress(batch_no, no_batches):
+    print(f'batch {batch_no} / {no_batches}')
+
 
 class Create:
     """
@@ -36,12 +69,33 @@ class Create:
     Parameters
     --------------------------------------------------
     engine : sqlalchemy engine
-        The engine connecting sqlalchemy to the database.
+        The engine connecting sqlalchemy to the database. An AsyncEngine 
+        can only be used with initialize_async.
     base : sqlalchemy.orm.declarative_base, default _base = declarative_base()
         A default is set to a declarative_base().
     OHLCV : default OHLCV(base)
     TransactionHistory : default TransactionHistory(base)
     Portfolio : default Portfolio(base)
+    OHLCVGaps : default OHLCVGaps(base)
+        Only created by find_gaps with persist=True.
+    indexes : str or dict, Default None
+        Passed to the table factories, either the name of a profile or a 
+        profile of the form {table_name: [columns, ...]}. 'analytics' 
+        indexes ohlcv on (ticker, datetime) and transaction_history on 
+        (user_id, ticker, position_type). See INDEX_PROFILES in 
+        _constants.py.
+    cache : DownloadCache or str, Default None
+        Serves the yfinance downloads from, and stores them in, an on-disk 
+        cache. A str is the directory of a DownloadCache.
+    source : MarketSimulator, Default None
+        Where the stock data comes from. Defaults to yfinance. Any object 
+        with a batches(tickers, start, end, time_step) method that yields 
+        the rows in batches of 5 days and one ticker, like 
+        MarketSimulator.batches, can be used.
+    progress : callable, Default _print_progress
+        Called as progress(batch_no, no_batches) whenever the data of a 
+        window of 5 days is loaded. The default prints the batch number. 
+        None reports nothing.
 
     Methods 
     --------------------------------------------------
@@ -49,6 +103,24 @@ class Create:
         Initializes the database and data and populates with stock data 
         scraped from yfinance as well as some fake transaction data.
 
+    initialize_async
+        The same for an async engine, loading the tables concurrently.
+
+    refresh
+        Appends the stock data that is missing since the last refresh to an
+        existing "ohlcv" table and marks the portfolio to market.
+
+    inject_gaps
+        Sets random gaps of an existing "ohlcv" table to NULL.
+
+    find_gaps
+        Finds the runs of NULLs of every ticker and column of the "ohlcv" 
+        table.
+
+    iter_batches
+        Yields the stock data of the "ohlcv" table in batches without a 
+        database.
+
     Example Usage
     --------------------------------------------------
     import sqlalchemy as db
@@ -91,33 +163,50 @@ class Create:
         base=_base,
         OHLCV=OHLCV,
         TransactionHistory=TransactionHistory,
-        Portfolio=Portfolio
+        Portfolio=Portfolio,
+        OHLCVGaps=OHLCVGaps,
+        indexes=None,
+        cache=None,
+        source=None,
+        progress=_print_progress,
     ):
         self.engine = engine
         self.base = base
-        self.OHLCV = OHLCV(base)
-        self.TransactionHistory = TransactionHistory(base)
-        self.Portfolio = Portfolio(base)
+        if isinstance(cache, str):
+            cache = DownloadCache(cache)
+        self.cache = cache
+        self.source = source
+        self.progress = progress
+        kwargs = {} if indexes is None else {'indexes': indexes}
+        self.OHLCV = OHLCV(base, **kwargs)
+        self.TransactionHistory = TransactionHistory(base, **kwargs)
+        self.Portfolio = Portfolio(base, **kwargs)
+        self.OHLCVGaps = OHLCVGaps(base, **kwargs)
         self._initialized = False
 
     def initialize(
         self,
         with_entries: bool = True,
         no_investors: int = 5,
+        no_longs: int = 3,
+        no_shorts: int = 2,
         tickers: list[str] = ['SPY', 'NVDA', 'AMZN'],
-        start: dt.datetime = dt.datetime.now().replace(
-            hour=4-3, minute=0, second=0, microsecond=0
-        ) - dt.timedelta(days=29),
-        end: dt.datetime = dt.datetime.now().replace(
-            hour=20-3, minute=0, second=0, microsecond=0
-        ),
+        start: dt.datetime = _start,
+        end: dt.datetime = _end,
         time_step: str = '1m',
         with_trigger: bool = True,
         trigger_path: str | NoneType = None,
         with_investments: bool = True,
-        make_nans: int = 20,
-        max_nans_in_a_row: int = 5,
+        make_nans: int | dict = 20,
+        max_nans_in_a_row: int | dict = 5,
         drop_db_if_exists: bool = True,
+        sink: Sink | NoneType = None,
+        load_method: str = 'insert',
+        defer_constraints: bool = False,
+        numpy_seed: int | NoneType = None,
+        portfolio_engine: str = 'trigger',
+        checkpoint: str | Checkpoint | NoneType = None,
+        stats: Stats | NoneType = None,
     ):
         """
         This function will initialize the database, create the tables and then
@@ -133,6 +222,15 @@ class Create:
             The number of investors for which transaction and portfolio data 
             is generated for.
 
+        no_longs : int, Default 3
+            The largest number of transactions of the long position of an 
+            investor in a ticker. The position is closed early if all of the
+            shares are sold.
+
+        no_shorts : int, Default 2
+            The largest number of transactions of the short position of an 
+            investor in a ticker.
+
         tickers : list, Default ['SPY', 'AMZN', 'NVDA']
             list of tickers
 
@@ -145,7 +243,9 @@ class Create:
                     hour=4-3, minute=0, second=0, microsecond=0
                 ),
             End time for the stock prices. This also assumes the user is in a 
-            PST timezone.
+            PST timezone. Both defaults are converted to UTC, naive datetimes
+            are taken to be in UTC and timezone aware ones are converted to 
+            UTC.
 
         time_step : str, Default '1m'
             Time step for the stock data. yfinance has limitations on this.
@@ -161,19 +261,80 @@ class Create:
         with_investments : boolean, Default True
             Will generate investments and auto update the porfolio.
 
-        make_nans : int, Default 20
-            This will randomly select make_nans many dates for the open, high,
-            low, close and volume columns to set to None.
+        make_nans : int or dict, Default 20
+            For every ticker, this will randomly select make_nans many dates 
+            for each of the open, high, low, close and volume columns to set 
+            to None. A dictionary of the form {ticker: make_nans} sets the 
+            number per ticker. The gaps are injected before the rows are 
+            loaded and the transactions are only made at dates with an open 
+            price.
 
-        max_nans_in_a_row : int, Default 5
+        max_nans_in_a_row : int or dict, Default 5
             This will randomly select a number 1 to max_nans_in_a_row for each 
             date from the randomly selected date from make_nans and then set 
-            that many timestamps in a row to None.
+            that many timestamps in a row to None. May also be a dictionary 
+            of the form {ticker: max_nans_in_a_row}.
 
         drop_db_if_exists : boolean, Default True
             Will drop the database and recreate it if already exists.
 
+        sink : dbgen.sinks.Sink, Default None
+            If given, the tables are written to this sink, ie a ParquetSink,
+            CSVSink or SQLiteSink, instead of the database of the engine. 
+            The database is not created or dropped and no trigger is set. 
+            The "portfolio" table is computed in python, see 
+            portfolio_engine.
+
+        load_method : str, Default 'insert'
+            How the "ohlcv" rows are loaded into the database. With 'native'
+            they are loaded with LOAD DATA LOCAL INFILE on MySQL (pymysql, 
+            the engine needs connect_args={'local_infile': True}) and with 
+            COPY on PostgreSQL (psycopg). Other dialects fall back to the 
+            batched inserts of 'insert'.
+
+        defer_constraints : boolean, Default False
+            The "ohlcv" table is created without its primary key and 
+            indexes, the data is loaded and the key and indexes are built 
+            afterwards, so the load does not pay for any index maintenance.
+            Syncing, journaling and unique checks are also relaxed for the 
+            duration of the load.
+
+        numpy_seed : int, Default None
+            The seed of the numpy.random.SeedSequence that the gaps of 
+            make_nans and the transactions are drawn from.
+
+        portfolio_engine : str, Default 'trigger'
+            * 'trigger' sets the trigger before the transactions are 
+                inserted and lets it fill the "portfolio" table row by row.
+                Requires the MySQL trigger, or a trigger_path for another 
+                server.
+            * 'python' computes the "portfolio" table from the transactions
+                with portfolio_from_transactions, which follows the 
+                semantics of the trigger, and loads it in one pass. The 
+                trigger, if with_trigger, is only set afterwards so that it
+                does not fire during the load. Works on any database.
+
+        checkpoint : str or dbgen.checkpoint.Checkpoint, Default None
+            The path of a checkpoint manifest. Requires a database and a 
+            numpy_seed. Every 5 day window of the "ohlcv" table is committed
+            on its own and recorded in the manifest with the state of the 
+            gaps, and so are the investments. If the manifest is of a run 
+            with the same parameters, the database is not dropped, the 
+            windows that are done are not downloaded again and the tables 
+            end up the same as those of an uninterrupted run. A source is 
+            regenerated from start, but only the remaining windows are 
+            written.
+
+        stats : dbgen.stats.Stats, Default None
+            Records the time, rows and bytes of every stage of the run, ie 
+            "schema", "trigger", "generate.ohlcv", "gaps", "load.ohlcv", 
+            "generate.transaction_history" and "generate.portfolio". Pass
+            Stats(profile=True) or Stats(trace_memory=True) to also profile
+            the run or trace its memory. Defaults to Stats().
+
         returns:
+            The summary of stats, see Stats.summary.
+
             The function will create a database with name specified in the 
             engine which is inputed by the user. It will populate the database
             with three tabled named "ohlcv", "transaction_history", and 
@@ -182,207 +343,1030 @@ class Create:
             automatically.
         """
 
+        if stats is None:
+            stats = Stats()
+
+        with stats.run():
+            self._initialize(
+                with_entries,
+                no_investors,
+                no_longs,
+                no_shorts,
+                tickers,
+                start,
+                end,
+                time_step,
+                with_trigger,
+                trigger_path,
+                with_investments,
+                make_nans,
+                max_nans_in_a_row,
+                drop_db_if_exists,
+                sink,
+                load_method,
+                defer_constraints,
+                numpy_seed,
+                portfolio_engine,
+                checkpoint,
+                stats,
+            )
+
+        return stats.summary()
+
+    def _initialize(
+        self,
+        with_entries,
+        no_investors,
+        no_longs,
+        no_shorts,
+        tickers,
+        start,
+        end,
+        time_step,
+        with_trigger,
+        trigger_path,
+        with_investments,
+        make_nans,
+        max_nans_in_a_row,
+        drop_db_if_exists,
+        sink,
+        load_method,
+        defer_constraints,
+        numpy_seed,
+        portfolio_engine,
+        checkpoint,
+        stats,
+    ):
         if self._initialized:
           raise Exception("Database already initialized.")
+
+        if portfolio_engine not in PORTFOLIO_ENGINES:
+            raise Exception(
+                f"portfolio_engine must be one of {PORTFOLIO_ENGINES}, "
+                f"not {portfolio_engine}."
+            )
+
+        gaps_ss, trans_ss = np.random.SeedSequence(numpy_seed).spawn(2)
+        gaps = GapInjector(
+            make_nans, 
+            max_nans_in_a_row,
+            _no_batches(start, end),
+            np.random.default_rng(gaps_ss),
+        )
+        investment_tables = [
+            self.TransactionHistory.__table__, self.Portfolio.__table__
+        ]
+
+        checkpoint = as_checkpoint(checkpoint)
+        resumed = False
+        if checkpoint is not None:
+            if sink is not None or defer_constraints:
+                raise Exception(
+                    "checkpoint requires a database and can not be combined "
+                    "with defer_constraints."
+                )
+            if numpy_seed is None:
+                raise Exception("checkpoint requires a numpy_seed.")
+            resumed = checkpoint.start(
+                {
+                    'tickers': list(tickers),
+                    'start': start.isoformat(),
+                    'end': end.isoformat(),
+                    'time_step': time_step,
+                    'make_nans': make_nans,
+                    'max_nans_in_a_row': max_nans_in_a_row,
+                    'numpy_seed': numpy_seed,
+                    'with_investments': with_investments,
+                    'no_investors': no_investors,
+                    'no_longs': no_longs,
+                    'no_shorts': no_shorts,
+                    'portfolio_engine': portfolio_engine,
+                }
+            )
+            if resumed:
+                drop_db_if_exists = False
+
+        if sink is not None:
+            self._initialized = True
+            if not with_entries:
+                return None
+            tables = [self.OHLCV.__table__]
+            if with_investments:
+                tables += investment_tables
+            with sink.open(tables, stats=stats):
+                prices = self._write_ohlcv(
+                    sink, gaps, tickers, start, end, time_step, stats
+                )
+                if with_investments:
+                    self._write_investments(
+                        sink,
+                        prices,
+                        tickers,
+                        no_investors,
+                        no_longs,
+                        no_shorts,
+                        np.random.default_rng(trans_ss),
+                        with_portfolio=True,
+                        stats=stats,
+                    )
+            return None
         
-        if drop_db_if_exists:
-            if database_exists(self.engine.url):
-                drop_database(self.engine.url) 
+        defer = defer_constraints and with_entries
+        ohlcv_table = self.OHLCV.__table__
+        with stats.stage('schema'):
+            if drop_db_if_exists:
+                if database_exists(self.engine.url):
+                    drop_database(self.engine.url) 
 
-        if not database_exists(self.engine.url):
-            create_database(self.engine.url) 
+            if not database_exists(self.engine.url):
+                create_database(self.engine.url) 
 
-        self.base.metadata.create_all(bind=self.engine)
+            self.base.metadata.create_all(
+                bind=self.engine,
+                tables=[
+                    table for table in self.base.metadata.sorted_tables
+                    if not (defer and table is ohlcv_table)
+                    and table is not self.OHLCVGaps.__table__
+                ],
+            )
         
-        if with_trigger:
-            if trigger_path is None:
-                with resources.open_text(
-                    'dbgen.stock_returns._sql', 'trigger.sql'
-                ) as file:
-                    sql_content = file.read()
+        # the trigger fills the portfolio while the transactions are 
+        # inserted, unless the portfolio is computed in python 
+        trigger_first = portfolio_engine == 'trigger' or not with_entries
+        if with_trigger and trigger_first:
+            self._checkpointed_trigger(trigger_path, checkpoint, stats)
+
+        self._initialized = True
         
-                with self.engine.connect() as conn:
-                    conn.execute(db.text(sql_content))
-            else:
-                with self.engine.connect() as conn:
-                    conn.execute(
-                        db.text(
-                            convert_sql_to_string(trigger_path)
-                        )
+        if not with_entries:
+            return None
+
+        # the windows of a run that died are skipped, the gaps continue from
+        # the state after the last of them
+        skip, prices = 0, None
+        if checkpoint is not None:
+            skip = completed_prefix(checkpoint.completed('ohlcv'))
+        if resumed:
+            windows = _batch_windows(start, end)
+            if skip < len(windows):
+                self._discard_from(windows[skip][0])
+            if skip:
+                gaps.set_state(checkpoint.state('ohlcv', skip - 1))
+            prices = PriceIndex.from_table(
+                self.engine, 'open', ohlcv_table.name
+            )
+
+        # push to the sql server and keep the open prices for the investments
+        ohlcv_sink = DatabaseSink(
+            self.engine, method=load_method, defer_constraints=defer
+        )
+
+        def on_window(window_no):
+            ohlcv_sink.flush()
+            checkpoint.done('ohlcv', window_no, gaps.get_state())
+
+        with ohlcv_sink.open([ohlcv_table], stats=stats):
+            prices = self._write_ohlcv(
+                ohlcv_sink, 
+                gaps, 
+                tickers, 
+                start, 
+                end, 
+                time_step, 
+                stats,
+                prices=prices,
+                skip=skip,
+                on_window=None if checkpoint is None else on_window,
+            )
+
+        invested = (
+            checkpoint is not None 
+            and checkpoint.completed('transaction_history')
+        )
+        if resumed and with_investments and not invested:
+            with self.engine.begin() as conn:
+                for table in investment_tables:
+                    conn.execute(table.delete())
+
+        if with_investments and not invested:
+            investment_sink = DatabaseSink(self.engine, method=load_method)
+            with investment_sink.open(investment_tables, stats=stats):
+                self._write_investments(
+                    investment_sink,
+                    prices,
+                    tickers,
+                    no_investors,
+                    no_longs,
+                    no_shorts,
+                    np.random.default_rng(trans_ss),
+                    with_portfolio=portfolio_engine == 'python',
+                    stats=stats,
+                )
+            if checkpoint is not None:
+                checkpoint.done('transaction_history', 0)
+
+        if with_trigger and not trigger_first:
+            self._checkpointed_trigger(trigger_path, checkpoint, stats)
+
+        return None
+
+    async def initialize_async(
+        self,
+        with_entries: bool = True,
+        no_investors: int = 5,
+        no_longs: int = 3,
+        no_shorts: int = 2,
+        tickers: list[str] = ['SPY', 'NVDA', 'AMZN'],
+        start: dt.datetime = _start,
+        end: dt.datetime = _end,
+        time_step: str = '1m',
+        with_trigger: bool = True,
+        trigger_path: str | NoneType = None,
+        with_investments: bool = True,
+        make_nans: int | dict = 20,
+        max_nans_in_a_row: int | dict = 5,
+        drop_db_if_exists: bool = True,
+        numpy_seed: int | NoneType = None,
+        portfolio_engine: str = 'trigger',
+        max_connections: int = 4,
+        stats: Stats | NoneType = None,
+    ):
+        """
+        The asyncio counterpart of initialize for an engine of 
+        create_async_engine, ie with aiosqlite, asyncmy or asyncpg. The 
+        stock data is downloaded, or generated by the source, in a worker 
+        thread and loaded with an AsyncDatabaseSink while the next batches 
+        are fetched. The investments are generated in a worker thread as 
+        well, and with portfolio_engine='python' the "transaction_history" 
+        and "portfolio" tables are loaded concurrently, over up to 
+        max_connections connections. Every batch is committed on its own. 
+        The data is the same as that of initialize with the same numpy_seed.
+
+        The database must exist. drop_db_if_exists drops and recreates the
+        tables instead, since an async driver can not create a database.
+
+        Parameters
+        --------------------------------------------------
+        max_connections : int, Default 4
+            The largest number of batches that are inserted at once. SQLite 
+            only has one writer, so it always loads over one connection.
+
+        The remaining parameters are the same as those of initialize.
+
+        Example Usage
+        --------------------------------------------------
+        import asyncio
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        engine = create_async_engine("mysql+asyncmy://...")
+        database = Create(engine=engine)
+        summary = asyncio.run(database.initialize_async(numpy_seed=0))
+        """
+        if stats is None:
+            stats = Stats()
+
+        with stats.run():
+            await self._initialize_async(
+                with_entries,
+                no_investors,
+                no_longs,
+                no_shorts,
+                tickers,
+                start,
+                end,
+                time_step,
+                with_trigger,
+                trigger_path,
+                with_investments,
+                make_nans,
+                max_nans_in_a_row,
+                drop_db_if_exists,
+                numpy_seed,
+                portfolio_engine,
+                max_connections,
+                stats,
+            )
+
+        return stats.summary()
+
+    async def _initialize_async(
+        self,
+        with_entries,
+        no_investors,
+        no_longs,
+        no_shorts,
+        tickers,
+        start,
+        end,
+        time_step,
+        with_trigger,
+        trigger_path,
+        with_investments,
+        make_nans,
+        max_nans_in_a_row,
+        drop_db_if_exists,
+        numpy_seed,
+        portfolio_engine,
+        max_connections,
+        stats,
+    ):
+        if not isinstance(self.engine, AsyncEngine):
+            raise Exception(
+                "initialize_async requires an AsyncEngine, ie of "
+                "sqlalchemy.ext.asyncio.create_async_engine."
+            )
+
+        if self._initialized:
+          raise Exception("Database already initialized.")
+
+        if portfolio_engine not in PORTFOLIO_ENGINES:
+            raise Exception(
+                f"portfolio_engine must be one of {PORTFOLIO_ENGINES}, "
+                f"not {portfolio_engine}."
+            )
+
+        gaps_ss, trans_ss = np.random.SeedSequence(numpy_seed).spawn(2)
+        gaps = GapInjector(
+            make_nans, 
+            max_nans_in_a_row,
+            _no_batches(start, end),
+            np.random.default_rng(gaps_ss),
+        )
+
+        with stats.stage('schema'):
+            tables = [
+                table for table in self.base.metadata.sorted_tables
+                if table is not self.OHLCVGaps.__table__
+            ]
+            async with self.engine.begin() as conn:
+                if drop_db_if_exists:
+                    await conn.run_sync(
+                        self.base.metadata.drop_all, tables=tables
                     )
-                    conn.commit()
+                await conn.run_sync(
+                    self.base.metadata.create_all, tables=tables
+                )
+
+        trigger_first = portfolio_engine == 'trigger' or not with_entries
+        if with_trigger and trigger_first:
+            await self._create_trigger_async(trigger_path, stats)
 
         self._initialized = True
-        
+
         if not with_entries:
             return None
-        
-        # batch the time for yfinance stock scraping
-        elapsed_time = (end - start).total_seconds()
-        batch_time = 60 * 60 * 24 * 5
-        
-        batch_no = 0
-        while batch_no * batch_time < elapsed_time:
-            batch_no += 1
-            print(
-                f'batch {batch_no} / {elapsed_time // batch_time + 1}'
+
+        prices = PriceIndex('open')
+        batches = self._gapped_batches(
+            gaps, prices, tickers, start, end, time_step, stats
+        )
+        ohlcv_sink = AsyncDatabaseSink(
+            self.engine, max_connections=max_connections
+        )
+        async with ohlcv_sink.open([self.OHLCV.__table__], stats=stats):
+            await ohlcv_sink.write_from(
+                {self.OHLCV.__tablename__: columns} for columns in batches
             )
-            df = yf.download(
-                tickers=tickers,
-                start=start + dt.timedelta(seconds = batch_time * (batch_no - 1)),
-                end=min(
-                    start + dt.timedelta(seconds = batch_time * batch_no), 
-                    end
-                ),
-                interval=time_step,
-                prepost=True
+
+        if with_investments:
+            investments = await asyncio.to_thread(
+                self._investment_batches,
+                prices,
+                tickers,
+                no_investors,
+                no_longs,
+                no_shorts,
+                np.random.default_rng(trans_ss),
+                portfolio_engine == 'python',
+                stats,
+            )
+            investment_sink = AsyncDatabaseSink(
+                self.engine, max_connections=max_connections
             )
+            tables = [
+                self.TransactionHistory.__table__, self.Portfolio.__table__
+            ]
+            async with investment_sink.open(tables, stats=stats):
+                await investment_sink.write_from([investments])
+
+        if with_trigger and not trigger_first:
+            await self._create_trigger_async(trigger_path, stats)
+
+        return None
+
+    async def _create_trigger_async(self, trigger_path, stats):
+        with stats.stage('trigger'):
+            sql = await asyncio.to_thread(self._trigger_sql, trigger_path)
+            async with self.engine.begin() as conn:
+                await conn.execute(db.text(sql))
+
+    def _checkpointed_trigger(self, trigger_path, checkpoint, stats):
+        """
+        Creates the trigger, unless the checkpoint records that it exists.
+        """
+        if checkpoint is not None and checkpoint.completed('trigger'):
+            return None
+        with stats.stage('trigger'):
+            self._create_trigger(trigger_path)
+        if checkpoint is not None:
+            checkpoint.done('trigger', 0)
+
+    def _discard_from(self, datetime):
+        """
+        Deletes the "ohlcv" rows from datetime on, ie the rows of a window
+        that was committed by a run that died before the window was 
+        recorded in its checkpoint.
+        """
+        table = self.OHLCV.__table__
+        with self.engine.begin() as conn:
+            conn.execute(table.delete().where(table.c.datetime >= datetime))
+
+    def _create_trigger(self, trigger_path):
+        with self.engine.connect() as conn:
+            conn.execute(db.text(self._trigger_sql(trigger_path)))
+            conn.commit()
+
+    def _trigger_sql(self, trigger_path):
+        if trigger_path is None:
+            with resources.open_text(
+                'dbgen.stock_returns._sql', 'trigger.sql'
+            ) as file:
+                return file.read()
+        return convert_sql_to_string(trigger_path)
+
+    def _ohlcv_batches(self, tickers, start, end, time_step, skip=0):
+        """
+        Yields the stock data of the source, or of yfinance, in batches of 5
+        days and one ticker as dictionaries of the form 
+        {column_name: np.array}, without the first skip windows. progress is
+        called after the batches of all of the tickers of a window are 
+        consumed.
+        """
+        if self.source is not None:
+            # the data of a source depends on the windows before it
+            batches = itertools.islice(
+                self.source.batches(tickers, start, end, time_step),
+                skip * len(tickers),
+                None,
+            )
+        else:
+            batches = (
+                _frame_to_columns(sub_df) for sub_df in _download_ohlcv(
+                    tickers, start, end, time_step, self.cache, skip=skip
+                )
+            )
+
+        no_batches = _no_batches(start, end)
+        for batch_no, columns in enumerate(batches, skip * len(tickers) + 1):
+            yield columns
+            if self.progress is not None and batch_no % len(tickers) == 0:
+                self.progress(batch_no // len(tickers), no_batches)
 
-            if len(tickers) == 1:
-                col = pd.MultiIndex.from_product([df.columns.values, tickers])
-                df = df.set_axis(col, axis=1)
+    def _write_ohlcv(
+        self, 
+        sink, 
+        gaps, 
+        tickers, 
+        start, 
+        end, 
+        time_step, 
+        stats, 
+        prices=None, 
+        skip=0, 
+        on_window=None,
+    ):
+        """
+        Downloads the stock data, injects the gaps and writes it to the open
+        sink. Returns a PriceIndex of the open prices, added to prices if 
+        given. The first skip windows are skipped and on_window(window_no) 
+        is called after the batches of every window are written.
+        """
+        prices = PriceIndex('open') if prices is None else prices
+        batches = self._gapped_batches(
+            gaps, prices, tickers, start, end, time_step, stats, skip
+        )
+        for batch_no, columns in enumerate(batches, skip * len(tickers) + 1):
+            sink.write(self.OHLCV.__tablename__, columns)
+            if on_window is not None and batch_no % len(tickers) == 0:
+                on_window(batch_no // len(tickers) - 1)
+        return prices
+
+    def _gapped_batches(
+        self, gaps, prices, tickers, start, end, time_step, stats, skip=0
+    ):
+        """
+        Yields the batches of _ohlcv_batches with the gaps injected and adds
+        their open prices to prices.
+        """
+        for columns in stats.iterate(
+            self._ohlcv_batches(tickers, start, end, time_step, skip),
+            'generate.ohlcv',
+        ):
+            with stats.stage('gaps'):
+                columns = gaps.apply(columns)
+            prices.add(columns)
+            yield columns
+
+    def _write_investments(
+        self,
+        sink,
+        prices,
+        tickers,
+        no_investors,
+        no_longs,
+        no_shorts,
+        rng,
+        with_portfolio,
+        stats,
+    ):
+        """
+        Writes the tables of _investment_batches to the open sink.
+        """
+        batches = self._investment_batches(
+            prices, 
+            tickers, 
+            no_investors, 
+            no_longs, 
+            no_shorts, 
+            rng, 
+            with_portfolio, 
+            stats,
+        )
+        for name, columns in batches.items():
+            sink.write(name, columns)
+        return batches[self.TransactionHistory.__tablename__]
+
+    def _investment_batches(
+        self,
+        prices,
+        tickers,
+        no_investors,
+        no_longs,
+        no_shorts,
+        rng,
+        with_portfolio,
+        stats,
+    ):
+        """
+        Generates the long and the short position chains of every investor 
+        and ticker with transaction_chains and prices them with one lookup 
+        per ticker, as the batch of the "transaction_history" table. The 
+        trans_ids are assigned in the order of the rows. With with_portfolio
+        the "portfolio" table is computed with portfolio_from_transactions 
+        as well. Returns a dictionary of the form {table_name: columns}.
 
-            # remove the GMT time part that yfinaces gives
-            df.index = df.index.to_series().apply(
-                lambda x: str(x)[: -6]
-            ).reset_index(drop=True)
-            
-            # rename the multicolumn
-            df.columns.names = ['ohlcv', 'ticker']
+        The chains are drawn for the tickers of prices in the order of 
+        tickers, not in the order prices was built in, so a run that resumes
+        with a PriceIndex.from_table makes the same transactions.
+        """
+        with stats.stage('generate.transaction_history') as record:
+            available = set(prices.tickers)
+            tickers = [t for t in tickers if t in available]
+            dates = {t: prices.datetimes(t) for t in tickers}
+            longs = transaction_chains(
+                1.0, no_investors, dates, no_longs, rng
+            )
+            shorts = transaction_chains(
+                -1.0, no_investors, dates, no_shorts, rng
+            )
+            trans = {
+                name: np.concatenate((longs[name], shorts[name])) 
+                for name in longs
+            }
 
+            at_price = np.full(len(trans['ticker']), np.nan)
             for ticker in tickers:
+                mask = trans['ticker'] == ticker
+                at_price[mask] = prices.lookup(
+                    ticker, trans['datetime'][mask]
+                )
 
-                query = f"ticker == '{ticker}' "
-                query += "and ohlcv in ['Open', 'High', 'Low', 'Close', 'Volume']"
-                sub_df = df.T.query(
-                    query
-                ).T.reset_index()
-                
-                for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
-                    sub_df[col] = sub_df[col].astype(float).interpolate()
-                
-                sub_df['timestamp'] = [
-                    dt.datetime.strptime(
-                        npdt, '%Y-%m-%d %H:%M:%S'
-                    ).timestamp() for npdt in sub_df['Datetime'].values
-                ]
-
-                sub_df.insert(1, 'ticker', np.repeat(ticker, len(sub_df)))
-                
-                # add a columns with just the ticker repeated
-                sub_df.columns = [
-                    x.lower() 
-                    for x in sub_df.columns.get_level_values('ohlcv').values
-                ]
-                cols = [
-                    'datetime', 'ticker', 'open',
-                    'high', 'low', 'close', 'volume', 'timestamp'
-                ]
-                
-                # push to the sql server
-                sub_df[cols].to_sql(
-                    'ohlcv', self.engine, if_exists='append', index=False)
+            columns = {
+                'user_id': trans['user_id'],
+                'trans_id': np.arange(1, len(at_price) + 1),
+                'datetime': trans['datetime'],
+                'ticker': trans['ticker'],
+                'position_type': trans['position_type'],
+                'action': trans['action'],
+                'no_shares': trans['no_shares'],
+                'at_price': at_price,
+            }
+            record['rows'], record['bytes'] = batch_size(columns)
+        batches = {self.TransactionHistory.__tablename__: columns}
+        if with_portfolio:
+            with stats.stage('generate.portfolio') as record:
+                portfolio = portfolio_from_transactions(columns)
+                record['rows'], record['bytes'] = batch_size(portfolio)
+            batches[self.Portfolio.__tablename__] = portfolio
+        return batches
 
-        if with_investments:
+    def inject_gaps(
+        self,
+        make_nans: int | dict = 20,
+        max_nans_in_a_row: int | dict = 5,
+        numpy_seed: int | NoneType = None,
+    ):
+        """
+        Sets gaps of the open, high, low, close and volume columns of an 
+        already populated "ohlcv" table to NULL with a single UPDATE. See 
+        make_nans and max_nans_in_a_row of initialize, which injects the 
+        gaps before loading the rows instead.
 
-            query = f"select datetime from ohlcv"
-            dates = pd.read_sql(
-                query, self.engine
-            )['datetime'].values.astype(str)
-
-            session  = sessionmaker(bind=self.engine)()
-            
-            dates_used = np.array([])
-            for user_id in range(1, no_investors + 1):
-                
-                # num_longs = np.random.choice(np.arange(5))
-                num_longs = 3
-                long_invs = {
-                    t: transaction_chain(1.0, num_longs, dates) for t in tickers
-                }
+        Returns
+        --------------------------------------------------
+        no_rows : int
+            The number of rows that got at least one NULL.
+        """
+        return inject_gaps_in_table(
+            self.engine,
+            make_nans,
+            max_nans_in_a_row,
+            np.random.default_rng(numpy_seed),
+            self.OHLCV.__tablename__,
+        )
 
+    def refresh(
+        self,
+        tickers: list[str] | NoneType = None,
+        start: dt.datetime = _start,
+        end: dt.datetime | NoneType = None,
+        time_step: str = '1m',
+        make_nans: int | dict = 0,
+        max_nans_in_a_row: int | dict = 5,
+        with_marks: bool = True,
+        load_method: str = 'insert',
+        numpy_seed: int | NoneType = None,
+    ):
+        """
+        Brings an existing "ohlcv" table up to date. The last datetime of 
+        every ticker is read with one query and only the interval after it 
+        is downloaded, so the cost of a refresh is proportional to the new
+        data and not to the whole history. Rows at or before the last 
+        datetime of their ticker are dropped before loading, so only new 
+        keys are inserted. Afterwards the "portfolio" table is marked to 
+        market at the latest open price of every ticker, see mark_portfolio.
 
-                for ticker in long_invs.keys():
-                    for trans in long_invs[ticker]:
-                        datetime, action, no_shares = trans
-                        dates_used = np.append(dates_used, datetime)
-                        l = datetime[:10]
-                        r = datetime[11: -10]
-                        query = f"select open from ohlcv "
-                        query += f"where datetime = '{l + ' ' + r}' "
-                        query += f"and ticker = '{ticker}'"
-                        at_price = pd.read_sql(
-                            query, self.engine
-                        )['open'].values[0]
-
-                        transaction = self.TransactionHistory(
-                            user_id,
-                            datetime, 
-                            ticker, 
-                            1,
-                            action, 
-                            no_shares,
-                            at_price
-                        )
-                        session.add(transaction)
+        Parameters
+        --------------------------------------------------
+        tickers : list[str], Default None
+            The tickers to refresh. Defaults to the tickers already in the
+            "ohlcv" table.
 
+        start : datetime.datetime, Default _start
+            Where the download of tickers that are not in the table yet 
+            starts.
 
-            for user_id in range(1, no_investors + 1):
+        end : datetime.datetime, Default None
+            Where the downloads end. Defaults to now, in UTC like every naive
+            datetime.
 
-                # num_shorts = np.random.choice(np.arange(5))
-                num_shorts = 2
-                short_invs = {
-                    t: transaction_chain(-1.0, num_shorts, dates) for t in tickers
-                }
+        make_nans : int or dict, Default 0
+            The gaps injected into the new rows of every ticker, see 
+            initialize.
 
-                for ticker in short_invs.keys():
-                    for trans in short_invs[ticker]:
-                        datetime, action, no_shares = trans 
-                        dates_used = np.append(dates_used, datetime)
-                        l = datetime[:10]
-                        r = datetime[11: -10]
-                        query = f"select open from ohlcv "
-                        query += f"where datetime = '{l + ' ' + r}' "
-                        query += f"and ticker = '{ticker}'"
-                        open = pd.read_sql(
-                            query, self.engine
-                        )['open'].values[0]
-
-                        transaction = self.TransactionHistory(
-                            user_id, 
-                            datetime, 
-                            ticker, 
-                            -1, 
-                            action, 
-                            no_shares, 
-                            open
+        with_marks : boolean, Default True
+            Marks the "portfolio" table to market if it exists.
+
+        The remaining parameters are the same as those of initialize.
+
+        Returns
+        --------------------------------------------------
+        no_rows : dict
+            A dictionary of the form {ticker: number of new rows}.
+        """
+        start, end = _utc(start), _utc_now() if end is None else _utc(end)
+        last = _last_datetimes(self.engine, self.OHLCV.__tablename__)
+        tickers = list(last) if tickers is None else tickers
+
+        # tickers that were refreshed together share their last datetime, 
+        # so they are downloaded together
+        windows = {}
+        for ticker in tickers:
+            if ticker in last:
+                window_start = last[ticker] + dt.timedelta(minutes=1)
+            else:
+                window_start = start
+            if window_start < end:
+                windows.setdefault(window_start, []).append(ticker)
+
+        rng = np.random.default_rng(numpy_seed)
+        no_rows = {ticker: 0 for ticker in tickers}
+        prices = PriceIndex('open')
+        sink = DatabaseSink(self.engine, method=load_method)
+        with sink.open([self.OHLCV.__table__]):
+            for window_start, window_tickers in windows.items():
+                gaps = GapInjector(
+                    make_nans, 
+                    max_nans_in_a_row, 
+                    _no_batches(window_start, end), 
+                    rng
+                )
+                for columns in self._ohlcv_batches(
+                    window_tickers, window_start, end, time_step
+                ):
+                    if len(columns['ticker']) == 0:
+                        continue
+                    ticker = str(columns['ticker'][0])
+                    if ticker in last:
+                        keep = columns['timestamp'] > int(
+                            last[ticker].replace(
+                                tzinfo=dt.timezone.utc
+                            ).timestamp()
                         )
-                        session.add(transaction)
-
-            if make_nans > 0:
-                dates_not_used = np.setdiff1d(dates, dates_used)
-                for col in ['open', 'high', 'low', 'close', 'volume']:
-                    rm_dates = np.random.choice(dates_not_used, make_nans)
-                    for date in rm_dates:
-                        l = date[:10]
-                        r = date[11: -10]
-                        date = l + ' ' + r
-                        in_a_row = np.random.randint(1, max_nans_in_a_row)
-                        for i in range(in_a_row):
-                            d = dt.datetime.strptime(
-                                date, '%Y-%m-%d %H:%M:%S'
-                            ) + dt.timedelta(seconds=60 * i)
-                            d = dt.datetime.strftime(d, '%Y-%m-%d %H:%M:%S')
-                            with self.engine.connect() as conn:
-                                query = f"update ohlcv "
-                                query += f"set {col} = NULL "
-                                query += f"where datetime = '{d}'"
-                                conn.execute(
-                                    db.text(query)
-                                )
-                                conn.commit()
-
-            session.commit()
-            session.close()
+                        columns = {
+                            name: col[keep] for name, col in columns.items()
+                        }
+                    if len(columns['ticker']) == 0:
+                        continue
+                    columns = gaps.apply(columns)
+                    prices.add(columns)
+                    no_rows[ticker] += len(columns['ticker'])
+                    sink.write(self.OHLCV.__tablename__, columns)
 
-        return None
+        portfolio = self.Portfolio.__table__
+        if with_marks and db.inspect(self.engine).has_table(portfolio.name):
+            marks = {}
+            for ticker in prices.tickers:
+                datetimes = prices.datetimes(ticker)
+                if len(datetimes):
+                    marks[ticker] = prices.lookup(ticker, datetimes[-1:])[0]
+            with self.engine.begin() as conn:
+                mark_portfolio(conn, portfolio, marks)
+
+        return no_rows
+
+    def find_gaps(
+        self,
+        columns: list[str] = GAP_COLUMNS,
+        persist: bool = False,
+    ):
+        """
+        Finds every run of consecutive NULLs of the columns of every ticker 
+        of the "ohlcv" table with a single query, see find_gaps in 
+        _utils/gaps.py.
+
+        Parameters
+        --------------------------------------------------
+        columns : list[str], Default GAP_COLUMNS
+            Any of open, high, low, close and volume.
+
+        persist : boolean, Default False
+            Also writes the runs to the "ohlcv_gaps" table, which is created
+            if it does not exist and replaced if it does.
+
+        Returns
+        --------------------------------------------------
+        gaps : dict
+            A dictionary of the form {column_name: np.array} with the 
+            columns ticker, ohlcv, start_datetime, end_datetime and length.
+            The longest run is at gaps['length'].argmax().
+        """
+        gaps = find_gaps(self.engine, columns, self.OHLCV.__tablename__)
+        if persist:
+            table = self.OHLCVGaps.__table__
+            with self.engine.begin() as conn:
+                table.create(conn, checkfirst=True)
+                conn.execute(table.delete())
+                insert_columns(conn, table, gaps)
+        return gaps
+
+    def iter_batches(
+        self,
+        table: str,
+        batch_size: int = 10000,
+        format: str = 'columns',
+        tickers: list[str] = ['SPY', 'NVDA', 'AMZN'],
+        start: dt.datetime = _start,
+        end: dt.datetime = _end,
+        time_step: str = '1m',
+    ):
+        """
+        This function downloads the stock data of the "ohlcv" table and yields
+        it in batches of batch_size rows without writing it to a database. 
+        At most one download batch is held in memory at once.
+
+        "transaction_history" and "portfolio" are derived from the data in 
+        the database and can not be generated this way.
+
+        Parameters
+        --------------------------------------------------
+        table : str
+            Must be "ohlcv".
+
+        batch_size : int, Default 10000
+            The number of rows per batch.
+
+        format : str, Default 'columns'
+            * 'columns' yields dictionaries of the form 
+                {column_name: np.array}. 
+            * 'numpy' yields numpy structured arrays, wrapped in a 
+                numpy.ma.MaskedArray.
+            * 'arrow' yields pyarrow.RecordBatch objects. Requires pyarrow.
+
+        The remaining parameters are the same as those of initialize.
+        """
+        if table != 'ohlcv':
+            raise Exception(
+                "Only the 'ohlcv' table can be generated without a database."
+            )
+
+        for columns in rebatch(
+            self._ohlcv_batches(tickers, start, end, time_step), batch_size
+        ):
+            yield convert_columns(columns, format)
+
+
+def _frame_to_columns(sub_df):
+    """
+    Turns a dataframe yielded by _download_ohlcv into a dictionary of numpy
+    arrays with datetime64 datetimes and integer timestamps. Missing prices
+    and volumes are masked.
+    """
+    return {
+        'datetime': pd.to_datetime(sub_df['datetime']).to_numpy().astype(
+            'datetime64[us]'
+        ),
+        'ticker': sub_df['ticker'].to_numpy().astype(str),
+        'open': np.ma.masked_invalid(sub_df['open'].to_numpy(dtype=float)),
+        'high': np.ma.masked_invalid(sub_df['high'].to_numpy(dtype=float)),
+        'low': np.ma.masked_invalid(sub_df['low'].to_numpy(dtype=float)),
+        'close': np.ma.masked_invalid(sub_df['close'].to_numpy(dtype=float)),
+        'volume': np.ma.masked_invalid(
+            sub_df['volume'].to_numpy(dtype=float)
+        ),
+        'timestamp': sub_df['timestamp'].to_numpy().astype(np.int64),
+    }
+
+
+def _last_datetimes(engine, table):
+    """
+    The last datetime of every ticker of the table as a dictionary of the 
+    form {ticker: datetime.datetime}, in UTC. The datetime column is in the
+    timezone of the exchange, so they are taken from the timestamps.
+    """
+    df = pd.read_sql(
+        f"select ticker, max(timestamp) as timestamp from {table} "
+        "group by ticker",
+        engine,
+    )
+    return {
+        ticker: dt.datetime.fromtimestamp(
+            int(last), dt.timezone.utc
+        ).replace(tzinfo=None)
+        for ticker, last in zip(df['ticker'], df['timestamp'])
+        if not pd.isna(last)
+    }
+
+
+def _utc_now():
+    """
+    Now as a naive datetime in UTC.
+    """
+    return dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+
+
+def _no_batches(start, end):
+    """
+    The number of batches _download_ohlcv downloads per ticker.
+    """
+    return max(len(_batch_windows(start, end)), 1)
+
+
+def _download_ohlcv(
+    tickers, start, end, time_step, cache=None, prefetch=2, skip=0
+):
+    """
+    Downloads the stock data from yfinance in batches of 5 days and yields 
+    one dataframe per batch and ticker with the columns of the "ohlcv" table.
+    With a DownloadCache, the batches of the tickers that are cached are not
+    downloaded and the downloaded batches are stored in the cache.
+
+    The downloads run in a background thread, up to prefetch batches ahead 
+    of the batch that is reshaped, so the network waits overlap with the 
+    reshaping here and with the loading of the sink the batches are written 
+    to. yf.download is not thread safe, so there is one download at a time, 
+    but it already downloads the tickers of a batch concurrently. The first
+    skip batches are not downloaded. Naive datetimes are in UTC and the 
+    cache is flushed once the downloads are done.
+    """
+    windows = _batch_windows(_utc(start), _utc(end))[skip:]
+    executor = ThreadPoolExecutor(max_workers=1)
+    futures = deque()
+    try:
+        for window in windows:
+            futures.append(
+                executor.submit(_fetch_batch, tickers, *window, time_step, cache)
+            )
+            if len(futures) > prefetch:
+                yield from _reshape_fetched(futures.popleft().result(), cache)
+        while futures:
+            yield from _reshape_fetched(futures.popleft().result(), cache)
+    finally:
+        executor.shutdown(cancel_futures=True)
+        if cache is not None:
+            cache.flush()
+
+
+def _batch_windows(start, end):
+    """
+    The (start, end) windows of the batches of 5 days from start to end.
+    """
+    batch_time = dt.timedelta(days=5)
+    windows = []
+    batch_no = 0
+    while batch_no * batch_time < end - start:
+        batch_no += 1
+        windows.append(
+            (
+                start + batch_time * (batch_no - 1), 
+                min(start + batch_time * batch_no, end),
+            )
+        )
+    return windows
+
+
+def _fetch_batch(tickers, start, end, time_step, cache):
+    """
+    The network part of a batch. Returns the cached dataframes, the raw 
+    yf.download dataframe of the tickers that are not cached and the batch.
+    """
+    frames = {}
+    if cache is not None:
+        for ticker in tickers:
+            df = cache.get(ticker, time_step, start, end)
+            if df is not None:
+                frames[ticker] = df
+
+    missing = [ticker for ticker in tickers if ticker not in frames]
+    if missing and cache is not None and cache.offline:
+        raise Exception(
+            f"{missing} from {start} to {end} are not cached."
+        )
+
+    df = None
+    if missing:
+        # yfinance takes naive datetimes to be in the timezone of the exchange
+        df = yf.download(
+            tickers=missing,
+            start=start.replace(tzinfo=dt.timezone.utc),
+            end=end.replace(tzinfo=dt.timezone.utc),
+            interval=time_step,
+            prepost=True
+        )
+    return frames, df, (tickers, missing, start, end, time_step)
+
+
+def _reshape_fetched(fetched, cache):
+    """
+    Reshapes a batch returned by _fetch_batch, stores the downloaded part in
+    the cache and yields one dataframe per ticker.
+    """
+    frames, df, (tickers, missing, start, end, time_step) = fetched
+    if df is not None:
+        for ticker, sub_df in _reshape_batch(df, missing):
+            frames[ticker] = sub_df
+            # the window is only complete once it is in the past
+            if cache is not None and end < _utc_now():
+                cache.put(ticker, time_step, start, end, sub_df)
+
+    for ticker in tickers:
+        yield frames[ticker]
+
+
+def _reshape_batch(df, tickers):
+    """
+    Reshapes the dataframe of one yf.download of tickers and yields 
+    (ticker, dataframe) per ticker. The columns of all of the tickers are 
+    converted at once and every ticker is then a cross section of the 
+    (ohlcv, ticker) columns.
+    """
+    fields = ['Open', 'High', 'Low', 'Close', 'Volume']
+    if df.columns.nlevels == 1:
+        df = df.set_axis(
+            pd.MultiIndex.from_product([df.columns.values, tickers]), axis=1
+        )
+    df.columns.names = ['ohlcv', 'ticker']
+    prices = df[fields].astype(float).interpolate()
+
+    # yfinance gives the datetimes in the timezone of the exchange
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        datetimes = index.tz_localize(None)
+        timestamps = index.tz_convert('UTC').tz_localize(None)
+    else:
+        datetimes = timestamps = index
+    datetimes = datetimes.to_numpy().astype('datetime64[us]')
+    timestamps = timestamps.to_numpy().astype('datetime64[s]').astype(np.int64)
+
+    for ticker in tickers:
+        sub_df = prices.xs(ticker, axis=1, level='ticker')
+        yield ticker, pd.DataFrame(
+            {
+                'datetime': datetimes,
+                'ticker': np.full(len(datetimes), ticker, dtype=object),
+                **{
+                    col.lower(): sub_df[col].to_numpy() for col in fields
+                },
+                'timestamp': timestamps,
+            }
+        )
@@ -0,0 +1,58 @@
+import asyncio
+import pandas as pd
+import pytest
+import sqlalchemy as db
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.parents_and_children import Create
+
+
+TABLES = ['mailing', 'employment', 'finances', 'children']
+
+KWARGS = dict(no_parents=250, no_children=300, chunk_size=100, numpy_seed=6)
+
+
+def _tables(path):
+    engine = db.create_engine(f"sqlite:///{path}")
+    return {
+        table: pd.read_sql(f"select * from {table} order by 1", engine)
+        for table in TABLES
+    }
+
+
+async def _initialize_async(path, **kwargs):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        return await Create(engine=engine, base=Base()).initialize_async(
+            **{**KWARGS, **kwargs}
+        )
+    finally:
+        await engine.dispose()
+
+
+def test_async_gives_the_tables_of_bulk(tmp_path):
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+    Create(engine=engine, base=Base()).initialize(bulk=True, **KWARGS)
+    expected = _tables(tmp_path / 'sync.db')
+
+    summary = asyncio.run(
+        _initialize_async(tmp_path / 'async.db', max_connections=2)
+    )
+    got = _tables(tmp_path / 'async.db')
+    for table in TABLES:
+        pd.testing.assert_frame_equal(got[table], expected[table])
+    assert summary['stages']['load.children']['rows'] == 300
+
+
+def test_async_drops_and_recreates_the_tables(tmp_path):
+    path = tmp_path / 'async.db'
+    asyncio.run(_initialize_async(path))
+    asyncio.run(_initialize_async(path, no_children=50))
+    assert len(_tables(path)['children']) == 50
+
+
+def test_async_requires_an_async_engine(tmp_path):
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+    with pytest.raises(Exception, match='AsyncEngine'):
+        asyncio.run(Create(engine=engine, base=Base()).initialize_async())
@@ -0,0 +1,206 @@
+import itertools
+import tracemalloc
+import numpy as np
+
+from dbgen.parents_and_children._constants import JOBS, SALARY_AVG
+from dbgen.parents_and_children._utils import (
+    ChildAssigner, FakePool, assign_children, generate_batches
+)
+from dbgen.parents_and_children._utils.families import _FAMILY_P, _SortedRuns
+
+
+POOL = FakePool(faker_seed=0, pool_size=100)
+
+
+def _children(no_parents, no_children, chunk_size, **kwargs):
+    return list(
+        generate_batches(
+            no_parents,
+            no_children,
+            JOBS,
+            [SALARY_AVG[j] for j in JOBS],
+            POOL,
+            chunk_size=chunk_size,
+            tables=['children'],
+            **kwargs,
+        )
+    )
+
+
+def _batches(workers, **kwargs):
+    return list(
+        generate_batches(
+            300,
+            400,
+            JOBS,
+            [SALARY_AVG[j] for j in JOBS],
+            POOL,
+            workers=workers,
+            **{'numpy_seed': 1, 'chunk_size': 100, **kwargs},
+        )
+    )
+
+
+def _assert_batches_equal(a, b):
+    assert len(a) == len(b)
+    for x, y in zip(a, b):
+        assert x.keys() == y.keys()
+        for table in x:
+            for name, col in x[table].items():
+                other = y[table][name]
+                assert np.array_equal(
+                    np.ma.getmaskarray(col), np.ma.getmaskarray(other)
+                )
+                assert np.array_equal(
+                    np.ma.getdata(col), np.ma.getdata(other)
+                )
+
+
+def _families(parent1_id, parent2_id):
+    # the (parent1_id, parent2_id) of every run of siblings
+    pairs = zip(
+        parent1_id.tolist(),
+        np.ma.filled(parent2_id.astype(float), np.nan).tolist(),
+    )
+    return [pair for pair, _ in itertools.groupby(pairs)]
+
+
+def test_assign_children_pairs_every_couple_once():
+    children = assign_children(200, 1000, np.random.default_rng(0))
+    assert all(len(col) == 1000 for col in children.values())
+    parent1_id, parent2_id = children['parent1_id'], children['parent2_id']
+    assert parent1_id.min() >= 1 and parent1_id.max() < 200
+    assert np.all(parent1_id != np.ma.filled(parent2_id, 0))
+
+    families = _families(parent1_id, parent2_id)
+    keys = {frozenset(pair) for pair in families}
+    assert len(keys) == len(families)
+
+
+def test_assign_children_draws_the_family_sizes_and_flags():
+    children = assign_children(5000, 20000, np.random.default_rng(1))
+    runs = [
+        len(list(run)) for _, run in itertools.groupby(
+            zip(
+                children['parent1_id'].tolist(),
+                np.ma.filled(children['parent2_id'], 0).tolist(),
+            )
+        )
+    ]
+    # the sizes of the families with at least one child, but the last one
+    sizes = np.bincount(runs[:-1], minlength=6)[1:]
+    assert len(sizes) == 5
+    expected = _FAMILY_P[1:] / _FAMILY_P[1:].sum()
+    assert np.allclose(sizes / sizes.sum(), expected, atol=0.02)
+
+    for col in ['same_residence', 'is_student', 'is_employed']:
+        assert set(np.unique(children[col]).tolist()) <= {0, 1}
+    assert not np.ma.is_masked(children['parent1_id'])
+
+
+def test_assign_children_is_reproducible():
+    a = assign_children(100, 300, np.random.default_rng(2))
+    b = assign_children(100, 300, np.random.default_rng(2))
+    for col in a:
+        assert np.array_equal(
+            np.ma.filled(a[col], -1), np.ma.filled(b[col], -1)
+        )
+
+
+def test_sharded_assignment_pairs_every_couple_once_across_shards():
+    assigner = ChildAssigner(100, 1000)
+    shards = [
+        assigner.assign(n, np.random.default_rng(seed))
+        for seed, n in enumerate([300, 300, 300, 100])
+    ]
+    assert [len(s['parent1_id']) for s in shards] == [300, 300, 300, 100]
+
+    parent1_id = np.concatenate([s['parent1_id'] for s in shards])
+    parent2_id = np.ma.concatenate([s['parent2_id'] for s in shards])
+    families = _families(parent1_id, parent2_id)
+    # a family cut at the end of a shard continues in the next one
+    assert len({frozenset(pair) for pair in families}) == len(families)
+    sizes = [len(list(run)) for _, run in itertools.groupby(
+        zip(parent1_id.tolist(), np.ma.filled(parent2_id, 0).tolist())
+    )]
+    assert max(sizes) <= 5
+
+
+def test_seen_pairs_are_merged_in_few_runs():
+    rng = np.random.default_rng(0)
+    keys = rng.permutation(100000)
+    seen = _SortedRuns()
+    for start in range(0, 50000, 100):
+        seen.add(keys[start:start + 100])
+        assert len(seen._runs) <= 1 + np.log2(len(seen) // 100)
+    assert len(seen) == 50000
+
+    found = seen.contains(keys)
+    assert found[:50000].all() and not found[50000:].any()
+
+
+def test_children_batches_have_consecutive_ids():
+    batches = _children(300, 2500, 1000)
+    child_id = np.concatenate([b['children']['child_id'] for b in batches])
+    assert [len(b['children']['child_id']) for b in batches] == [
+        1000, 1000, 500
+    ]
+    assert np.array_equal(child_id, np.arange(1, 2501))
+
+
+def test_skipped_shards_do_not_change_the_others():
+    whole = _children(300, 2500, 1000)
+    skipped = _children(300, 2500, 1000, skip={'children': [0, 1]})
+    assert len(skipped) == 1
+    for name, col in whole[2]['children'].items():
+        assert np.array_equal(
+            np.ma.getmaskarray(col),
+            np.ma.getmaskarray(skipped[0]['children'][name]),
+        )
+        assert np.array_equal(
+            np.ma.getdata(col), np.ma.getdata(skipped[0]['children'][name])
+        )
+
+
+def test_memory_of_the_children_does_not_hold_every_child():
+    no_parents, no_children = 5000, 300000
+
+    tracemalloc.start()
+    for _ in generate_batches(
+        no_parents,
+        no_children,
+        JOBS,
+        [SALARY_AVG[j] for j in JOBS],
+        POOL,
+        chunk_size=2000,
+        tables=['children'],
+    ):
+        pass
+    sharded = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    assign_children(no_parents, no_children, np.random.default_rng(0))
+    whole = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert sharded < whole / 3
+
+
+def test_batches_do_not_depend_on_the_number_of_workers():
+    whole = _batches(1)
+    # 3 parent shards and 4 child shards
+    assert len(whole) == 7
+    _assert_batches_equal(_batches(3), whole)
+
+
+def test_shard_seeds_are_spawned_from_numpy_seed():
+    parents = _batches(1, tables=['mailing'])
+    other = _batches(1, tables=['mailing'], numpy_seed=2)
+    assert not np.array_equal(
+        parents[0]['mailing']['first_name'], other[0]['mailing']['first_name']
+    )
+    # every shard has its own stream
+    assert not np.array_equal(
+        parents[0]['mailing']['zip'], parents[1]['mailing']['zip']
+    )
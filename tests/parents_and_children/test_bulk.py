@@ -0,0 +1,99 @@
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.parents_and_children import Create
+from dbgen.parents_and_children._constants import JOBS
+
+
+TABLES = ['mailing', 'employment', 'finances', 'children']
+
+KWARGS = dict(no_parents=300, no_children=400, chunk_size=100, numpy_seed=5)
+
+
+def _run(path, **kwargs):
+    engine = db.create_engine(f"sqlite:///{path}")
+    Create(engine=engine, base=Base()).initialize(**{**KWARGS, **kwargs})
+    return engine
+
+
+def _tables(engine):
+    return {
+        table: pd.read_sql(f"select * from {table} order by 1", engine)
+        for table in TABLES
+    }
+
+
+@pytest.fixture(scope='module')
+def bulk(tmp_path_factory):
+    path = tmp_path_factory.mktemp('bulk') / 'bulk.db'
+    return _tables(_run(path, bulk=True))
+
+
+@pytest.fixture(scope='module')
+def orm(tmp_path_factory):
+    return _tables(_run(tmp_path_factory.mktemp('orm') / 'orm.db'))
+
+
+def test_bulk_writes_the_tables_of_the_session_based_path(bulk, orm):
+    for table in TABLES:
+        assert list(bulk[table].columns) == list(orm[table].columns)
+        assert len(bulk[table]) == len(orm[table])
+
+    for table in ['mailing', 'employment', 'finances']:
+        assert bulk[table]['parent_id'].tolist() == list(range(1, 301))
+    assert bulk['children']['child_id'].tolist() == list(range(1, 401))
+
+    employment = bulk['employment']
+    assert set(employment['job']) <= set(JOBS) | {'unemployed'}
+    unemployed = employment['job'] == 'unemployed'
+    assert (employment['salary'][unemployed] == 0).all()
+    assert (employment['salary'][~unemployed] > 0).all()
+    assert employment['start_date'].between('2000-01-01', '2023-08-15').all()
+    assert bulk['finances']['savings'].notna().all()
+    assert (bulk['finances']['bank_act'].str.len() == 18).all()
+
+
+def test_bulk_children_have_two_distinct_existing_parents(bulk):
+    children = bulk['children']
+    assert children['parent1_id'].between(1, 300).all()
+    parent2_id = children['parent2_id'].dropna()
+    assert parent2_id.between(1, 300).all()
+    assert (parent2_id != children['parent1_id'][parent2_id.index]).all()
+    for col in ['same_residence', 'is_student', 'is_employed']:
+        assert set(children[col]) <= {0, 1}
+
+
+@pytest.mark.parametrize('mode', ['bulk', 'orm'])
+def test_every_couple_has_one_family(request, mode):
+    children = request.getfixturevalue(mode)['children']
+    pairs = list(
+        zip(children['parent1_id'], children['parent2_id'].fillna(0))
+    )
+    families = [pair for pair, _ in itertools.groupby(pairs)]
+    assert len({frozenset(pair) for pair in families}) == len(families)
+
+
+def test_bulk_runs_are_reproducible(tmp_path, bulk):
+    got = _tables(_run(tmp_path / 'again.db', bulk=True))
+    for table in TABLES:
+        pd.testing.assert_frame_equal(got[table], bulk[table])
+
+    other = _tables(_run(tmp_path / 'other.db', bulk=True, numpy_seed=6))
+    assert not np.array_equal(
+        other['employment']['salary'], bulk['employment']['salary']
+    )
+
+
+def test_bulk_tables_do_not_depend_on_the_number_of_workers(tmp_path, bulk):
+    got = _tables(_run(tmp_path / 'workers.db', bulk=True, workers=2))
+    for table in TABLES:
+        pd.testing.assert_frame_equal(got[table], bulk[table])
+
+
+def test_workers_require_bulk(tmp_path):
+    with pytest.raises(Exception, match='workers'):
+        _run(tmp_path / 'orm.db', workers=2)
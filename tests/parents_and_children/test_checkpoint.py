@@ -0,0 +1,113 @@
+import os
+import pandas as pd
+import pytest
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.checkpoint import Checkpoint
+from dbgen.parents_and_children import Create
+from dbgen.stats import Stats
+
+
+TABLES = ['mailing', 'employment', 'finances', 'children']
+
+KWARGS = dict(no_parents=250, no_children=250, chunk_size=100, numpy_seed=3)
+
+
+class Crash(Exception):
+    pass
+
+
+def _crash_at(stage, call):
+    calls = [0]
+
+    def callback(name, record):
+        if name == stage:
+            calls[0] += 1
+            if calls[0] == call:
+                raise Crash()
+
+    return Stats(callback=callback)
+
+
+def _run(path, **kwargs):
+    engine = db.create_engine(f"sqlite:///{path}")
+    Create(engine=engine, base=Base()).initialize(**{**KWARGS, **kwargs})
+    return engine
+
+
+def _tables(engine):
+    return {
+        table: pd.read_sql(f"select * from {table} order by 1", engine)
+        for table in TABLES
+    }
+
+
+@pytest.fixture(scope='module')
+def expected(tmp_path_factory):
+    path = tmp_path_factory.mktemp('ref')
+    return {
+        mode: _tables(_run(path / f'{mode}.db', **{mode: True}))
+        for mode in ['bulk', 'chunked']
+    }
+
+
+# 3 shards or chunks of parents and 3 of children
+@pytest.mark.parametrize(
+    'mode, stage, call',
+    [('bulk', 'load.mailing', call) for call in range(1, 4)]
+    + [('bulk', 'load.children', call) for call in range(1, 4)]
+    + [('chunked', 'load.orm', call) for call in range(1, 7)],
+)
+def test_resumed_run_is_the_same_as_an_uninterrupted_run(
+    tmp_path, expected, mode, stage, call
+):
+    path, checkpoint = tmp_path / 'family.db', str(tmp_path / 'run.json')
+    with pytest.raises(Crash):
+        _run(
+            path,
+            checkpoint=checkpoint,
+            stats=_crash_at(stage, call),
+            **{mode: True},
+        )
+
+    got = _tables(_run(path, checkpoint=checkpoint, **{mode: True}))
+    for table in TABLES:
+        pd.testing.assert_frame_equal(got[table], expected[mode][table])
+
+
+def test_checkpoint_of_other_parameters_raises(tmp_path):
+    path, checkpoint = tmp_path / 'family.db', str(tmp_path / 'run.json')
+    with pytest.raises(Crash):
+        _run(
+            path,
+            bulk=True,
+            checkpoint=checkpoint,
+            stats=_crash_at('load.children', 1),
+        )
+    with pytest.raises(Exception, match='no_children'):
+        _run(path, bulk=True, checkpoint=checkpoint, no_children=300)
+
+
+def test_manifest_keeps_the_state_of_the_last_chunk_without_a_gap(tmp_path):
+    path = str(tmp_path / 'run.json')
+    checkpoint = Checkpoint(path)
+    checkpoint.start({'seed': 0})
+    state = list(range(1000))
+    checkpoint.done('parents', 0, state)
+    size = os.path.getsize(path)
+    for chunk_no in range(1, 100):
+        checkpoint.done('parents', chunk_no, state + [chunk_no])
+    assert os.path.getsize(path) <= size + 10
+    assert checkpoint.state('parents', 99) == state + [99]
+
+    # chunks after a gap keep their state until the gap is filled
+    checkpoint.done('children', 1, 'one')
+    checkpoint.done('children', 2, 'two')
+    checkpoint = Checkpoint(path)
+    assert checkpoint.completed('children') == [1, 2]
+    assert checkpoint.completed('parents') == list(range(100))
+    checkpoint.done('children', 0, 'zero')
+    assert checkpoint.completed('children') == [0, 1, 2]
+    assert checkpoint.state('children', 2) == 'two'
+    assert checkpoint.chunks['children']['states'] == {'2': 'two'}
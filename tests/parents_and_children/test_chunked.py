@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.parents_and_children import Create
+from dbgen.stats import Stats
+
+
+TABLES = ['mailing', 'employment', 'finances', 'children']
+
+KWARGS = dict(no_parents=250, no_children=250, chunk_size=100, numpy_seed=4)
+
+
+class Crash(Exception):
+    pass
+
+
+def _crash_at(stage, call):
+    calls = [0]
+
+    def callback(name, record):
+        if name == stage:
+            calls[0] += 1
+            if calls[0] == call:
+                raise Crash()
+
+    return Stats(callback=callback)
+
+
+def _run(path, **kwargs):
+    engine = db.create_engine(f"sqlite:///{path}")
+    Create(engine=engine, base=Base()).initialize(**{**KWARGS, **kwargs})
+    return engine
+
+
+def _tables(engine):
+    return {
+        table: pd.read_sql(f"select * from {table} order by 1", engine)
+        for table in TABLES
+    }
+
+
+@pytest.fixture(scope='module')
+def expected(tmp_path_factory):
+    return _tables(_run(tmp_path_factory.mktemp('ref') / 'ref.db'))
+
+
+def test_chunked_gives_the_tables_of_one_session(tmp_path, expected):
+    got = _tables(_run(tmp_path / 'chunked.db', chunked=True))
+    for table in TABLES:
+        pd.testing.assert_frame_equal(got[table], expected[table])
+
+
+# 3 chunks of parents and 3 of children
+@pytest.mark.parametrize('call', range(1, 7))
+def test_resume_continues_after_the_committed_chunks(tmp_path, expected, call):
+    path = tmp_path / 'family.db'
+    with pytest.raises(Crash):
+        _run(path, chunked=True, stats=_crash_at('load.orm', call))
+
+    got = _tables(_run(path, chunked=True, resume=True))
+    for table in TABLES:
+        pd.testing.assert_frame_equal(got[table], expected[table])
+
+
+def test_chunked_and_resume_require_the_session_based_path(tmp_path):
+    with pytest.raises(Exception, match='chunked requires bulk=False'):
+        _run(tmp_path / 'a.db', chunked=True, bulk=True)
+    with pytest.raises(Exception, match='resume requires chunked'):
+        _run(tmp_path / 'b.db', resume=True)
+
+
+def test_chunked_memory_is_bounded_by_the_chunk_size(tmp_path):
+    peaks = {}
+    for chunked in [False, True]:
+        stats = Stats(trace_memory=True)
+        _run(
+            tmp_path / f'{chunked}.db',
+            no_parents=300,
+            no_children=300,
+            chunked=chunked,
+            stats=stats,
+        )
+        peaks[chunked] = stats.peak_bytes
+    assert peaks[True] < peaks[False] / 2
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.parents_and_children import Create
+
+
+TABLES = ['mailing', 'employment', 'finances', 'children']
+
+KWARGS = dict(no_parents=150, no_children=200, chunk_size=50, bulk=True)
+
+
+def _run(path, **kwargs):
+    engine = db.create_engine(f"sqlite:///{path}")
+    Create(engine=engine, base=Base(), indexes='analytics').initialize(
+        **{**KWARGS, **kwargs}
+    )
+    return engine
+
+
+def _schema(engine):
+    inspector = db.inspect(engine)
+    return {
+        table: (
+            inspector.get_pk_constraint(table)['constrained_columns'],
+            sorted(index['name'] for index in inspector.get_indexes(table)),
+        )
+        for table in TABLES
+    }
+
+
+def test_deferred_constraints_give_the_same_tables_and_keys(tmp_path):
+    expected = _run(tmp_path / 'plain.db')
+    got = _run(tmp_path / 'deferred.db', defer_constraints=True)
+
+    assert _schema(got) == _schema(expected)
+    assert _schema(got)['children'] == (
+        ['child_id'], ['ix_children_parent1_id', 'ix_children_parent2_id']
+    )
+    for table in TABLES:
+        pd.testing.assert_frame_equal(
+            pd.read_sql(f"select * from {table} order by 1", got),
+            pd.read_sql(f"select * from {table} order by 1", expected),
+        )
+
+
+def test_defer_constraints_requires_bulk(tmp_path):
+    with pytest.raises(Exception, match='defer_constraints'):
+        _run(tmp_path / 'orm.db', bulk=False, defer_constraints=True)
@@ -0,0 +1,75 @@
+import collections
+import faker
+import numpy as np
+
+from dbgen.parents_and_children import FakePool
+from dbgen.parents_and_children._utils import default_pool_size, fake_pool
+
+
+_Faker = faker.Faker
+
+class _CountingFaker:
+    calls = collections.Counter()
+
+    def __init__(self, *args, **kwargs):
+        self._faker = _Faker(*args, **kwargs)
+
+    def seed_instance(self, seed):
+        self._faker.seed_instance(seed)
+
+    def __getattr__(self, name):
+        method = getattr(self._faker, name)
+
+        def counted():
+            self.calls[name] += 1
+            return method()
+
+        return counted
+
+
+def test_default_pool_size_scales_with_the_rows():
+    assert default_pool_size(100) == 1000
+    assert default_pool_size(20000) == 4000
+    assert default_pool_size(10**7) == 10000
+
+
+def test_faker_calls_are_capped(monkeypatch):
+    monkeypatch.setattr(fake_pool.faker, 'Faker', _CountingFaker)
+    _CountingFaker.calls.clear()
+    pool = FakePool(faker_seed=101, pool_size=3000)
+
+    for field in FakePool.FIELDS:
+        assert 0 < len(pool.pools[field]) <= 3000
+        assert len(set(pool.pools[field])) == len(pool.pools[field])
+        assert _CountingFaker.calls[field] <= FakePool.MAX_DRAWS * 3000
+    # there are only 50 states, so the rounds stop long before the cap
+    assert _CountingFaker.calls['state'] <= 2 * FakePool.ROUND_SIZE
+
+
+def test_pool_is_generated_once_per_process(monkeypatch):
+    first = FakePool(faker_seed=102, pool_size=200)
+    monkeypatch.setattr(fake_pool.faker, 'Faker', _CountingFaker)
+    _CountingFaker.calls.clear()
+    second = FakePool(faker_seed=102, pool_size=200, cardinality={'city': 5})
+
+    assert sum(_CountingFaker.calls.values()) == 0
+    assert second.pools is first.pools
+    assert len(set(second.sample('city', 1000, np.random.default_rng(0)))) <= 5
+
+
+def test_cache_dir_round_trip(tmp_path):
+    pool = FakePool(faker_seed=103, pool_size=200, cache_dir=str(tmp_path))
+    assert len(list(tmp_path.iterdir())) == 1
+    fake_pool._pools.clear()
+    cached = FakePool(faker_seed=103, pool_size=200, cache_dir=str(tmp_path))
+    for field in FakePool.FIELDS:
+        assert np.array_equal(pool.pools[field], cached.pools[field])
+
+
+def test_samples_only_depend_on_the_generator():
+    pool = FakePool(faker_seed=104, pool_size=200)
+    a = pool.sample('last_name', 50, np.random.default_rng(1))
+    b = pool.sample('last_name', 50, np.random.default_rng(1))
+    assert np.array_equal(a, b)
+    bban = pool.sample('bban', 50, np.random.default_rng(1))
+    assert all(len(value) == len(FakePool.BBAN_FORMAT) for value in bban)
@@ -0,0 +1,86 @@
+import pytest
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen._indexes import index_args
+from dbgen.parents_and_children import Create
+from dbgen.parents_and_children._constants import INDEX_PROFILES
+
+
+def _indexes(table_args):
+    return [
+        (index.name, [getattr(col, 'name', col) for col in index.expressions])
+        for index in table_args
+    ]
+
+
+def test_index_args_of_profiles_dicts_and_lists():
+    assert index_args('children', None, INDEX_PROFILES) == ()
+    employment = index_args('employment', 'analytics', INDEX_PROFILES)
+    assert _indexes(employment) == [('ix_employment_job', ['job'])]
+    assert index_args('mailing', 'analytics', INDEX_PROFILES) == ()
+    assert _indexes(
+        index_args('ohlcv', {'ohlcv': [('ticker', 'datetime')]}, {})
+    ) == [('ix_ohlcv_ticker_datetime', ['ticker', 'datetime'])]
+    assert _indexes(index_args('mailing', ['zip', ('state', 'city')], {})) == [
+        ('ix_mailing_zip', ['zip']),
+        ('ix_mailing_state_city', ['state', 'city']),
+    ]
+    with pytest.raises(Exception, match='indexes must be one of'):
+        index_args('children', 'oltp', INDEX_PROFILES)
+
+
+def test_profiles_create_the_indexes(tmp_path):
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'family.db'}")
+    Create(engine=engine, base=Base(), indexes='analytics').initialize(
+        with_entries=False
+    )
+    inspector = db.inspect(engine)
+    indexes = {
+        table: {
+            index['name']: index['column_names']
+            for index in inspector.get_indexes(table)
+        }
+        for table in ['mailing', 'employment', 'finances', 'children']
+    }
+    assert indexes == {
+        'mailing': {},
+        'employment': {'ix_employment_job': ['job']},
+        'finances': {},
+        'children': {
+            'ix_children_parent1_id': ['parent1_id'],
+            'ix_children_parent2_id': ['parent2_id'],
+        },
+    }
+
+
+def test_no_indexes_by_default(tmp_path):
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'family.db'}")
+    Create(engine=engine, base=Base()).initialize(with_entries=False)
+    assert db.inspect(engine).get_indexes('children') == []
+
+
+def _create_indexes(base):
+    statements = []
+    engine = db.create_mock_engine(
+        'mysql+pymysql://',
+        lambda sql, *args, **kwargs: statements.append(
+            str(sql.compile(dialect=engine.dialect)).strip()
+        ),
+    )
+    base.metadata.create_all(engine, checkfirst=False)
+    return sorted(s for s in statements if s.startswith('CREATE INDEX'))
+
+
+def test_profiles_emit_create_index_statements():
+    base = Base()
+    Create(engine=None, base=base, indexes='analytics')
+    assert _create_indexes(base) == [
+        'CREATE INDEX ix_children_parent1_id ON children (parent1_id)',
+        'CREATE INDEX ix_children_parent2_id ON children (parent2_id)',
+        'CREATE INDEX ix_employment_job ON employment (job)',
+    ]
+
+    base = Base()
+    Create(engine=None, base=base)
+    assert _create_indexes(base) == []
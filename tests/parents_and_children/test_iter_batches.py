@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.parents_and_children import Create
+
+
+TABLES = ['mailing', 'employment', 'finances', 'children']
+
+KWARGS = dict(no_parents=250, no_children=300, numpy_seed=2)
+
+
+@pytest.fixture(scope='module')
+def expected(tmp_path_factory):
+    path = tmp_path_factory.mktemp('db') / 'family.db'
+    engine = db.create_engine(f"sqlite:///{path}")
+    Create(engine=engine, base=Base()).initialize(
+        bulk=True, chunk_size=100, **KWARGS
+    )
+    return {
+        table: pd.read_sql(f"select * from {table} order by 1", engine)
+        for table in TABLES
+    }
+
+
+def _batches(table, format='columns'):
+    return list(
+        Create(engine=None, base=Base()).iter_batches(
+            table, batch_size=100, format=format, **KWARGS
+        )
+    )
+
+
+@pytest.mark.parametrize('table', TABLES)
+def test_batches_are_the_rows_that_initialize_inserts(expected, table):
+    batches = _batches(table)
+    assert [len(next(iter(b.values()))) for b in batches][:2] == [100, 100]
+
+    got = pd.DataFrame(
+        {
+            name: np.ma.concatenate([b[name] for b in batches])
+            .astype(object).filled(None)
+            for name in batches[0]
+        }
+    )
+    expected = expected[table]
+    assert set(got.columns) == set(expected.columns)
+    # in the types that the database gives back
+    got = got[expected.columns].astype(expected.dtypes.to_dict())
+    pd.testing.assert_frame_equal(got, expected)
+
+
+def test_formats_hold_the_same_data():
+    columns = _batches('children')
+    structured = _batches('children', format='numpy')
+    arrow = _batches('children', format='arrow')
+    assert len(columns) == len(structured) == len(arrow) == 3
+
+    for cols, array, batch in zip(columns, structured, arrow):
+        assert isinstance(batch, pa.RecordBatch)
+        assert batch.schema.names == list(cols)
+        for name, col in cols.items():
+            mask = np.ma.getmaskarray(col)
+            assert np.array_equal(np.ma.getmaskarray(array[name]), mask)
+            assert np.array_equal(
+                batch.column(name).is_null().to_numpy(zero_copy_only=False),
+                mask,
+            )
+            data = np.ma.getdata(col)[~mask]
+            assert np.array_equal(np.ma.getdata(array[name])[~mask], data)
+            values = batch.column(name).to_numpy(zero_copy_only=False)
+            assert np.array_equal(values[~mask], data)
+
+
+def test_unknown_tables_raise():
+    with pytest.raises(Exception, match='table must be one of'):
+        _batches('parents')
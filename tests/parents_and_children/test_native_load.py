@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+import sqlalchemy as db
+from sqlalchemy.dialects.mysql.pymysql import MySQLDialect_pymysql
+from sqlalchemy.dialects.mysql.mysqldb import MySQLDialect_mysqldb
+from sqlalchemy.dialects.postgresql.psycopg2 import PGDialect_psycopg2
+from sqlalchemy.dialects.sqlite.pysqlite import SQLiteDialect_pysqlite
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen._load.native import (
+    _mysql_load_data,
+    _postgresql_copy,
+    columns_to_text,
+    load_columns,
+    native_loader,
+)
+from dbgen.parents_and_children import Create
+
+
+TABLES = ['mailing', 'employment', 'finances', 'children']
+
+
+def test_columns_to_text_writes_nulls_and_escapes():
+    columns = {
+        'id': np.array([1, 2, 3]),
+        'parent2_id': np.ma.masked_array([4, 5, 6], mask=[False, True, False]),
+        'flag': np.array([True, False, True]),
+        'price': np.array([1.5, np.nan, 2.0]),
+        'datetime': np.array(
+            ['2023-01-02T09:30', 'NaT', '2023-01-02T09:31'],
+            dtype='datetime64[us]',
+        ),
+        'name': np.array(['a\tb', 'c\\d', 'e\nf'], dtype=object),
+    }
+    assert columns_to_text(columns).split('\n') == [
+        '1\t4\t1\t1.5\t2023-01-02 09:30:00\ta\\tb',
+        '2\t\\N\t0\t\\N\t\\N\tc\\\\d',
+        '3\t6\t1\t2.0\t2023-01-02 09:31:00\te\\nf',
+        '',
+    ]
+    assert columns_to_text({'id': np.array([], dtype=int)}) == ''
+
+
+def test_native_loader_of_the_dialects():
+    assert native_loader(MySQLDialect_pymysql()) is _mysql_load_data
+    assert native_loader(PGDialect_psycopg2()) is _postgresql_copy
+    assert native_loader(MySQLDialect_mysqldb()) is None
+    assert native_loader(SQLiteDialect_pysqlite()) is None
+
+
+def test_unknown_load_methods_raise():
+    engine = db.create_engine('sqlite://')
+    with engine.connect() as conn, pytest.raises(Exception, match='method'):
+        load_columns(conn, None, {}, method='copy')
+
+
+def _tables(path, **kwargs):
+    engine = db.create_engine(f"sqlite:///{path}")
+    Create(engine=engine, base=Base()).initialize(
+        no_parents=120, no_children=150, bulk=True, chunk_size=50, **kwargs
+    )
+    return {
+        table: pd.read_sql(f"select * from {table} order by 1", engine)
+        for table in TABLES
+    }
+
+
+def test_native_falls_back_to_inserts_on_sqlite(tmp_path):
+    expected = _tables(tmp_path / 'insert.db')
+    got = _tables(tmp_path / 'native.db', load_method='native')
+    for table in TABLES:
+        pd.testing.assert_frame_equal(got[table], expected[table])
@@ -0,0 +1,51 @@
+import datetime as dt
+import faker
+import numpy as np
+
+from dbgen.parents_and_children._utils import SalSavStartGen
+
+
+END = dt.datetime(2023, 8, 15)
+
+
+def test_batch_draws_one_value_per_person():
+    avg = np.array([100, 0, 35, 210, 0])
+    salsav = SalSavStartGen.batch(avg, rng=np.random.default_rng(0))
+    for attr in ['salary', 'savings', 'startdate', 'work_duration']:
+        assert len(getattr(salsav, attr)) == len(avg)
+
+    assert np.all(salsav.salary[avg == 0] == 0)
+    assert np.all(salsav.salary[avg > 0] >= avg[avg > 0] / 10)
+
+    startdate = salsav.startdate.astype('datetime64[D]')
+    assert np.all(startdate >= np.datetime64('2000-01-01'))
+    assert np.all(startdate <= np.datetime64(END.date()))
+    days = (np.datetime64(END.date()) - startdate).astype(int)
+    assert np.allclose(salsav.work_duration, days / 365)
+
+
+def test_batch_of_a_number_and_n():
+    salsav = SalSavStartGen.batch(50, n=7, rng=np.random.default_rng(0))
+    assert len(salsav.salary) == 7 and np.all(salsav.salary > 0)
+
+
+def test_batch_is_reproducible_with_the_same_generator():
+    avg = np.arange(100) % 3 * 50
+    a = SalSavStartGen.batch(avg, rng=np.random.default_rng(3))
+    b = SalSavStartGen.batch(avg, rng=np.random.default_rng(3))
+    for attr in ['salary', 'savings', 'startdate']:
+        assert np.array_equal(getattr(a, attr), getattr(b, attr))
+
+
+def test_batch_has_the_distribution_of_the_per_person_generator():
+    n = 5000
+    np.random.seed(0)
+    fk = faker.Faker()
+    fk.seed_instance(0)
+    for avg in [0, 100]:
+        people = [SalSavStartGen(avg, fk) for _ in range(n)]
+        batch = SalSavStartGen.batch(avg, n=n, rng=np.random.default_rng(0))
+        for attr in ['salary', 'savings', 'work_duration']:
+            expected = np.mean([getattr(p, attr) for p in people])
+            got = getattr(batch, attr).mean()
+            assert abs(got - expected) <= 0.05 * abs(expected) + 1
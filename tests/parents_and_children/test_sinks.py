@@ -0,0 +1,110 @@
+import glob
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.parents_and_children import Create
+from dbgen.sinks import CSVSink, ParquetSink, SQLiteSink
+
+
+TABLES = ['mailing', 'employment', 'finances', 'children']
+
+# few parents, so that some children have no second parent
+KWARGS = dict(no_parents=20, no_children=30, chunk_size=10)
+
+
+def _write(sink):
+    Create(engine=None, base=Base()).initialize(sink=sink, **KWARGS)
+
+
+def _read_sqlite(path):
+    engine = db.create_engine(f"sqlite:///{path}")
+    return {
+        table: pd.read_sql(f"select * from {table} order by 1", engine)
+        for table in TABLES
+    }
+
+
+def _read_parts(directory, read):
+    # the parts of a table are written in order
+    return {
+        table: pd.concat(
+            [
+                read(path) for path in
+                sorted(glob.glob(os.path.join(directory, table, 'part-*')))
+            ],
+            ignore_index=True,
+        )
+        for table in TABLES
+    }
+
+
+@pytest.fixture(scope='module')
+def expected(tmp_path_factory):
+    path = tmp_path_factory.mktemp('db') / 'family.db'
+    engine = db.create_engine(f"sqlite:///{path}")
+    Create(engine=engine, base=Base()).initialize(bulk=True, **KWARGS)
+    return _read_sqlite(path)
+
+
+@pytest.mark.parametrize(
+    'make_sink, read',
+    [
+        (
+            lambda path: ParquetSink(str(path)),
+            lambda path: _read_parts(path, pd.read_parquet),
+        ),
+        (
+            lambda path: CSVSink(str(path), compression='gzip'),
+            lambda path: _read_parts(path, pd.read_csv),
+        ),
+        (
+            lambda path: SQLiteSink(str(path)),
+            _read_sqlite,
+        ),
+    ],
+    ids=['parquet', 'csv', 'sqlite'],
+)
+def test_sinks_write_the_tables_of_the_database(
+    tmp_path, expected, make_sink, read
+):
+    _write(make_sink(tmp_path / 'out'))
+    got = read(tmp_path / 'out')
+    for table in TABLES:
+        assert set(got[table].columns) == set(expected[table].columns)
+        # in the order and types that the database gives back
+        frame = got[table][expected[table].columns].astype(
+            expected[table].dtypes.to_dict()
+        )
+        pd.testing.assert_frame_equal(frame, expected[table])
+
+
+def test_parquet_partitions_by_column(tmp_path):
+    _write(ParquetSink(str(tmp_path), partition_by={'employment': ['job']}))
+    jobs = os.listdir(tmp_path / 'employment')
+    assert jobs and all(job.startswith('job=') for job in jobs)
+    assert pq.read_table(tmp_path / 'employment').num_rows == 20
+
+
+def test_parquet_keeps_parent2_id_an_integer_with_nulls(tmp_path):
+    _write(ParquetSink(str(tmp_path / 'parquet')))
+    _write(SQLiteSink(str(tmp_path / 'family.db')))
+
+    table = pq.read_table(tmp_path / 'parquet' / 'children')
+    assert table.schema.field('parent2_id').type == pa.int64()
+    assert table.column('parent2_id').null_count > 0
+
+    children = pd.read_parquet(tmp_path / 'parquet' / 'children')
+    assert children['parent2_id'].dtype == 'Int64'
+
+    expected = pd.read_sql(
+        "select parent2_id from children order by child_id",
+        db.create_engine(f"sqlite:///{tmp_path / 'family.db'}"),
+    )['parent2_id']
+    got = children.sort_values('child_id')['parent2_id']
+    assert got.isna().tolist() == expected.isna().tolist()
+    assert got.dropna().tolist() == expected.dropna().astype(int).tolist()
@@ -0,0 +1,59 @@
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.parents_and_children import Create
+from dbgen.stats import Stats
+
+
+KWARGS = dict(no_parents=200, no_children=250, chunk_size=100)
+
+
+def _run(path, **kwargs):
+    engine = db.create_engine(f"sqlite:///{path}")
+    return Create(engine=engine, base=Base()).initialize(
+        **{**KWARGS, **kwargs}
+    )
+
+
+def test_summary_of_the_bulk_stages(tmp_path):
+    summary = _run(tmp_path / 'family.db', bulk=True)
+    stages = summary['stages']
+    assert {
+        'schema', 'generate.parents', 'generate.children', 'load.mailing',
+        'load.employment', 'load.finances', 'load.children',
+    } <= set(stages)
+
+    assert stages['generate.parents']['calls'] == 2
+    assert stages['generate.children']['calls'] == 3
+    assert stages['load.children']['rows'] == 250
+    assert stages['load.mailing']['rows'] == 200
+    assert stages['load.children']['bytes'] > 0
+    for stage in stages.values():
+        assert set(stage) == {'seconds', 'rows', 'bytes', 'calls'}
+        assert 0 <= stage['seconds']
+    assert summary['total_seconds'] >= stages['schema']['seconds']
+
+
+def test_summary_of_the_session_based_path(tmp_path):
+    stages = _run(tmp_path / 'family.db')['stages']
+    assert stages['generate.orm']['rows'] == 3 * 200 + 250
+    assert stages['load.orm']['calls'] == 1
+
+
+def test_callback_profile_and_memory(tmp_path):
+    calls = []
+    stats = Stats(
+        profile=True,
+        trace_memory=True,
+        callback=lambda name, record: calls.append((name, record['rows'])),
+    )
+    summary = _run(tmp_path / 'family.db', bulk=True, stats=stats)
+
+    assert ('load.children', 100) in calls
+    assert sum(rows for name, rows in calls if name == 'load.children') == 250
+    assert summary['peak_bytes'] > 0
+    assert all('peak_bytes' in s for s in summary['stages'].values())
+    assert summary['profile'] and all(
+        set(f) == {'function', 'calls', 'tottime', 'cumtime'}
+        for f in summary['profile']
+    )
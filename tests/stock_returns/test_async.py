@@ -0,0 +1,69 @@
+import asyncio
+import datetime as dt
+import pandas as pd
+import pytest
+import sqlalchemy as db
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.stock_returns import Create, MarketSimulator, simulated_tickers
+
+
+TABLES = ['ohlcv', 'transaction_history', 'portfolio']
+
+KWARGS = dict(
+    tickers=simulated_tickers(3),
+    start=dt.datetime(2023, 1, 2),
+    end=dt.datetime(2023, 1, 13),
+    no_investors=8,
+    make_nans=5,
+    with_trigger=False,
+    portfolio_engine='python',
+    numpy_seed=2,
+)
+
+
+def _create(engine):
+    return Create(
+        engine, base=Base(), source=MarketSimulator(seed=1), progress=None
+    )
+
+
+def _tables(path):
+    engine = db.create_engine(f"sqlite:///{path}")
+    return {
+        table: pd.read_sql(f"select * from {table} order by 1, 2", engine)
+        for table in TABLES
+    }
+
+
+async def _initialize_async(path, **kwargs):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        return await _create(engine).initialize_async(**{**KWARGS, **kwargs})
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.parametrize('with_investments', [True, False])
+def test_async_gives_the_tables_of_initialize(tmp_path, with_investments):
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+    _create(engine).initialize(with_investments=with_investments, **KWARGS)
+    expected = _tables(tmp_path / 'sync.db')
+
+    summary = asyncio.run(
+        _initialize_async(
+            tmp_path / 'async.db', with_investments=with_investments
+        )
+    )
+    got = _tables(tmp_path / 'async.db')
+    for table in TABLES:
+        pd.testing.assert_frame_equal(got[table], expected[table])
+    assert (len(got['transaction_history']) > 0) == with_investments
+    assert summary['stages']['load.ohlcv']['rows'] == len(got['ohlcv'])
+
+
+def test_async_requires_an_async_engine(tmp_path):
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+    with pytest.raises(Exception, match='AsyncEngine'):
+        asyncio.run(_create(engine).initialize_async(**KWARGS))
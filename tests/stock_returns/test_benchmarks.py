@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_benchmarks_run_the_cases_of_the_generator():
+    output = subprocess.run(
+        [
+            sys.executable, os.path.join(ROOT, 'benchmarks', 'run.py'),
+            '--sizes', '1000',
+            '--generators', 'stock_returns',
+            '--strategies', 'insert', 'investments',
+            '--backends', 'sqlite_file',
+            '--no-save',
+        ],
+        capture_output=True, text=True, check=True,
+    ).stdout.splitlines()
+    names = [line.split()[0] for line in output]
+    assert names == [
+        'stock_returns/insert/sqlite_file/1000',
+        'stock_returns/investments/1000',
+    ]
+    # 5 days of minute bars of one ticker
+    assert output[0].split()[1] == '4800'
+    assert int(output[1].split()[1]) > 4800
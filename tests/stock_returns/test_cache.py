@@ -0,0 +1,171 @@
+import time
+import datetime as dt
+import numpy as np
+import pandas as pd
+import pytest
+
+from dbgen.stock_returns import DownloadCache
+from dbgen.stock_returns.create import _reshape_batch
+
+
+START, END = dt.datetime(2023, 9, 1), dt.datetime(2023, 9, 8)
+
+
+def _frame(tickers=('SPY', 'NVDA'), tz=None):
+    index = pd.date_range('2023-09-01 09:30', periods=10, freq='1D', tz=tz)
+    return pd.DataFrame(
+        {
+            'datetime': np.tile(index, len(tickers)),
+            'ticker': np.repeat(tickers, len(index)),
+            'open': 1.0,
+            'high': 2.0,
+            'low': 0.5,
+            'close': 1.5,
+            'volume': 100.0,
+        }
+    )
+
+
+@pytest.fixture
+def local_tz(monkeypatch):
+    def set_tz(name):
+        monkeypatch.setenv('TZ', name)
+        time.tzset()
+
+    yield set_tz
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_get_serves_the_windows_within_an_entry(tmp_path):
+    cache = DownloadCache(str(tmp_path))
+    cache.seed(_frame(), '1d', START, END)
+
+    df = cache.get('SPY', '1d', START, END)
+    assert len(df) == 10 and set(df['ticker']) == {'SPY'}
+    df = cache.get(
+        'NVDA', '1d', dt.datetime(2023, 9, 2), dt.datetime(2023, 9, 4)
+    )
+    assert df['datetime'].tolist() == [
+        '2023-09-02 09:30:00', '2023-09-03 09:30:00'
+    ]
+    assert cache.get('SPY', '1d', START, dt.datetime(2023, 9, 9)) is None
+    assert cache.get('SPY', '1m', START, END) is None
+
+    # the manifest is read back by a new cache once it is flushed
+    assert DownloadCache(str(tmp_path)).entries != cache.entries
+    cache.flush()
+    assert DownloadCache(str(tmp_path)).entries == cache.entries
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DownloadCache(str(tmp_path))
+    cache.seed(_frame(['A']), '1d', START, END)
+    cache.seed(_frame(['B']), '1d', START, END)
+    cache.get('A', '1d', START, END)
+
+    # room for two of the three entries
+    cache.max_bytes = cache.size * 5 // 4
+    cache.seed(_frame(['C']), '1d', START, END)
+    assert sorted(e['ticker'] for e in cache.entries.values()) == ['A', 'C']
+
+
+def test_seeded_timestamps_do_not_depend_on_the_local_timezone(
+    tmp_path, local_tz
+):
+    timestamps = []
+    for i, name in enumerate(['UTC', 'America/New_York', 'Asia/Tokyo']):
+        local_tz(name)
+        cache = DownloadCache(str(tmp_path / str(i)))
+        cache.seed(_frame(), '1d', START, END)
+        timestamps.append(cache.get('SPY', '1d', START, END)['timestamp'])
+
+    expected = pd.Timestamp('2023-09-01 09:30', tz='UTC').timestamp()
+    assert timestamps[0][0] == expected
+    for other in timestamps[1:]:
+        assert np.array_equal(other, timestamps[0])
+
+
+def test_seeded_timezone_aware_frames_match_the_downloads(tmp_path):
+    tz = 'America/New_York'
+    frame = _frame(['SPY'], tz=tz)
+    cache = DownloadCache(str(tmp_path))
+    cache.seed(frame, '1d', START, END)
+
+    # a yf.download of the same bars
+    download = frame.set_index('datetime')[
+        ['open', 'high', 'low', 'close', 'volume']
+    ]
+    download.columns = [c.capitalize() for c in download.columns]
+    _, expected = next(_reshape_batch(download, ['SPY']))
+
+    got = cache.get('SPY', '1d', START, END)
+    assert got['datetime'].tolist() == (
+        expected['datetime'].dt.strftime('%Y-%m-%d %H:%M:%S').tolist()
+    )
+    assert np.array_equal(got['timestamp'], expected['timestamp'])
+
+
+def test_timezone_aware_windows_are_keyed_in_utc(tmp_path, local_tz):
+    local_tz('America/New_York')
+    tz = dt.timezone(dt.timedelta(hours=-4))
+    cache = DownloadCache(str(tmp_path))
+    cache.seed(
+        _frame(), '1d', START.replace(tzinfo=tz), END.replace(tzinfo=tz)
+    )
+
+    (entry,) = [e for e in cache.entries.values() if e['ticker'] == 'SPY']
+    assert (entry['start'], entry['end']) == (
+        '2023-09-01T04:00:00', '2023-09-08T04:00:00'
+    )
+    utc = dt.timedelta(hours=4)
+    assert cache.get('SPY', '1d', START + utc, END + utc) is not None
+    assert cache.get(
+        'SPY', '1d', START.replace(tzinfo=tz), END.replace(tzinfo=tz)
+    ) is not None
+
+
+def test_used_entries_do_not_write_the_manifest(tmp_path, monkeypatch):
+    cache = DownloadCache(str(tmp_path))
+    cache.seed(_frame(), '1d', START, END)
+    writes = []
+    write = cache._write_manifest
+    monkeypatch.setattr(
+        cache, '_write_manifest', lambda: writes.append(1) or write()
+    )
+    for _ in range(3):
+        cache.get('SPY', '1d', START, END)
+        cache.get('NVDA', '1d', START, END)
+    assert writes == []
+    cache.flush()
+    cache.flush()
+    assert writes == [1]
+
+
+def test_naive_windows_are_keyed_in_utc(tmp_path, local_tz):
+    local_tz('America/New_York')
+    cache = DownloadCache(str(tmp_path))
+    cache.seed(_frame(['SPY'], tz='America/New_York'), '1d', START, END)
+
+    (entry,) = cache.entries.values()
+    assert (entry['start'], entry['end']) == (
+        '2023-09-01T00:00:00', '2023-09-08T00:00:00'
+    )
+    utc = dt.timezone.utc
+    assert cache.get(
+        'SPY', '1d', START.replace(tzinfo=utc), END.replace(tzinfo=utc)
+    ) is not None
+    # not the local time of the machine
+    assert cache.get('SPY', '1d', START.astimezone(), END.astimezone()) is None
+
+    # the bars of 9:30 in New York are at 13:30 in UTC
+    df = cache.get(
+        'SPY', '1d', dt.datetime(2023, 9, 2, 13, 30), dt.datetime(2023, 9, 4)
+    )
+    assert df['datetime'].tolist() == [
+        '2023-09-02 09:30:00', '2023-09-03 09:30:00'
+    ]
+    df = cache.get(
+        'SPY', '1d', dt.datetime(2023, 9, 2, 13, 31), dt.datetime(2023, 9, 4)
+    )
+    assert df['datetime'].tolist() == ['2023-09-03 09:30:00']
@@ -0,0 +1,91 @@
+import datetime as dt
+import pandas as pd
+import pytest
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.stats import Stats
+from dbgen.stock_returns import Create, MarketSimulator
+
+
+TABLES = ['ohlcv', 'transaction_history', 'portfolio']
+
+# not in alphabetical order, which a resumed run reads the prices back in
+TICKERS = ['SPY', 'NVDA', 'AMZN']
+
+KWARGS = dict(
+    tickers=TICKERS,
+    start=dt.datetime(2023, 1, 2),
+    end=dt.datetime(2023, 1, 20),
+    no_investors=10,
+    make_nans=10,
+    with_trigger=False,
+    portfolio_engine='python',
+    numpy_seed=7,
+)
+
+
+class Crash(Exception):
+    pass
+
+
+def _crash_at(stage, call):
+    calls = [0]
+
+    def callback(name, record):
+        if name == stage:
+            calls[0] += 1
+            if calls[0] == call:
+                raise Crash()
+
+    return Stats(callback=callback)
+
+
+def _run(path, **kwargs):
+    engine = db.create_engine(f"sqlite:///{path}")
+    Create(
+        engine, base=Base(), source=MarketSimulator(seed=3), progress=None
+    ).initialize(**{**KWARGS, **kwargs})
+    return engine
+
+
+def _tables(engine):
+    return {
+        table: pd.read_sql(f"select * from {table} order by 1, 2", engine)
+        for table in TABLES
+    }
+
+
+@pytest.fixture(scope='module')
+def expected(tmp_path_factory):
+    return _tables(_run(tmp_path_factory.mktemp('ref') / 'ref.db'))
+
+
+# 3 windows of 3 tickers
+@pytest.mark.parametrize(
+    'stage, call',
+    [('load.ohlcv', call) for call in range(1, 10)]
+    + [('load.close', 1), ('load.transaction_history', 1)],
+)
+def test_resumed_run_is_the_same_as_an_uninterrupted_run(
+    tmp_path, expected, stage, call
+):
+    path, checkpoint = tmp_path / 'stocks.db', str(tmp_path / 'run.json')
+    with pytest.raises(Crash):
+        _run(path, checkpoint=checkpoint, stats=_crash_at(stage, call))
+
+    got = _tables(_run(path, checkpoint=checkpoint))
+    for table in TABLES:
+        pd.testing.assert_frame_equal(got[table], expected[table])
+
+
+def test_checkpoint_of_other_parameters_raises(tmp_path):
+    path, checkpoint = tmp_path / 'stocks.db', str(tmp_path / 'run.json')
+    with pytest.raises(Crash):
+        _run(
+            path,
+            checkpoint=checkpoint,
+            stats=_crash_at('load.transaction_history', 1),
+        )
+    with pytest.raises(Exception, match='no_investors'):
+        _run(path, checkpoint=checkpoint, no_investors=11)
@@ -0,0 +1,55 @@
+import datetime as dt
+import pandas as pd
+import pytest
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.stock_returns import Create, MarketSimulator, simulated_tickers
+
+
+TABLES = ['ohlcv', 'transaction_history', 'portfolio']
+
+
+def _run(path, **kwargs):
+    engine = db.create_engine(f"sqlite:///{path}")
+    Create(
+        engine, base=Base(), source=MarketSimulator(seed=0), progress=None
+    ).initialize(
+        tickers=simulated_tickers(2),
+        start=dt.datetime(2023, 1, 2),
+        end=dt.datetime(2023, 1, 13),
+        no_investors=5,
+        with_trigger=False,
+        portfolio_engine='python',
+        numpy_seed=0,
+        **kwargs,
+    )
+    return engine
+
+
+def _ddl(engine):
+    with engine.connect() as conn:
+        return dict(
+            conn.exec_driver_sql(
+                "select name, sql from sqlite_master where type = 'table'"
+            ).all()
+        )
+
+
+def test_deferred_constraints_give_the_same_tables_and_keys(tmp_path):
+    expected = _run(tmp_path / 'plain.db')
+    got = _run(tmp_path / 'deferred.db', defer_constraints=True)
+
+    # the primary keys and check constraints are built after the load
+    assert _ddl(got) == _ddl(expected)
+    assert 'CHECK' in _ddl(got)['portfolio']
+    for table in TABLES:
+        pd.testing.assert_frame_equal(
+            pd.read_sql(f"select * from {table} order by 1, 2", got),
+            pd.read_sql(f"select * from {table} order by 1, 2", expected),
+        )
+
+    with got.begin() as conn, pytest.raises(db.exc.IntegrityError):
+        conn.exec_driver_sql(
+            "insert into ohlcv select * from ohlcv limit 1"
+        )
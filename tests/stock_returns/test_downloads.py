@@ -0,0 +1,246 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+import pytest
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.stock_returns import Create, DownloadCache
+from dbgen.stock_returns import create
+
+
+FIELDS = ['Adj Close', 'Close', 'High', 'Low', 'Open', 'Volume']
+
+TICKERS = ['SPY', 'NVDA']
+
+START, END = dt.datetime(2023, 1, 2), dt.datetime(2023, 1, 13)
+
+
+def _download(tickers, start, end, interval='1m', prepost=True, **kwargs):
+    # minute bars of 4:00 to 20:00 in the timezone of the exchange, like
+    # yf.download(..., prepost=True)
+    start, end = _exchange_time(start), _exchange_time(end)
+    index = pd.date_range(start, end, freq='1min', inclusive='left')
+    index = index[
+        (index.hour >= 4) & (index.hour < 20) & (index.dayofweek < 5)
+    ]
+    index = index.tz_localize('America/New_York')
+    columns = pd.MultiIndex.from_product(
+        [FIELDS, tickers], names=['Price', 'Ticker']
+    )
+    rng = np.random.default_rng(int(pd.Timestamp(start).timestamp()))
+    data = 100 + rng.normal(size=(len(index), len(columns))).cumsum(0) * .1
+    df = pd.DataFrame(
+        data, index=pd.Index(index, name='Datetime'), columns=columns
+    )
+    if len(tickers) == 1:
+        df.columns = df.columns.droplevel(1)
+    return df
+
+
+def _exchange_time(moment):
+    # yfinance converts timezone aware windows to the timezone of the 
+    # exchange
+    moment = pd.Timestamp(moment)
+    if moment.tz is not None:
+        moment = moment.tz_convert('America/New_York').tz_localize(None)
+    return moment
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    calls = []
+
+    def download(tickers, start, end, **kwargs):
+        calls.append((list(tickers), start, end))
+        return _download(tickers, start, end, **kwargs)
+
+    monkeypatch.setattr(create.yf, 'download', download)
+    return calls
+
+
+def _run(path, cache=None, end=END):
+    engine = db.create_engine(f"sqlite:///{path}")
+    Create(engine, base=Base(), cache=cache, progress=None).initialize(
+        tickers=TICKERS,
+        start=START,
+        end=end,
+        make_nans=0,
+        with_investments=False,
+        with_trigger=False,
+    )
+    return pd.read_sql("select * from ohlcv order by ticker, datetime", engine)
+
+
+def test_cached_batches_are_not_downloaded_again(tmp_path, downloads):
+    expected = _run(tmp_path / 'plain.db')
+    # 3 windows of 5 days, every one downloaded for both tickers at once
+    assert [tickers for tickers, *_ in downloads] == [TICKERS] * 3
+
+    cache = DownloadCache(str(tmp_path / 'cache'))
+    pd.testing.assert_frame_equal(_run(tmp_path / 'a.db', cache), expected)
+    assert len(downloads) == 6 and len(cache.entries) == 6
+
+    offline = DownloadCache(str(tmp_path / 'cache'), offline=True)
+    pd.testing.assert_frame_equal(_run(tmp_path / 'b.db', offline), expected)
+    assert len(downloads) == 6
+
+
+def test_naive_windows_are_downloaded_in_utc(tmp_path, downloads):
+    _run(tmp_path / 'stocks.db')
+    assert downloads[0][1:] == (
+        dt.datetime(2023, 1, 2, tzinfo=dt.timezone.utc),
+        dt.datetime(2023, 1, 7, tzinfo=dt.timezone.utc),
+    )
+
+
+def test_used_entries_are_flushed_once_the_downloads_are_done(
+    tmp_path, downloads, monkeypatch
+):
+    cache = DownloadCache(str(tmp_path / 'cache'))
+    _run(tmp_path / 'a.db', cache)
+    before = {name: e['last_used'] for name, e in cache.entries.items()}
+
+    writes = []
+    write = cache._write_manifest
+    monkeypatch.setattr(
+        cache, '_write_manifest', lambda: writes.append(1) or write()
+    )
+    _run(tmp_path / 'b.db', cache)
+    # 6 entries are used, the manifest is written once
+    assert len(writes) == 1
+    after = DownloadCache(str(tmp_path / 'cache')).entries
+    assert all(after[name]['last_used'] > before[name] for name in before)
+
+
+def test_refresh_continues_where_the_downloads_stopped(tmp_path, downloads):
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'stocks.db'}")
+    database = Create(engine, base=Base(), progress=None)
+    database.initialize(
+        tickers=TICKERS,
+        start=START,
+        end=END,
+        make_nans=0,
+        with_investments=False,
+        with_trigger=False,
+    )
+    database.refresh(end=dt.datetime(2023, 1, 20))
+
+    got = pd.read_sql("select * from ohlcv order by ticker, datetime", engine)
+    expected = _run(tmp_path / 'full.db', end=dt.datetime(2023, 1, 20))
+    for col in ['ticker', 'datetime', 'timestamp']:
+        assert got[col].tolist() == expected[col].tolist()
+
+
+def test_offline_cache_raises_for_missing_windows(tmp_path, downloads):
+    offline = DownloadCache(str(tmp_path / 'cache'), offline=True)
+    with pytest.raises(Exception, match='not cached'):
+        _run(tmp_path / 'stocks.db', offline)
+    assert downloads == []
+
+
+def _frames(**kwargs):
+    return list(create._download_ohlcv(TICKERS, START, END, '1m', **kwargs))
+
+
+def test_progress_is_reported_once_per_window(tmp_path, downloads):
+    calls = []
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'stocks.db'}")
+    Create(
+        engine, base=Base(), progress=lambda *args: calls.append(args)
+    ).initialize(
+        tickers=TICKERS,
+        start=START,
+        end=END,
+        make_nans=0,
+        with_investments=False,
+        with_trigger=False,
+    )
+    assert calls == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_prefetched_downloads_are_yielded_in_order(downloads):
+    frames = _frames(prefetch=2)
+    # window by window, in the order of the tickers
+    assert [str(df['ticker'][0]) for df in frames] == TICKERS * 3
+    for expected, got in zip(_frames(prefetch=0), frames):
+        pd.testing.assert_frame_equal(got, expected)
+
+    datetimes = pd.concat([df['datetime'] for df in frames[::2]])
+    assert datetimes.is_monotonic_increasing and datetimes.is_unique
+
+
+def test_downloads_run_at_most_prefetch_batches_ahead(downloads):
+    frames = create._download_ohlcv(
+        TICKERS, START, dt.datetime(2023, 2, 1), '1m', prefetch=1
+    )
+    next(frames)
+    # the window that is reshaped and the one that is prefetched, of 7
+    assert 1 <= len(downloads) <= 2
+    frames.close()
+
+
+def test_errors_of_the_downloads_reach_the_consumer(monkeypatch):
+    def download(*args, **kwargs):
+        raise ConnectionError('no network')
+
+    monkeypatch.setattr(create.yf, 'download', download)
+    with pytest.raises(ConnectionError, match='no network'):
+        _frames()
+
+
+def test_errors_of_prefetched_windows_follow_the_windows_before_them(
+    monkeypatch
+):
+    calls = []
+
+    def download(tickers, start, end, **kwargs):
+        calls.append(start)
+        if len(calls) == 2:
+            raise ConnectionError('no network')
+        return _download(tickers, start, end, **kwargs)
+
+    monkeypatch.setattr(create.yf, 'download', download)
+    frames = create._download_ohlcv(TICKERS, START, END, '1m', prefetch=2)
+    # the first window is yielded, the error of the second one is raised
+    # in the consumer and not lost in the background thread
+    assert [str(next(frames)['ticker'][0]) for _ in TICKERS] == TICKERS
+    with pytest.raises(ConnectionError, match='no network'):
+        next(frames)
+    assert len(calls) <= 3
+
+
+def test_reshape_splits_the_tickers_in_local_time():
+    df = _download(TICKERS, dt.datetime(2023, 7, 3), dt.datetime(2023, 7, 4))
+    reshaped = dict(create._reshape_batch(df, TICKERS))
+    assert list(reshaped) == TICKERS
+
+    for ticker, sub_df in reshaped.items():
+        assert list(sub_df.columns) == [
+            'datetime', 'ticker', 'open', 'high', 'low', 'close', 'volume',
+            'timestamp',
+        ]
+        assert (sub_df['ticker'] == ticker).all()
+        assert np.array_equal(sub_df['open'], df[('Open', ticker)])
+        assert np.array_equal(sub_df['volume'], df[('Volume', ticker)])
+        # the wall time of the exchange and the seconds since the epoch
+        assert sub_df['datetime'][0] == pd.Timestamp('2023-07-03 04:00')
+        assert sub_df['timestamp'][0] == pd.Timestamp(
+            '2023-07-03 08:00', tz='UTC'
+        ).timestamp()
+
+
+def test_reshape_of_a_single_ticker_and_naive_datetimes():
+    df = _download(['SPY'], dt.datetime(2023, 7, 3), dt.datetime(2023, 7, 4))
+    df.index = df.index.tz_localize(None)
+    df.iloc[1:3, df.columns.get_loc('Close')] = np.nan
+
+    ((ticker, sub_df),) = create._reshape_batch(df, ['SPY'])
+    assert ticker == 'SPY'
+    # naive datetimes are taken to be in UTC
+    assert sub_df['timestamp'][0] == pd.Timestamp(
+        '2023-07-03 04:00', tz='UTC'
+    ).timestamp()
+    # missing prices are interpolated
+    close = df['Close'].to_numpy()
+    assert np.allclose(sub_df['close'][:4], np.linspace(close[0], close[3], 4))
@@ -0,0 +1,193 @@
+import itertools
+import datetime as dt
+import numpy as np
+import pandas as pd
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.stock_returns import Create, MarketSimulator, simulated_tickers
+from dbgen.stock_returns._utils.gaps import GAP_COLUMNS, GapInjector, gap_rows
+
+
+def _ohlcv(path, **kwargs):
+    engine = db.create_engine(f"sqlite:///{path}")
+    database = Create(
+        engine, base=Base(), source=MarketSimulator(seed=0), progress=None
+    )
+    database.initialize(
+        tickers=simulated_tickers(3),
+        start=dt.datetime(2023, 1, 2),
+        end=dt.datetime(2023, 1, 13),
+        with_trigger=False,
+        with_investments=False,
+        **kwargs,
+    )
+    return database, engine
+
+
+def _read(engine):
+    return pd.read_sql(
+        "select * from ohlcv order by ticker, datetime", engine
+    )
+
+
+def test_gap_rows_are_runs_of_at_most_max_len_rows():
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        rows = gap_rows(50, 4, 3, rng)
+        assert np.all(np.diff(rows) > 0)
+        assert rows.min() >= 0 and rows.max() < 50
+        assert 1 <= len(rows) <= 12
+
+
+def test_injector_masks_make_nans_gaps_per_column():
+    rng = np.random.default_rng(0)
+    injector = GapInjector(make_nans=3, max_nans_in_a_row=1, rng=rng)
+    n = 1000
+    columns = injector.apply(
+        {
+            'ticker': np.full(n, 'SPY'),
+            **{col: np.arange(n, dtype=float) for col in GAP_COLUMNS},
+        }
+    )
+    for col in GAP_COLUMNS:
+        mask = np.ma.getmaskarray(columns[col])
+        # gaps of one row may only coincide
+        assert 1 <= mask.sum() <= 3
+        assert np.array_equal(
+            np.ma.getdata(columns[col]), np.arange(n, dtype=float)
+        )
+
+
+def test_injector_continues_from_its_state():
+    batches = [
+        {
+            'ticker': np.full(100, ticker),
+            **{col: np.zeros(100) for col in GAP_COLUMNS},
+        }
+        for ticker in ['A', 'B'] for _ in range(3)
+    ]
+
+    def masks(injector, batches):
+        return [
+            np.ma.getmaskarray(injector.apply(b)['open']) for b in batches
+        ]
+
+    whole = masks(
+        GapInjector(10, 3, 3, np.random.default_rng(1)), batches
+    )
+    first = GapInjector(10, 3, 3, np.random.default_rng(1))
+    head = masks(first, batches[:4])
+    second = GapInjector(10, 3, 3, np.random.default_rng(2))
+    second.set_state(first.get_state())
+    tail = masks(second, batches[4:])
+    for a, b in zip(whole, head + tail):
+        assert np.array_equal(a, b)
+
+
+def test_inject_gaps_in_table_sets_the_gaps_of_the_injector(tmp_path):
+    database, engine = _ohlcv(tmp_path / 'stocks.db', make_nans=0)
+    before = _read(engine)
+    assert not before[GAP_COLUMNS].isna().any().any()
+
+    statements = []
+    db.event.listen(
+        engine,
+        'before_cursor_execute',
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    no_rows = database.inject_gaps(
+        make_nans=5, max_nans_in_a_row=3, numpy_seed=4
+    )
+    # one join, no subqueries that reopen the temporary table
+    updates = [s for s in statements if s.startswith('UPDATE')]
+    assert len(updates) == 1 and 'SELECT' not in updates[0]
+    after = _read(engine)
+
+    # the same gaps drawn in memory for the same keys and seed
+    injector = GapInjector(5, 3, rng=np.random.default_rng(4))
+    expected = []
+    for ticker, sub_df in before.groupby('ticker', sort=False):
+        columns = injector.apply(
+            {
+                'ticker': sub_df['ticker'].to_numpy(),
+                **{col: sub_df[col].to_numpy() for col in GAP_COLUMNS},
+            }
+        )
+        expected.append(
+            pd.DataFrame(
+                {col: np.ma.getmaskarray(columns[col]) for col in GAP_COLUMNS}
+            )
+        )
+    expected = pd.concat(expected, ignore_index=True)
+
+    assert np.array_equal(after[GAP_COLUMNS].isna(), expected)
+    assert no_rows == expected.any(axis=1).sum()
+    kept = ~expected.to_numpy()
+    assert np.array_equal(
+        after[GAP_COLUMNS].to_numpy()[kept],
+        before[GAP_COLUMNS].to_numpy()[kept],
+    )
+
+
+def _runs(ohlcv, columns):
+    # the runs of NULLs, one ticker and column at a time
+    runs = []
+    for ticker, sub_df in ohlcv.groupby('ticker'):
+        datetimes = sub_df['datetime'].tolist()
+        for col in columns:
+            isna = sub_df[col].isna().tolist()
+            for is_gap, run in itertools.groupby(
+                enumerate(isna), key=lambda x: x[1]
+            ):
+                if is_gap:
+                    rows = [row for row, _ in run]
+                    runs.append(
+                        (
+                            ticker,
+                            col,
+                            pd.Timestamp(datetimes[rows[0]]),
+                            pd.Timestamp(datetimes[rows[-1]]),
+                            len(rows),
+                        )
+                    )
+    return sorted(runs)
+
+
+def test_find_gaps_finds_every_run_of_nulls(tmp_path):
+    database, engine = _ohlcv(tmp_path / 'stocks.db', make_nans=0)
+    assert len(database.find_gaps()['length']) == 0
+    database.inject_gaps(make_nans=8, max_nans_in_a_row=4, numpy_seed=1)
+
+    ohlcv = pd.read_sql(
+        "select * from ohlcv order by ticker, datetime",
+        engine,
+        parse_dates=['datetime'],
+    )
+    for columns in [GAP_COLUMNS, ['close']]:
+        gaps = database.find_gaps(columns)
+        got = sorted(
+            zip(
+                gaps['ticker'].tolist(),
+                gaps['ohlcv'].tolist(),
+                pd.to_datetime(gaps['start_datetime']).tolist(),
+                pd.to_datetime(gaps['end_datetime']).tolist(),
+                gaps['length'].tolist(),
+            )
+        )
+        expected = _runs(ohlcv, columns)
+        assert len(expected) > 0
+        assert got == expected
+
+
+def test_find_gaps_persists_the_runs(tmp_path):
+    database, engine = _ohlcv(tmp_path / 'stocks.db', make_nans=3)
+    gaps = database.find_gaps(persist=True)
+    persisted = pd.read_sql("select * from ohlcv_gaps", engine)
+    assert len(persisted) == len(gaps['length']) > 0
+    assert sorted(persisted['length']) == sorted(gaps['length'])
+
+    # a second call replaces the runs
+    database.find_gaps(['open'], persist=True)
+    persisted = pd.read_sql("select * from ohlcv_gaps", engine)
+    assert set(persisted['ohlcv']) == {'open'}
@@ -0,0 +1,56 @@
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.stock_returns import Create
+
+
+def _indexes(table):
+    return {
+        index.name: [col.name for col in index.columns]
+        for index in table.indexes
+    }
+
+
+def test_analytics_profile_indexes_the_lookups():
+    database = Create(None, base=Base(), indexes='analytics')
+    assert _indexes(database.OHLCV.__table__) == {
+        'ix_ohlcv_ticker_datetime': ['ticker', 'datetime']
+    }
+    assert _indexes(database.TransactionHistory.__table__) == {
+        'ix_transaction_history_user_id_ticker_position_type': [
+            'user_id', 'ticker', 'position_type'
+        ]
+    }
+    assert _indexes(database.Portfolio.__table__) == {}
+
+
+def test_custom_profiles_index_any_columns():
+    database = Create(None, base=Base(), indexes={'ohlcv': ['close']})
+    assert _indexes(database.OHLCV.__table__) == {'ix_ohlcv_close': ['close']}
+    assert _indexes(database.TransactionHistory.__table__) == {}
+
+
+def _create_indexes(base):
+    statements = []
+    engine = db.create_mock_engine(
+        'mysql+pymysql://',
+        lambda sql, *args, **kwargs: statements.append(
+            str(sql.compile(dialect=engine.dialect)).strip()
+        ),
+    )
+    base.metadata.create_all(engine, checkfirst=False)
+    return sorted(s for s in statements if s.startswith('CREATE INDEX'))
+
+
+def test_profiles_emit_create_index_statements():
+    base = Base()
+    Create(None, base=base, indexes='analytics')
+    assert _create_indexes(base) == [
+        'CREATE INDEX ix_ohlcv_ticker_datetime ON ohlcv (ticker, datetime)',
+        'CREATE INDEX ix_transaction_history_user_id_ticker_position_type '
+        'ON transaction_history (user_id, ticker, position_type)',
+    ]
+
+    base = Base()
+    Create(None, base=base)
+    assert _create_indexes(base) == []
@@ -0,0 +1,77 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.stock_returns import Create, MarketSimulator, simulated_tickers
+
+
+KWARGS = dict(
+    tickers=simulated_tickers(2),
+    start=dt.datetime(2023, 1, 2),
+    end=dt.datetime(2023, 1, 13),
+)
+
+
+def _create(engine=None):
+    return Create(
+        engine, base=Base(), source=MarketSimulator(seed=0), progress=None
+    )
+
+
+def _batches(format='columns', batch_size=1000):
+    return list(
+        _create().iter_batches(
+            'ohlcv', batch_size=batch_size, format=format, **KWARGS
+        )
+    )
+
+
+def test_batches_are_the_rows_that_initialize_inserts(tmp_path):
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'stocks.db'}")
+    _create(engine).initialize(
+        make_nans=0, with_investments=False, with_trigger=False, **KWARGS
+    )
+    expected = pd.read_sql("select * from ohlcv", engine)
+
+    batches = _batches()
+    assert all(len(b['ticker']) == 1000 for b in batches[:-1])
+    got = pd.DataFrame(
+        {
+            name: np.concatenate([b[name] for b in batches])
+            for name in batches[0]
+        }
+    )
+    assert len(got) == len(expected)
+
+    keys = ['ticker', 'datetime']
+    expected['datetime'] = pd.to_datetime(expected['datetime'])
+    got = got.sort_values(keys, ignore_index=True)
+    expected = expected.sort_values(keys, ignore_index=True)
+    for name in expected:
+        if name in keys:
+            assert got[name].tolist() == expected[name].tolist()
+        else:
+            assert np.allclose(got[name], expected[name])
+
+
+def test_formats_hold_the_same_data():
+    columns = _batches()
+    arrow = _batches('arrow')
+    structured = _batches('numpy')
+    assert len(columns) == len(arrow) == len(structured)
+    for cols, batch, array in zip(columns, arrow, structured):
+        assert isinstance(batch, pa.RecordBatch)
+        for name, col in cols.items():
+            assert np.array_equal(array[name], col)
+            assert np.array_equal(
+                batch.column(name).to_numpy(zero_copy_only=False), col
+            )
+
+
+def test_only_ohlcv_can_be_generated_without_a_database():
+    with pytest.raises(Exception, match='ohlcv'):
+        next(_create().iter_batches('portfolio', **KWARGS))
@@ -0,0 +1,256 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+import sqlalchemy as db
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.stock_returns import Create, MarketSimulator, simulated_tickers
+from dbgen.stock_returns._utils import portfolio_from_transactions
+
+
+def _create(engine):
+    return Create(
+        engine, base=Base(), source=MarketSimulator(seed=0), progress=None
+    )
+
+
+def test_python_engine_runs_on_sqlite_with_the_default_tables(tmp_path):
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'stocks.db'}")
+    _create(engine).initialize(
+        tickers=simulated_tickers(3),
+        start=dt.datetime(2023, 1, 2),
+        end=dt.datetime(2023, 1, 13),
+        no_investors=10,
+        with_trigger=False,
+        portfolio_engine='python',
+        numpy_seed=0,
+    )
+
+    trans = pd.read_sql("select * from transaction_history", engine)
+    portfolio = pd.read_sql("select * from portfolio", engine)
+    assert len(trans) > 0
+    assert np.array_equal(
+        np.sort(trans['trans_id'].to_numpy()), np.arange(1, len(trans) + 1)
+    )
+
+    # the position of every portfolio row is the sum of its transactions
+    trans['shares'] = trans['action'] * trans['no_shares']
+    keys = ['user_id', 'ticker', 'position_type']
+    expected = trans.groupby(keys)['shares'].sum().rename('expected')
+    merged = portfolio.set_index(keys).join(expected, how='outer')
+    assert len(merged) == len(portfolio)
+    assert np.array_equal(merged['position'], merged['expected'].round())
+
+
+def test_trans_id_can_be_given_by_hand_on_sqlite(tmp_path):
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'stocks.db'}")
+    database = _create(engine)
+    database.initialize(
+        with_entries=False, with_trigger=False, drop_db_if_exists=False
+    )
+
+    with db.orm.Session(engine) as session:
+        session.add(
+            database.TransactionHistory(
+                1, dt.datetime(2023, 1, 2), 'SPY', 1, 1, 10.0, 99.0, 7
+            )
+        )
+        session.commit()
+
+    trans = pd.read_sql("select * from transaction_history", engine)
+    assert trans['trans_id'].tolist() == [7]
+
+
+def test_auto_increment_is_only_left_out_on_sqlite():
+    table = _create(None).TransactionHistory.__table__
+    ddl = {
+        name: str(db.schema.CreateTable(table).compile(dialect=dialect()))
+        for name, dialect in [
+            ('mysql', mysql.dialect), ('sqlite', sqlite.dialect)
+        ]
+    }
+    assert 'trans_id INTEGER NOT NULL AUTO_INCREMENT' in ddl['mysql']
+    assert 'trans_id INTEGER NOT NULL,' in ddl['sqlite']
+    assert 'AUTOINCREMENT' not in ddl['sqlite']
+
+
+def _div(a, b):
+    # NULL, ie NaN, on a division by zero as in MySQL
+    return np.nan if b == 0 else a / b
+
+
+def _trigger(portfolio, new):
+    """
+    Applies one transaction to portfolio the way trigger.sql does, one row
+    and one assignment at a time.
+    """
+    key = (new['user_id'], new['ticker'], new['position_type'])
+    n, p = new['no_shares'], new['at_price']
+    r = portfolio.get(key)
+    if new['position_type'] > 0 and new['action'] > 0:
+        if r is None:
+            portfolio[key] = dict(
+                position=n, last_price=p, cost_basis=p, total_invested=p * n,
+                current_value=p * n, realized_profit=0.0, gain=0.0,
+            )
+            return
+        r['position'] = r['position'] + n
+        r['last_price'] = p
+        r['cost_basis'] = _div(
+            (r['position'] - n) * r['cost_basis'] + n * r['last_price'],
+            r['position'],
+        )
+        r['total_invested'] = r['total_invested'] + n * p
+        r['current_value'] = r['position'] * p
+        r['gain'] = _div(
+            100.0 * (
+                r['current_value'] + r['realized_profit'] 
+                - r['total_invested']
+            ),
+            r['total_invested'],
+        )
+    elif new['position_type'] > 0 and new['action'] < 0:
+        if r is None:
+            return
+        r['position'] = r['position'] - n
+        r['last_price'] = p
+        r['current_value'] = r['position'] * p
+        r['realized_profit'] = r['realized_profit'] + n * p
+        r['gain'] = _div(
+            100.0 * (
+                r['current_value'] + r['realized_profit'] 
+                - r['total_invested']
+            ),
+            r['total_invested'],
+        )
+    elif new['position_type'] < 0 and new['action'] < 0:
+        if r is None:
+            portfolio[key] = dict(
+                position=-n, last_price=p, cost_basis=p, total_invested=0.0,
+                current_value=-p * n, realized_profit=p * n, gain=0.0,
+            )
+            return
+        r['position'] = r['position'] - n
+        r['last_price'] = p
+        r['cost_basis'] = _div(
+            -1.0 * (r['position'] + n) * r['cost_basis'] + n * p,
+            r['position'],
+        ) * -1.0
+        r['total_invested'] = 0.0
+        r['current_value'] = r['position'] * p
+        r['realized_profit'] = r['realized_profit'] + p * n
+        r['gain'] = _div(
+            100.0 * (r['realized_profit'] + r['current_value']),
+            r['realized_profit'],
+        )
+    elif new['position_type'] < 0 and new['action'] > 0:
+        if r is None:
+            return
+        r['position'] = r['position'] + n
+        r['last_price'] = p
+        r['total_invested'] = 0.0
+        r['current_value'] = r['position'] * p
+        r['realized_profit'] = r['realized_profit'] - p * n
+        r['gain'] = _div(
+            100.0 * (r['realized_profit'] + r['current_value']),
+            r['realized_profit'],
+        )
+
+
+def _assert_engine_replays_the_trigger(trans):
+    expected = {}
+    for new in trans.to_dict('records'):
+        _trigger(expected, new)
+
+    got = portfolio_from_transactions(
+        {name: trans[name].to_numpy() for name in trans}
+    )
+    keys = list(zip(got['user_id'], got['ticker'], got['position_type']))
+    assert sorted(keys) == sorted(expected)
+    for i, key in enumerate(keys):
+        assert got['position'][i] == expected[key]['position']
+        for name, value in expected[key].items():
+            if name != 'position':
+                got_value = np.ma.filled(got[name].astype(float), np.nan)[i]
+                assert np.isclose(got_value, value, equal_nan=True), (
+                    key, name
+                )
+
+
+def test_python_engine_replays_the_trigger_row_by_row():
+    rows = [
+        # a long that is bought twice, sold in part, closed and reopened
+        (1, 'SPY', 1, 1, 10, 100.0),
+        (1, 'SPY', 1, 1, 5, 110.0),
+        (1, 'SPY', 1, -1, 3, 120.0),
+        (1, 'SPY', 1, -1, 12, 90.0),
+        (1, 'SPY', 1, 1, 4, 95.0),
+        # a short that is opened, added to, covered in part and closed
+        (1, 'SPY', -1, -1, 10, 50.0),
+        (1, 'SPY', -1, -1, 5, 40.0),
+        (1, 'SPY', -1, 1, 5, 45.0),
+        (1, 'SPY', -1, 1, 10, 30.0),
+        # a short that is closed at no profit, ie a NULL gain
+        (2, 'NVDA', -1, -1, 2, 10.0),
+        (2, 'NVDA', -1, 1, 2, 10.0),
+        # sells of a long and buys of a short that was never opened
+        (2, 'NVDA', 1, -1, 3, 11.0),
+        (3, 'AAPL', -1, 1, 3, 11.0),
+        # nothing invested, ie NULLs that carry on to the next buy
+        (3, 'AAPL', 1, 1, 0, 10.0),
+        (3, 'AAPL', 1, 1, 0, 12.0),
+        (3, 'AAPL', 1, 1, 2, 5.0),
+    ]
+    trans = pd.DataFrame(
+        rows, 
+        columns=[
+            'user_id', 'ticker', 'position_type', 'action', 'no_shares', 
+            'at_price'
+        ],
+    )
+    _assert_engine_replays_the_trigger(trans)
+
+
+def test_python_engine_replays_the_trigger_of_random_histories():
+    rng = np.random.default_rng(0)
+    n = 2000
+    trans = pd.DataFrame(
+        {
+            'user_id': rng.integers(1, 6, n),
+            'ticker': rng.choice(['SPY', 'NVDA', 'AAPL'], n),
+            'position_type': rng.choice([1, -1], n),
+            'action': rng.choice([1, -1], n),
+            'no_shares': rng.integers(0, 20, n).astype(float),
+            'at_price': rng.uniform(1, 200, n).round(2),
+        }
+    )
+    _assert_engine_replays_the_trigger(trans)
+
+
+def test_generated_portfolio_replays_the_trigger(tmp_path):
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'stocks.db'}")
+    _create(engine).initialize(
+        tickers=simulated_tickers(3),
+        start=dt.datetime(2023, 1, 2),
+        end=dt.datetime(2023, 1, 13),
+        no_investors=10,
+        with_trigger=False,
+        portfolio_engine='python',
+        numpy_seed=0,
+    )
+    trans = pd.read_sql(
+        "select * from transaction_history order by trans_id", engine
+    )
+    expected = {}
+    for new in trans.to_dict('records'):
+        _trigger(expected, new)
+
+    portfolio = pd.read_sql("select * from portfolio", engine)
+    assert len(portfolio) == len(expected)
+    for row in portfolio.to_dict('records'):
+        want = expected[(row['user_id'], row['ticker'], row['position_type'])]
+        assert row['position'] == round(want['position'])
+        for name, value in want.items():
+            if name != 'position':
+                assert np.isclose(row[name], value, equal_nan=True), name
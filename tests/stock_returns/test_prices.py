@@ -0,0 +1,89 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.stock_returns import Create, MarketSimulator, simulated_tickers
+from dbgen.stock_returns._utils.prices import PriceIndex
+
+
+def _datetimes(*minutes):
+    return np.datetime64('2023-01-02T09:30', 'us') + np.array(
+        minutes, dtype='timedelta64[m]'
+    )
+
+
+def _batch(ticker, minutes, prices):
+    return {
+        'datetime': _datetimes(*minutes),
+        'ticker': np.full(len(minutes), ticker),
+        'open': np.ma.masked_invalid(np.array(prices, dtype=float)),
+    }
+
+
+def test_lookup_finds_the_prices_of_batches_in_any_order():
+    index = PriceIndex('open')
+    index.add(_batch('SPY', [3, 4, 5], [13, np.nan, 15]))
+    index.add(_batch('SPY', [0, 1, 2], [10, 11, 12]))
+    index.add(_batch('NVDA', [0], [100]))
+
+    assert index.tickers == ['SPY', 'NVDA']
+    got = index.lookup('SPY', _datetimes(5, 0, 4, 9, 2))
+    assert np.array_equal(got, [15, 10, np.nan, np.nan, 12], equal_nan=True)
+    assert np.array_equal(index.datetimes('SPY'), _datetimes(0, 1, 2, 3, 5))
+    assert len(index.datetimes('SPY', dropna=False)) == 6
+    assert np.isnan(index.lookup('AMZN', _datetimes(0))).all()
+
+
+def test_later_rows_replace_the_price_of_a_datetime():
+    index = PriceIndex('open')
+    index.add(_batch('SPY', [0, 1], [10, 11]))
+    assert index.lookup('SPY', _datetimes(1))[0] == 11
+    index.add(_batch('SPY', [1], [21]))
+    assert np.array_equal(index.lookup('SPY', _datetimes(0, 1)), [10, 21])
+
+
+def test_from_table_reads_the_prices_of_the_table(tmp_path):
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'stocks.db'}")
+    table = Create(None, base=Base()).OHLCV.__table__
+    table.create(engine)
+    rows = pd.DataFrame(
+        {
+            'datetime': pd.to_datetime(_datetimes(0, 1, 2, 0)),
+            'ticker': ['SPY', 'SPY', 'SPY', 'NVDA'],
+            'open': [10, None, 12, 100],
+        }
+    )
+    rows.to_sql('ohlcv', engine, if_exists='append', index=False)
+
+    index = PriceIndex.from_table(engine, 'open')
+    assert sorted(index.tickers) == ['NVDA', 'SPY']
+    got = index.lookup('SPY', _datetimes(0, 1, 2))
+    assert np.array_equal(got, [10, np.nan, 12], equal_nan=True)
+    assert index.lookup('NVDA', _datetimes(0))[0] == 100
+
+
+def test_transactions_are_at_the_open_price_of_their_datetime(tmp_path):
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'stocks.db'}")
+    Create(
+        engine, base=Base(), source=MarketSimulator(seed=0), progress=None
+    ).initialize(
+        tickers=simulated_tickers(3),
+        start=dt.datetime(2023, 1, 2),
+        end=dt.datetime(2023, 1, 13),
+        no_investors=10,
+        with_trigger=False,
+        portfolio_engine='python',
+        numpy_seed=0,
+    )
+
+    index = PriceIndex.from_table(engine, 'open')
+    trans = pd.read_sql(
+        "select * from transaction_history", engine, parse_dates=['datetime']
+    )
+    assert len(trans) > 0
+    for ticker, sub_df in trans.groupby('ticker'):
+        prices = index.lookup(ticker, sub_df['datetime'].to_numpy())
+        assert not np.isnan(prices).any()
+        assert np.allclose(prices, sub_df['at_price'])
@@ -0,0 +1,92 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.stock_returns import Create, MarketSimulator
+
+
+START = dt.datetime(2023, 1, 2)
+END = dt.datetime(2023, 1, 6)
+
+
+def _ohlcv(engine):
+    return pd.read_sql(
+        "select * from ohlcv order by ticker, datetime",
+        engine,
+        parse_dates=['datetime'],
+    )
+
+
+def _initialize(path):
+    engine = db.create_engine(f"sqlite:///{path}")
+    database = Create(
+        engine, base=Base(), source=MarketSimulator(seed=0), progress=None
+    )
+    database.initialize(
+        tickers=['SPY', 'NVDA'],
+        start=START,
+        end=END,
+        no_investors=5,
+        make_nans=0,
+        with_trigger=False,
+        portfolio_engine='python',
+        numpy_seed=0,
+    )
+    return database, engine
+
+
+def test_refresh_only_appends_the_rows_after_the_last_datetime(tmp_path):
+    database, engine = _initialize(tmp_path / 'stocks.db')
+    before = _ohlcv(engine)
+    last = before.groupby('ticker')['datetime'].max()
+
+    no_rows = database.refresh(end=dt.datetime(2023, 1, 10))
+    after = _ohlcv(engine)
+    assert set(no_rows) == {'SPY', 'NVDA'}
+    assert all(n > 0 for n in no_rows.values())
+    assert len(after) == len(before) + sum(no_rows.values())
+    assert not after.duplicated(['ticker', 'datetime']).any()
+
+    # the old rows are untouched
+    old = after.merge(before[['ticker', 'datetime']])
+    pd.testing.assert_frame_equal(old, before)
+    for ticker, n in no_rows.items():
+        rows = after[after['ticker'] == ticker]
+        new = rows[rows['datetime'] > last[ticker]]
+        assert len(new) == n
+        assert new['datetime'].max() < dt.datetime(2023, 1, 10)
+
+    # nothing is left to download
+    assert database.refresh(end=dt.datetime(2023, 1, 10)) == {
+        'SPY': 0, 'NVDA': 0
+    }
+
+
+def test_refresh_downloads_new_tickers_from_start(tmp_path):
+    database, engine = _initialize(tmp_path / 'stocks.db')
+    no_rows = database.refresh(tickers=['SPY', 'AMZN'], start=START, end=END)
+    assert no_rows['SPY'] == 0 and no_rows['AMZN'] > 0
+
+    after = _ohlcv(engine)
+    amzn = after[after['ticker'] == 'AMZN']
+    spy = after[after['ticker'] == 'SPY']
+    assert amzn['datetime'].tolist() == spy['datetime'].tolist()
+
+
+def test_refresh_marks_the_portfolio_to_market(tmp_path):
+    database, engine = _initialize(tmp_path / 'stocks.db')
+    database.refresh(end=dt.datetime(2023, 1, 10))
+
+    ohlcv = _ohlcv(engine).dropna(subset=['open'])
+    latest = ohlcv.groupby('ticker')['open'].last()
+    portfolio = pd.read_sql("select * from portfolio", engine)
+    assert len(portfolio) > 0
+    assert np.allclose(
+        portfolio['last_price'], latest[portfolio['ticker']].to_numpy()
+    )
+    assert np.allclose(
+        portfolio['current_value'],
+        portfolio['position'] * portfolio['last_price'],
+    )
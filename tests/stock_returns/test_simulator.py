@@ -0,0 +1,72 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+from dbgen.stock_returns import MarketSimulator, simulated_tickers
+
+
+START, END = dt.datetime(2023, 1, 2), dt.datetime(2023, 1, 13)
+
+
+def _batches(simulator, tickers=('A', 'B', 'C'), time_step='1m'):
+    return list(simulator.batches(list(tickers), START, END, time_step))
+
+
+def _equal(a, b):
+    return len(a) == len(b) and all(
+        np.array_equal(np.ma.getdata(x[name]), np.ma.getdata(y[name]))
+        and np.array_equal(
+            np.ma.getmaskarray(x[name]), np.ma.getmaskarray(y[name])
+        )
+        for x, y in zip(a, b) for name in x
+    )
+
+
+def test_the_same_seed_gives_the_same_data():
+    batches = _batches(MarketSimulator(seed=0))
+    assert _equal(_batches(MarketSimulator(seed=0)), batches)
+    assert not _equal(_batches(MarketSimulator(seed=1)), batches)
+
+
+def test_batches_of_5_days_and_one_ticker_in_the_sessions():
+    batches = _batches(MarketSimulator(seed=0))
+    # 3 windows of 3 tickers, window by window
+    assert [str(b['ticker'][0]) for b in batches] == ['A', 'B', 'C'] * 3
+
+    times = pd.DatetimeIndex(
+        np.concatenate([b['datetime'] for b in batches[::3]])
+    )
+    assert times.is_monotonic_increasing and times.is_unique
+    assert (times.dayofweek < 5).all()
+    assert ((times.hour >= 4) & (times.hour < 20)).all()
+    assert times[0] == pd.Timestamp('2023-01-02 04:00')
+    assert times[-1] == pd.Timestamp('2023-01-12 19:59')
+    assert len(times) == 9 * 16 * 60
+
+    for b in batches:
+        seconds = b['datetime'].astype('datetime64[s]').astype(np.int64)
+        assert np.array_equal(b['timestamp'], seconds)
+
+
+def test_bars_are_consistent():
+    for b in _batches(MarketSimulator(seed=0)):
+        high, low = np.ma.getdata(b['high']), np.ma.getdata(b['low'])
+        for col in ['open', 'close']:
+            price = np.ma.getdata(b[col])
+            assert np.all(low <= price) and np.all(price <= high)
+        assert np.all(low > 0)
+        assert np.all(np.ma.getdata(b['volume']) >= 0)
+
+
+def test_daily_bars_have_one_bar_per_weekday():
+    batches = _batches(MarketSimulator(seed=0), ['A'], '1d')
+    times = np.concatenate([b['datetime'] for b in batches])
+    assert pd.DatetimeIndex(times).strftime('%Y-%m-%d').tolist() == [
+        f'2023-01-{day:02d}' for day in [2, 3, 4, 5, 6, 9, 10, 11, 12]
+    ]
+
+
+def test_simulated_tickers_are_distinct():
+    tickers = simulated_tickers(1000)
+    assert tickers[:3] == ['A', 'B', 'C'] and tickers[26] == 'AA'
+    assert len(set(tickers)) == 1000
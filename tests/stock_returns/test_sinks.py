@@ -0,0 +1,108 @@
+import datetime as dt
+import glob
+import os
+import pandas as pd
+import pytest
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.sinks import CSVSink, ParquetSink, SQLiteSink
+from dbgen.stock_returns import Create, MarketSimulator, simulated_tickers
+
+
+TABLES = ['ohlcv', 'transaction_history', 'portfolio']
+
+KEYS = {
+    'ohlcv': ['ticker', 'datetime'],
+    'transaction_history': ['user_id', 'trans_id'],
+    'portfolio': ['user_id', 'ticker', 'position_type'],
+}
+
+KWARGS = dict(
+    tickers=simulated_tickers(2),
+    start=dt.datetime(2023, 1, 2),
+    end=dt.datetime(2023, 1, 13),
+    no_investors=5,
+    make_nans=5,
+    portfolio_engine='python',
+    numpy_seed=1,
+)
+
+
+def _create(engine=None):
+    return Create(
+        engine, base=Base(), source=MarketSimulator(seed=0), progress=None
+    )
+
+
+def _read_sqlite(path):
+    engine = db.create_engine(f"sqlite:///{path}")
+    return {
+        table: pd.read_sql(f"select * from {table}", engine)
+        for table in TABLES
+    }
+
+
+def _read_parts(directory, read):
+    return {
+        table: pd.concat(
+            [
+                read(path) for path in
+                sorted(glob.glob(os.path.join(directory, table, 'part-*')))
+            ],
+            ignore_index=True,
+        )
+        for table in TABLES
+    }
+
+
+def _normalized(tables):
+    # the sinks write in the order of generation, the database in any order
+    normalized = {}
+    for table, frame in tables.items():
+        frame = frame.copy()
+        for col in ['datetime', 'last_mark_datetime']:
+            if col in frame:
+                frame[col] = pd.to_datetime(frame[col])
+        normalized[table] = frame.sort_values(KEYS[table], ignore_index=True)
+    return normalized
+
+
+@pytest.fixture(scope='module')
+def expected(tmp_path_factory):
+    path = tmp_path_factory.mktemp('db') / 'stocks.db'
+    engine = db.create_engine(f"sqlite:///{path}")
+    _create(engine).initialize(with_trigger=False, **KWARGS)
+    return _normalized(_read_sqlite(path))
+
+
+@pytest.mark.parametrize(
+    'make_sink, read',
+    [
+        (
+            lambda path: ParquetSink(str(path)),
+            lambda path: _read_parts(path, pd.read_parquet),
+        ),
+        (
+            lambda path: CSVSink(str(path)),
+            lambda path: _read_parts(path, pd.read_csv),
+        ),
+        (
+            lambda path: SQLiteSink(str(path)),
+            _read_sqlite,
+        ),
+    ],
+    ids=['parquet', 'csv', 'sqlite'],
+)
+def test_sinks_write_the_tables_of_the_database(
+    tmp_path, expected, make_sink, read
+):
+    _create().initialize(sink=make_sink(tmp_path / 'out'), **KWARGS)
+    got = _normalized(read(tmp_path / 'out'))
+    for table in TABLES:
+        assert len(got[table]) > 0
+        assert set(got[table].columns) == set(expected[table].columns)
+        frame = got[table][expected[table].columns].astype(
+            expected[table].dtypes.to_dict()
+        )
+        pd.testing.assert_frame_equal(frame, expected[table])
@@ -0,0 +1,37 @@
+import datetime as dt
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.stock_returns import Create, MarketSimulator, simulated_tickers
+
+
+def test_summary_of_the_stages(tmp_path):
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'stocks.db'}")
+    summary = Create(
+        engine, base=Base(), source=MarketSimulator(seed=0), progress=None
+    ).initialize(
+        tickers=simulated_tickers(2),
+        start=dt.datetime(2023, 1, 2),
+        end=dt.datetime(2023, 1, 13),
+        no_investors=5,
+        with_trigger=False,
+        portfolio_engine='python',
+        numpy_seed=0,
+    )
+    stages = summary['stages']
+    assert {
+        'schema', 'generate.ohlcv', 'gaps', 'load.ohlcv',
+        'generate.transaction_history', 'load.transaction_history',
+        'generate.portfolio', 'load.portfolio',
+    } <= set(stages)
+
+    with engine.connect() as conn:
+        for table in ['ohlcv', 'transaction_history', 'portfolio']:
+            count = conn.exec_driver_sql(
+                f"select count(*) from {table}"
+            ).scalar()
+            assert stages[f'load.{table}']['rows'] == count
+    # 3 windows of 2 tickers
+    assert stages['generate.ohlcv']['calls'] == 6
+    assert summary['total_seconds'] > 0
+    assert 'profile' not in summary and 'peak_bytes' not in summary
@@ -0,0 +1,110 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+import pytest
+import sqlalchemy as db
+from sqlalchemy.orm import declarative_base as Base
+
+from dbgen.stock_returns import Create, MarketSimulator, simulated_tickers
+from dbgen.stock_returns._utils import transaction_chains
+
+
+DATES = np.arange(
+    '2023-01-02T09:30', '2023-01-02T16:00', dtype='datetime64[m]'
+).astype('datetime64[us]')
+
+
+def test_no_investments_gives_no_transactions():
+    trans = transaction_chains(1.0, 3, {'A': DATES}, 0)
+    assert all(len(col) == 0 for col in trans.values())
+    assert set(trans) == {
+        'user_id', 'datetime', 'ticker', 'position_type', 'action',
+        'no_shares',
+    }
+
+
+@pytest.mark.parametrize('no_longs, no_shorts', [(0, 2), (3, 0), (0, 0)])
+def test_initialize_without_longs_or_shorts(tmp_path, no_longs, no_shorts):
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'stocks.db'}")
+    Create(
+        engine, base=Base(), source=MarketSimulator(seed=0), progress=None
+    ).initialize(
+        tickers=simulated_tickers(2),
+        start=dt.datetime(2023, 1, 2),
+        end=dt.datetime(2023, 1, 6),
+        no_investors=4,
+        no_longs=no_longs,
+        no_shorts=no_shorts,
+        with_trigger=False,
+        portfolio_engine='python',
+        numpy_seed=0,
+    )
+    trans = pd.read_sql("select * from transaction_history", engine)
+    assert (trans['position_type'] == 1).any() == (no_longs > 0)
+    assert (trans['position_type'] == -1).any() == (no_shorts > 0)
+
+
+def _chains(trans_type, no_investors=20, no_investments=6, seed=0):
+    dates = {
+        'A': DATES,
+        'B': DATES[::3],
+        'C': DATES[:no_investments],
+    }
+    trans = transaction_chains(
+        trans_type,
+        no_investors,
+        dates,
+        no_investments,
+        np.random.default_rng(seed),
+    )
+    return pd.DataFrame(trans), dates
+
+
+@pytest.mark.parametrize('trans_type', [1.0, -1.0])
+@pytest.mark.parametrize('seed', range(5))
+def test_chains_keep_the_invariants_of_the_loop(trans_type, seed):
+    no_investors, no_investments = 20, 6
+    trans, dates = _chains(trans_type, no_investors, no_investments, seed)
+
+    # one chain per investor and ticker, ordered by investor and ticker
+    chains = trans[['user_id', 'ticker']].drop_duplicates()
+    assert len(chains) == no_investors * len(dates)
+    assert chains['user_id'].is_monotonic_increasing
+    assert (trans['position_type'] == int(trans_type)).all()
+
+    for (user_id, ticker), chain in trans.groupby(
+        ['user_id', 'ticker'], sort=False
+    ):
+        assert 1 <= len(chain) <= no_investments
+        assert chain['datetime'].is_unique
+        assert chain['datetime'].is_monotonic_increasing
+        assert chain['datetime'].isin(dates[ticker]).all()
+
+        # the chain opens in the direction of the position
+        assert chain['action'].iloc[0] == int(trans_type)
+        assert 20 <= chain['no_shares'].iloc[0] < 500
+        assert (chain['no_shares'] >= 0).all()
+
+        # the position never goes negative and the chain stops at the 
+        # first transaction that closes it
+        signed = np.where(
+            chain['action'] == int(trans_type),
+            chain['no_shares'],
+            -chain['no_shares'],
+        )
+        position = np.cumsum(signed)
+        assert (position >= 0).all()
+        assert (position[:-1] > 0).all()
+        if len(chain) < no_investments:
+            assert position[-1] == 0
+
+
+def test_chains_only_depend_on_the_generator():
+    a, _ = _chains(1.0, seed=3)
+    b, _ = _chains(1.0, seed=3)
+    pd.testing.assert_frame_equal(a, b)
+
+
+def test_too_few_dates_raise():
+    with pytest.raises(Exception, match='at least 6 dates'):
+        transaction_chains(1.0, 2, {'A': DATES[:5]}, 6)